@@ -0,0 +1,120 @@
+"""
+Perfil de produção do banco (SQLITE_PRODUCTION_PROFILE): PRAGMAs do SQLite
+aplicados a cada nova conexão e roteamento das leituras das views de
+consulta (listagem, detalhe, verificação) para uma conexão somente leitura,
+DATABASE_READ_ALIAS.
+
+Com journal_mode=WAL os leitores leem um snapshot consistente enquanto um
+escritor grava, de modo que as assinaturas não bloqueiam as consultas; a
+conexão de leitura separada evita que uma leitura espere atrás de uma
+transação de escrita da mesma conexão.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import Resolver404, resolve
+
+# Ligado pelo ReadDatabaseMiddleware durante as requisições de consulta.
+_read_request = ContextVar("read_request", default=False)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    Receptor de connection_created: aplica settings.SQLITE_PRAGMAS à nova
+    conexão SQLite. A conexão de leitura recebe também query_only, e não
+    altera o journal_mode (isso exige escrita no arquivo).
+    """
+    if connection.vendor != "sqlite":
+        return
+    read_only = connection.alias == settings.DATABASE_READ_ALIAS
+    pragmas = dict(getattr(settings, "SQLITE_PRAGMAS", {}))
+    if read_only:
+        pragmas.pop("journal_mode", None)
+        pragmas["query_only"] = "ON"
+    for name, value in pragmas.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def mirror_read_database(connection):
+    """
+    Aponta o alias de leitura para o mesmo arquivo do alias `connection`;
+    usado pelos comandos que criam um banco de teste próprio.
+    """
+    if settings.DATABASE_READ_ALIAS is None:
+        return
+    read_connection = connections[settings.DATABASE_READ_ALIAS]
+    read_connection.close()
+    read_connection.settings_dict["NAME"] = connection.settings_dict["NAME"]
+
+
+class ReadDatabaseRouter:
+    """
+    Envia as leituras feitas durante as requisições de consulta para
+    DATABASE_READ_ALIAS. Todas as escritas vão para o banco padrão, mesmo
+    as de objetos carregados pela conexão de leitura.
+    """
+
+    def db_for_read(self, model, **hints):
+        # Dentro de uma transação do banco padrão as leituras ficam nela,
+        # para enxergar as próprias escritas ainda não confirmadas.
+        if _read_request.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return settings.DATABASE_READ_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Os dois aliases são conexões para o mesmo banco.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == settings.DATABASE_READ_ALIAS:
+            return False
+        return None
+
+
+class ReadDatabaseMiddleware:
+    """
+    Marca as requisições às views listadas em DATABASE_READ_VIEWS (nomes de
+    URL) para que o ReadDatabaseRouter leia da conexão somente leitura.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.read_views = frozenset(settings.DATABASE_READ_VIEWS)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def is_read_request(self, request):
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in self.read_views
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.is_read_request(request):
+            return self.get_response(request)
+        token = _read_request.set(True)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_request.reset(token)
+
+    async def __acall__(self, request):
+        if not self.is_read_request(request):
+            return await self.get_response(request)
+        token = _read_request.set(True)
+        try:
+            return await self.get_response(request)
+        finally:
+            _read_request.reset(token)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'users.middleware.MetricsMiddleware',
+    'assinador_documentos.database.ReadDatabaseMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,9 +82,68 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
 }
 
+# Production SQLite profile, enabled with SQLITE_PRODUCTION_PROFILE=1 in the
+# environment. Connections are kept open between requests (CONN_MAX_AGE,
+# checked before reuse), every new connection gets SQLITE_PRAGMAS, and the
+# reads of the views in DATABASE_READ_VIEWS go to 'replica', a second,
+# read-only connection to the same file. Without it (development and the
+# default test run) Django's plain SQLite settings are used.
+SQLITE_PRODUCTION_PROFILE = os.environ.get('SQLITE_PRODUCTION_PROFILE') == '1'
+
+if SQLITE_PRODUCTION_PROFILE:
+    DATABASES['default'].update(
+        {
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            # A file (not the in-memory default) so that test threads get
+            # their own connections with SQLITE_PRAGMAS, as in production.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    )
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['assinador_documentos.database.ReadDatabaseRouter']
+    DATABASE_READ_ALIAS = 'replica'
+else:
+    DATABASE_READ_ALIAS = None
+
+DATABASE_READ_VIEWS = [
+    'list_documents',
+    'view_document',
+    'verify_document',
+    'verify_hash',
+    'verify_file',
+    'search_documents',
+    'async_list_documents',
+    'async_verify_document',
+    'async_verify_hash',
+]
+
+# Applied to every new SQLite connection with the production profile (see
+# assinador_documentos.database).
+# WAL lets readers run while a writer commits; synchronous=NORMAL is durable
+# across application crashes in WAL mode; mmap_size is in bytes, a negative
+# cache_size is in KiB and busy_timeout is in milliseconds.
+if SQLITE_PRODUCTION_PROFILE:
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    }
+else:
+    SQLITE_PRAGMAS = {}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -128,4 +190,86 @@ AUTH_USER_MODEL = 'users.CustomUser'
 
 LOGIN_URL = '/accounts/login/'
 
-LOGIN_REDIRECT_URL = 'index'
\ No newline at end of file
+LOGIN_REDIRECT_URL = 'index'
+
+# Maximum number of parsed public keys kept in the per-process LRU cache
+PUBLIC_KEY_CACHE_SIZE = 1024
+
+# Loaded private keys kept per process for signing: maximum entries and
+# seconds each key stays cached after being parsed
+PRIVATE_KEY_CACHE_SIZE = 256
+PRIVATE_KEY_CACHE_TTL = 300
+
+# Rendered signature verification pages, keyed by the document version
+# (content, hash, signature and owner key), so entries never go stale.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'verification': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'verification',
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+DOCUMENT_VERIFICATION_CACHE = 'verification'
+
+# The document list counts each user's documents only up to this many (and
+# shows "mais de N" beyond it), so the count never scans a whole large account
+DOCUMENT_COUNT_LIMIT = 1000
+
+# Content-addressed storage for document bodies (sharded by SHA-256 prefix)
+DOCUMENT_BLOB_ROOT = BASE_DIR / 'blobs'
+
+# Blob files are written before their row is committed; gc_blobs removes
+# files with no row once they are older than this many seconds
+DOCUMENT_BLOB_ORPHAN_GRACE = 3600
+
+# Documents of at least DOCUMENT_CHUNKED_HASH_MIN_SIZE bytes are hashed in
+# fixed-size chunks (tree hash), so an edit only rehashes the changed chunks.
+# None disables chunked hashing for new content.
+DOCUMENT_CHUNK_SIZE = 256 * 1024
+DOCUMENT_CHUNKED_HASH_MIN_SIZE = 4 * 1024 * 1024
+
+# Memory-mapped index of signed hashes used by the hash verification views;
+# build it with `manage.py rebuild_hash_index` (until then lookups use SQL)
+DOCUMENT_HASH_INDEX_DIR = BASE_DIR / 'hashindex'
+
+# Full-text search (SQLite FTS5): results per page, and how many characters of
+# each document body are indexed (very large documents are truncated)
+DOCUMENT_SEARCH_PAGE_SIZE = 20
+DOCUMENT_SEARCH_MAX_CHARS = 1_000_000
+
+# Documents fetched per query by the streaming export (JSONL/ZIP bundles)
+DOCUMENT_EXPORT_CHUNK_SIZE = 500
+
+# Sign views only enqueue a SigningJob; `manage.py run_signing_worker` signs
+# the queued documents in batches grouped by owner. False signs inline.
+DOCUMENT_SIGNING_QUEUE = True
+SIGNING_WORKER_BATCH_SIZE = 200
+# Seconds after which a job left running by a dead worker is queued again
+SIGNING_JOB_STALE_TIMEOUT = 300
+
+# Key rotation (`manage.py rotate_keys`): documents re-signed per batch, each
+# written in its own short transaction, and seconds to sleep between batches
+KEY_ROTATION_BATCH_SIZE = 200
+KEY_ROTATION_PAUSE = 0.2
+
+# Pre-generated keypair pool refilled by `manage.py refill_keypool`
+KEYPOOL_LOW_WATERMARK = 50
+KEYPOOL_HIGH_WATERMARK = 200
+
+# Bulk hash verification: maximum hashes per request and per IN (...) query
+BULK_HASH_VERIFY_MAX = 50000
+BULK_HASH_VERIFY_CHUNK_SIZE = 500
+
+# Threads used by the async views for CPU-bound crypto_utils calls
+CRYPTO_EXECUTOR_WORKERS = os.cpu_count() or 1
+
+# Keyset pagination of the document list (?page_size= is capped by the maximum)
+DOCUMENTS_PAGE_SIZE = 50
+DOCUMENTS_MAX_PAGE_SIZE = 500
+
+# Per-view latency, SQL and crypto-op metrics, exported to staff at /metrics/
+METRICS_ENABLED = True
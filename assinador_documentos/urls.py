@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth.views import LogoutView
 
-from users.views import index
+from users.views import export_metrics, index
 
 urlpatterns = [
     path("", index, name="index"),
@@ -11,4 +11,5 @@ urlpatterns = [
     path("accounts/logout/", LogoutView.as_view(next_page="index"), name="logout"),
     path("accounts/", include("django.contrib.auth.urls")),
     path("documents/", include("documents.urls")),
+    path("metrics/", export_metrics, name="metrics"),
 ]
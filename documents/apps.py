@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class DocumentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'documents'
+
+    def ready(self):
+        from django.conf import settings
+        from users import metrics
+        from . import signals  # noqa: F401
+        from .jobs import queue_metrics
+
+        if getattr(settings, "METRICS_ENABLED", True):
+            metrics.register_collector(queue_metrics)
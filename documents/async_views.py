@@ -0,0 +1,152 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect, render
+from django.template.loader import render_to_string
+from django.views import View
+
+from .executor import run_crypto
+from .hashindex import find_document, record_signatures, signature_entries
+from .jobs import enqueue_signing, pending_document_ids
+from .models import Document
+from .views import (
+    DocumentListMixin,
+    DocumentVersionMixin,
+    load_owner_private_key,
+    verification_cache,
+)
+
+
+async def get_user(request):
+    # request.user é carregado sob demanda com uma consulta síncrona; aqui ele
+    # é resolvido fora do event loop.
+    def load():
+        request.user.is_authenticated
+        return request.user
+
+    return await sync_to_async(load)()
+
+
+async def get_document(pk, owner=None):
+    documents = Document.objects.select_related("owner", "signing_key")
+    if owner is not None:
+        documents = documents.filter(owner=owner)
+    try:
+        return await documents.aget(id=pk)
+    except Document.DoesNotExist:
+        raise Http404("Documento não encontrado.")
+
+
+class AsyncDocumentListView(DocumentListMixin, View):
+    template_name = "list_documents.html"
+
+    async def get(self, request):
+        user = await get_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        page_size = self.get_page_size()
+        documents = [
+            document async for document in self.get_page_queryset(user)
+        ]
+        has_next = len(documents) > page_size
+        documents = documents[:page_size]
+
+        pending = await sync_to_async(pending_document_ids)(
+            [document.id for document in documents]
+        )
+        for document in documents:
+            document.signing_pending = document.id in pending
+            fingerprint = document.signing_key_fingerprint()
+            if document.signature is None or document.hash is None:
+                document.verified = False
+            elif fingerprint is None:
+                document.verified = False
+            elif not document.is_verification_current(fingerprint):
+                result = await run_crypto(document.verify_signature)
+                queryset, values = document.record_verification(result, fingerprint)
+                await queryset.aupdate(**values)
+
+        context = {
+            "documents": documents,
+            "document_count": await Document.objects.aowner_count(user.pk),
+            "document_count_limit": settings.DOCUMENT_COUNT_LIMIT,
+            "page_size": page_size,
+            "cursor": self.get_cursor(),
+            "next_cursor": documents[-1].id if has_next else None,
+        }
+        return render(request, self.template_name, context)
+
+
+class AsyncSignDocumentView(View):
+    async def get(self, request, pk):
+        user = await get_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        document = await get_document(pk, owner=user)
+        if settings.DOCUMENT_SIGNING_QUEUE:
+            await sync_to_async(enqueue_signing)(document)
+            return redirect("list_documents")
+
+        try:
+            private_key = await run_crypto(load_owner_private_key, document)
+        except (TypeError, ValueError) as e:
+            messages.error(request, f"Não foi possível carregar a chave: {e}.")
+            return redirect("list_documents")
+        await run_crypto(document.sign, private_key)
+        await document.asave()
+        await sync_to_async(record_signatures)(signature_entries([document]))
+        return redirect("list_documents")
+
+
+class AsyncVerifySignatureView(DocumentVersionMixin, View):
+    page_fields = ()
+
+    async def get(self, request, pk):
+        document = await get_document(pk)
+        validators = self.get_validators(document)
+        response = self.not_modified(request, validators)
+        if response is not None:
+            return response
+
+        cache_key = f"verify:{validators[0]}"
+        content = await verification_cache().aget(cache_key)
+        if content is None:
+            is_valid_signature = await run_crypto(document.verify_signature)
+            context = {
+                "document": document,
+                "is_valid_signature": is_valid_signature,
+            }
+            content = render_to_string("verify_signature.html", context, request)
+            await verification_cache().aset(cache_key, content)
+        return self.set_validators(HttpResponse(content), validators)
+
+
+class AsyncVerifyHashView(View):
+    async def get(self, request):
+        return render(request, "verify_hash.html")
+
+    async def post(self, request):
+        hash = request.POST.get("hash_code")
+        user = await get_user(request)
+        document = await sync_to_async(find_document)(Document.objects.all(), hash)
+
+        is_valid_hash = document is not None
+        is_user_owner = is_valid_hash and document.owner_id == user.id
+        if is_valid_hash:
+            # O template exibe o conteúdo, lido do blob store fora do loop.
+            await run_crypto(lambda: document.content)
+
+        return render(
+            request,
+            "verify_hash.html",
+            {
+                "document": document,
+                "hash": hash,
+                "is_valid_hash": is_valid_hash,
+                "is_user_owner": is_user_owner,
+            },
+        )
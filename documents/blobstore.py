@@ -0,0 +1,100 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+from users.crypto_utils import HASH_CHUNK_SIZE
+
+
+class BlobStore:
+    """
+    Armazenamento de conteúdo endereçado pelo SHA256 em um sistema de arquivos
+    local. Cada blob fica em `<raiz>/ab/cd/abcd...`, para que nenhum diretório
+    acumule arquivos demais.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def write(self, digest: str, content: str) -> int:
+        """
+        Grava o texto em UTF-8 de forma atômica (arquivo temporário + rename),
+        de modo que leitores nunca vejam um arquivo pela metade. O texto é
+        codificado em pedaços, sem uma cópia inteira em memória.
+
+        Retorna:
+        - int: Tamanho do blob em bytes.
+        """
+        path = self.path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for start in range(0, len(content), HASH_CHUNK_SIZE):
+                    tmp.write(content[start : start + HASH_CHUNK_SIZE].encode("utf-8"))
+                size = tmp.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return size
+
+    def delete(self, digest: str):
+        try:
+            os.unlink(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def files(self):
+        """
+        Percorre os arquivos do blob store, incluindo temporários deixados
+        por gravações interrompidas.
+        """
+        if self.root.exists():
+            yield from self.root.glob("??/??/*")
+
+    def open(self, digest: str):
+        return open_mapped(self.path(digest))
+
+    def read_text(self, digest: str) -> str:
+        with self.open(digest) as data:
+            return str(data, "utf-8")
+
+    def digest(self, digest: str) -> bytes:
+        return file_digest(self.path(digest))
+
+
+@contextmanager
+def open_mapped(path):
+    """
+    Abre um arquivo mapeado em memória (somente leitura). Arquivos vazios não
+    podem ser mapeados e são retornados como b"".
+    """
+    with open(path, "rb") as blob_file:
+        if os.fstat(blob_file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+def file_digest(path) -> bytes:
+    """
+    Calcula o SHA256 de um arquivo lendo direto do mapeamento em memória.
+    """
+    with open_mapped(path) as data:
+        return hashlib.sha256(data).digest()
+
+
+def get_blob_store() -> BlobStore:
+    return BlobStore(settings.DOCUMENT_BLOB_ROOT)
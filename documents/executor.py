@@ -0,0 +1,37 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor = None
+
+
+def get_crypto_executor() -> ThreadPoolExecutor:
+    """
+    Pool de threads limitado usado pelas views assíncronas para as operações
+    de criptografia, que liberam o GIL dentro do OpenSSL e do hashlib.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.CRYPTO_EXECUTOR_WORKERS,
+            thread_name_prefix="crypto",
+        )
+    return _executor
+
+
+async def run_crypto(function, *args, **kwargs):
+    """
+    Executa uma função de criptografia (bloqueante) no pool de threads sem
+    bloquear o event loop.
+    """
+    loop = asyncio.get_running_loop()
+    # Como asyncio.to_thread: a função roda no contexto da requisição, o que
+    # mantém as métricas por requisição (users.metrics).
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_crypto_executor(),
+        functools.partial(context.run, function, *args, **kwargs),
+    )
@@ -0,0 +1,155 @@
+import json
+import zipfile
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from .models import Document
+
+# Versão do formato do pacote exportado.
+BUNDLE_FORMAT = 1
+
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "blob",
+    "hash",
+    "signature",
+    "signature_scheme",
+    "signature_algorithm",
+    "chunk_size",
+    "merkle_root",
+    "merkle_path",
+    "owner__username",
+    "owner__public_key",
+    "signing_key__version",
+    "signing_key__public_key",
+]
+
+
+def exportable_documents(owner=None, after_id=0):
+    """
+    Documentos assinados, em ordem de id, a partir do cursor `after_id`.
+
+    Args:
+    - owner (CustomUser): Dono dos documentos. None exporta todos.
+    - after_id (int): Exporta apenas os documentos com id maior.
+    """
+    queryset = Document.objects.filter(signature__isnull=False, id__gt=after_id)
+    if owner is not None:
+        queryset = queryset.filter(owner=owner)
+    return (
+        queryset.select_related("owner", "signing_key")
+        .only(*EXPORT_FIELDS)
+        .order_by("id")
+    )
+
+
+def document_record(document) -> dict:
+    """
+    Registro de um documento no pacote: o conteúdo e tudo o que é preciso
+    para verificar a assinatura sem acesso ao banco.
+    """
+    public_key = document.signing_public_key()
+    if public_key is not None:
+        public_key = bytes(public_key).decode("ascii")
+    key_version = None
+    if document.signing_key_id is not None:
+        key_version = document.signing_key.version
+    return {
+        "type": "document",
+        "id": document.id,
+        "title": document.title,
+        "owner": document.owner.username,
+        "content": document.content,
+        "hash": document.hash,
+        "signature": document.hex_signature(),
+        "signature_scheme": document.signature_scheme,
+        "signature_algorithm": document.signature_algorithm,
+        "chunk_size": document.chunk_size,
+        "merkle_root": document.merkle_root,
+        "merkle_path": document.merkle_path,
+        "public_key": public_key,
+        "key_version": key_version,
+    }
+
+
+def iter_jsonl(queryset, chunk_size=None, initial_count=0):
+    """
+    Gera o pacote JSONL linha a linha: um registro por documento e, no fim,
+    um registro "end". Um pacote sem o registro final foi interrompido e
+    pode ser retomado a partir do id do último documento recebido.
+
+    Args:
+    - queryset (QuerySet): Resultado de exportable_documents().
+    - chunk_size (int): Documentos lidos do banco por vez.
+    - initial_count (int): Documentos já gravados no pacote retomado; o
+      registro "end" conta o pacote inteiro.
+
+    Retorna:
+    - generator: Linhas do pacote (str), cada uma terminada em "\\n".
+    """
+    chunk_size = chunk_size or settings.DOCUMENT_EXPORT_CHUNK_SIZE
+    count = initial_count
+    last_id = None
+    for document in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(document_record(document), ensure_ascii=False) + "\n"
+        count += 1
+        last_id = document.id
+    yield json.dumps({"type": "end", "count": count, "last_id": last_id}) + "\n"
+
+
+class _StreamBuffer:
+    """
+    Destino "não posicionável" para o zipfile: acumula os bytes escritos até
+    que o gerador os repasse à resposta.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_zip(queryset, chunk_size=None, after_id=0):
+    """
+    Gera um ZIP com o pacote JSONL comprimido (documents.jsonl) e um
+    manifest.json. O JSONL é escrito como uma única entrada em streaming, de
+    modo que a memória usada não depende da quantidade de documentos.
+
+    Retorna:
+    - generator: Pedaços (bytes) do arquivo ZIP.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        with bundle.open("documents.jsonl", "w", force_zip64=True) as entry:
+            for line in iter_jsonl(queryset, chunk_size):
+                entry.write(line.encode("utf-8"))
+                data = buffer.pop()
+                if data:
+                    yield data
+        end = json.loads(line)
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "after_id": after_id,
+            "count": end["count"],
+            "last_id": end["last_id"],
+        }
+        bundle.writestr("manifest.json", json.dumps(manifest, indent=2))
+    yield buffer.pop()
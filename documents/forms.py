@@ -1,8 +1,50 @@
+import re
+
 from django import forms
+from django.conf import settings
 from .models import Document
 
 
 class DocumentForm(forms.ModelForm):
+    # O conteúdo fica no blob store, fora das colunas do modelo.
+    content = forms.CharField(label="Conteúdo", widget=forms.Textarea)
+
     class Meta:
         model = Document
-        fields = ["title", "content"]
+        fields = ["title"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.blob_id is not None:
+            self.fields["content"].initial = self.instance.content
+
+    def save(self, commit=True):
+        self.instance.content = self.cleaned_data["content"]
+        return super().save(commit)
+
+
+class BulkHashVerifyForm(forms.Form):
+    hashes = forms.CharField(
+        label="Hashes", widget=forms.Textarea(attrs={"rows": 10}), required=False
+    )
+    hashes_file = forms.FileField(label="Arquivo de hashes", required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        hashes = re.split(r"[\s,;]+", cleaned_data.get("hashes") or "")
+        hashes_file = cleaned_data.get("hashes_file")
+        if hashes_file:
+            for line in hashes_file:
+                hashes += re.split(r"[\s,;]+", line.decode("utf-8", "replace"))
+                if len(hashes) > settings.BULK_HASH_VERIFY_MAX:
+                    break
+
+        hashes = [hash.strip().lower() for hash in hashes if hash.strip()]
+        if not hashes:
+            raise forms.ValidationError("Informe ao menos um hash.")
+        if len(hashes) > settings.BULK_HASH_VERIFY_MAX:
+            raise forms.ValidationError(
+                f"Informe no máximo {settings.BULK_HASH_VERIFY_MAX} hashes."
+            )
+        cleaned_data["hash_list"] = hashes
+        return cleaned_data
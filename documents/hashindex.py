@@ -0,0 +1,400 @@
+"""
+Índice em disco dos hashes assinados (SHA256 -> id do documento e do dono),
+consultado pela verificação de hash sem passar pelo banco. Os documentos com
+hash por trechos entram também pelo SHA256 do arquivo (Document.file_hash).
+
+São dois arquivos em DOCUMENT_HASH_INDEX_DIR, ambos com registros de 48
+bytes (32 do digest, 8 do id do documento e 8 do id do dono):
+
+- `hashes.idx`: registros ordenados pelo digest, precedidos por uma tabela de
+  65536 buckets (os dois primeiros bytes do digest) com a posição do
+  primeiro registro de cada bucket. Uma consulta lê duas entradas da tabela
+  e faz uma busca binária em poucos registros, direto do arquivo mapeado em
+  memória, compartilhado por todos os processos pelo page cache.
+- `hashes.log`: registros acrescentados a cada assinatura, lidos de forma
+  incremental por cada processo.
+
+`manage.py compact_hash_index` incorpora o log ao arquivo ordenado e
+`manage.py rebuild_hash_index` reconstrói o índice a partir do banco. O
+índice pode conter entradas antigas (documento reassinado ou apagado), por
+isso quem encontra um documento pelo índice confere o hash no banco; um
+hash ausente do índice não existe no banco.
+"""
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q
+
+MAGIC = b"HASHIDX1"
+HEADER = struct.Struct("<8sQ")
+RECORD = struct.Struct("<32sQQ")
+BUCKETS = 1 << 16
+BUCKET_TABLE = struct.Struct(f"<{BUCKETS + 1}Q")
+DATA_OFFSET = HEADER.size + BUCKET_TABLE.size
+
+INDEX_NAME = "hashes.idx"
+LOG_NAME = "hashes.log"
+# Log sendo incorporado por uma compactação (ou deixado por uma que falhou).
+ROTATED_LOG_NAME = "hashes.log.old"
+
+
+def _bucket(digest: bytes) -> int:
+    return int.from_bytes(digest[:2], "big")
+
+
+def _file_id(path):
+    # Um arquivo substituído muda de inode; um log que cresceu muda de tamanho.
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_size)
+
+
+def _read_records(path):
+    """
+    Lê os registros completos de um log; um registro pela metade no fim
+    (escrita em andamento) é ignorado.
+    """
+    try:
+        with open(path, "rb") as log_file:
+            data = log_file.read()
+    except FileNotFoundError:
+        return []
+    end = len(data) - len(data) % RECORD.size
+    return list(RECORD.iter_unpack(data[:end]))
+
+
+def write_index(path, records):
+    """
+    Grava um arquivo de índice ordenado de forma atômica (arquivo temporário
+    + rename): os leitores veem o arquivo antigo ou o novo, nunca um
+    intermediário.
+
+    Args:
+    - path (Path): Caminho do arquivo de índice.
+    - records (iterable): Tuplas (digest, id do documento, id do dono).
+      Para cada digest fica o menor id de documento.
+
+    Retorna:
+    - int: Quantidade de registros gravados.
+    """
+    best = {}
+    for digest, document_id, owner_id in records:
+        current = best.get(digest)
+        if current is None or document_id < current[0]:
+            best[digest] = (document_id, owner_id)
+    digests = sorted(best)
+
+    table = [0] * (BUCKETS + 1)
+    for digest in digests:
+        table[_bucket(digest) + 1] += 1
+    for bucket in range(BUCKETS):
+        table[bucket + 1] += table[bucket]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(HEADER.pack(MAGIC, len(digests)))
+            tmp.write(BUCKET_TABLE.pack(*table))
+            for digest in digests:
+                tmp.write(RECORD.pack(digest, *best[digest]))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(digests)
+
+
+class HashIndex:
+    """
+    Leitura e escrita do índice de hashes de um diretório. Cada processo
+    mantém o arquivo ordenado mapeado e um dicionário com o log; ambos são
+    atualizados quando os arquivos mudam.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.index_path = self.root / INDEX_NAME
+        self.log_path = self.root / LOG_NAME
+        self.rotated_log_path = self.root / ROTATED_LOG_NAME
+        self._index_id = None
+        self._index_file = None
+        self._index_map = None
+        self._count = 0
+        self._log_ids = (None, None)
+        self._log_offset = 0
+        self._log = {}
+
+    @property
+    def available(self) -> bool:
+        """
+        Se o índice foi construído (rebuild_hash_index). Sem ele, as
+        consultas devem ir ao banco.
+        """
+        return self.index_path.exists()
+
+    def append(self, entries):
+        """
+        Acrescenta ao log as entradas (hash em hexadecimal, id do documento,
+        id do dono) de documentos recém-assinados. Cada chamada é um único
+        write com O_APPEND, seguro entre processos; o arquivo é reaberto a
+        cada chamada para acompanhar as rotações do log.
+        """
+        data = b"".join(
+            RECORD.pack(bytes.fromhex(hash), document_id, owner_id)
+            for hash, document_id, owner_id in entries
+            if hash
+        )
+        if not data:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        while True:
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                written_to = os.fstat(fd).st_ino
+            finally:
+                os.close(fd)
+            # Se uma compactação rotacionou o log entre o open e o write, as
+            # entradas podem ter ficado fora do índice: grava de novo no log
+            # atual (entradas repetidas são inofensivas).
+            current = _file_id(self.log_path)
+            if current is not None and current[0] == written_to:
+                return
+
+    def lookup(self, digest: bytes):
+        """
+        Procura um digest no log e no arquivo ordenado.
+
+        Retorna:
+        - tuple: (id do documento, id do dono), ou None se o digest não está
+          no índice.
+        """
+        self._refresh()
+        found = self._log.get(digest)
+        if found is not None:
+            return found
+        if self._index_map is None:
+            return None
+        index = self._index_map
+        bucket = _bucket(digest)
+        low, high = struct.unpack_from("<QQ", index, HEADER.size + bucket * 8)
+        while low < high:
+            middle = (low + high) // 2
+            offset = DATA_OFFSET + middle * RECORD.size
+            key = index[offset : offset + 32]
+            if key < digest:
+                low = middle + 1
+            elif key > digest:
+                high = middle
+            else:
+                _, document_id, owner_id = RECORD.unpack_from(index, offset)
+                return document_id, owner_id
+        return None
+
+    def __len__(self):
+        self._refresh()
+        return self._count + len(self._log)
+
+    def _refresh(self):
+        # Os logs são conferidos antes do índice: uma compactação grava o
+        # índice novo antes de apagar o log rotacionado, então nenhuma
+        # entrada fica de fora no meio do caminho.
+        rotated_id = _file_id(self.rotated_log_path)
+        log_id = _file_id(self.log_path)
+        previous_rotated_id, previous_log_id = self._log_ids
+        log_replaced = previous_log_id is not None and (
+            log_id is None or log_id[0] != previous_log_id[0]
+        )
+        if rotated_id != previous_rotated_id or log_replaced:
+            # Log rotacionado ou incorporado ao índice: relê tudo.
+            self._log = {}
+            self._log_offset = 0
+            for record in _read_records(self.rotated_log_path):
+                self._add_to_log(*record)
+        if log_id is not None and log_id != previous_log_id:
+            self._read_log_tail()
+        self._log_ids = (rotated_id, log_id)
+
+        index_id = _file_id(self.index_path)
+        if index_id != self._index_id:
+            self._map_index()
+            self._index_id = index_id
+
+    def _add_to_log(self, digest, document_id, owner_id):
+        current = self._log.get(digest)
+        if current is None or document_id < current[0]:
+            self._log[digest] = (document_id, owner_id)
+
+    def _read_log_tail(self):
+        try:
+            with open(self.log_path, "rb") as log_file:
+                log_file.seek(self._log_offset)
+                data = log_file.read()
+        except FileNotFoundError:
+            return
+        end = len(data) - len(data) % RECORD.size
+        for record in RECORD.iter_unpack(data[:end]):
+            self._add_to_log(*record)
+        self._log_offset += end
+
+    def _map_index(self):
+        self.close()
+        try:
+            index_file = open(self.index_path, "rb")
+        except FileNotFoundError:
+            return
+        index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(index_map, 0)
+        if magic != MAGIC:
+            index_map.close()
+            index_file.close()
+            raise ValueError(f"{self.index_path} não é um índice de hashes.")
+        self._index_file, self._index_map, self._count = index_file, index_map, count
+
+    def close(self):
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_file.close()
+        self._index_file = self._index_map = None
+        self._count = 0
+
+    def iter_index(self):
+        """
+        Registros (digest, id do documento, id do dono) do arquivo ordenado.
+        """
+        self._refresh()
+        if self._index_map is None:
+            return
+        for number in range(self._count):
+            yield RECORD.unpack_from(
+                self._index_map, DATA_OFFSET + number * RECORD.size
+            )
+
+    def rotate_log(self) -> Path:
+        """
+        Separa o log atual para ser incorporado ao índice; novas entradas
+        vão para um log novo. Um log rotacionado por uma compactação que não
+        terminou é reaproveitado (suas entradas ainda não estão no índice).
+        """
+        if not self.rotated_log_path.exists():
+            try:
+                os.replace(self.log_path, self.rotated_log_path)
+            except FileNotFoundError:
+                pass
+        return self.rotated_log_path
+
+    def compact(self) -> int:
+        """
+        Incorpora o log ao arquivo ordenado.
+
+        Retorna:
+        - int: Quantidade de registros do novo índice.
+        """
+        rotated = self.rotate_log()
+        records = list(self.iter_index())
+        records.extend(_read_records(rotated))
+        count = write_index(self.index_path, records)
+        rotated.unlink(missing_ok=True)
+        return count
+
+    def rebuild(self, records) -> int:
+        """
+        Substitui o índice pelos registros dados (lidos do banco). O log é
+        rotacionado antes da leitura, então as entradas acrescentadas
+        durante a reconstrução são preservadas.
+
+        Args:
+        - records (callable): Devolve um iterável de tuplas (hash em
+          hexadecimal, id do documento, id do dono); é chamado depois da
+          rotação do log.
+        """
+        rotated = self.rotate_log()
+        count = write_index(
+            self.index_path,
+            (
+                (bytes.fromhex(hash), document_id, owner_id)
+                for hash, document_id, owner_id in records()
+                if hash and len(hash) == 64
+            ),
+        )
+        rotated.unlink(missing_ok=True)
+        return count
+
+
+_indexes = {}
+
+
+def get_hash_index() -> HashIndex:
+    root = str(settings.DOCUMENT_HASH_INDEX_DIR)
+    index = _indexes.get(root)
+    if index is None:
+        index = _indexes[root] = HashIndex(root)
+    return index
+
+
+def signature_entries(documents, owner_id=None):
+    """
+    Entradas do índice para documentos recém-assinados: o hash assinado e,
+    quando existe, o SHA256 do arquivo (file_hash, nos documentos com hash
+    por trechos).
+
+    Args:
+    - documents (iterable): Documentos assinados.
+    - owner_id (int): Dono dos documentos. Padrão: document.owner_id.
+    """
+    for document in documents:
+        owner = owner_id if owner_id is not None else document.owner_id
+        yield document.hash, document.id, owner
+        if document.file_hash:
+            yield document.file_hash, document.id, owner
+
+
+def hash_filter(hash):
+    """
+    Condição dos documentos assinados com o hash: o hash assinado ou o
+    SHA256 do arquivo.
+    """
+    return Q(hash=hash) | Q(file_hash=hash)
+
+
+def record_signatures(entries):
+    """
+    Registra no índice os hashes de documentos recém-assinados.
+
+    Args:
+    - entries (iterable): Tuplas (hash, id do documento, id do dono).
+    """
+    get_hash_index().append(entries)
+
+
+def find_document(queryset, hash):
+    """
+    Documento assinado com o hash, como
+    `queryset.filter(hash_filter(hash)).first()`, mas consultando primeiro o
+    índice: um hash ausente do índice é respondido
+    sem SQL, e um encontrado é buscado pela chave primária.
+    """
+    try:
+        digest = bytes.fromhex(hash or "")
+    except ValueError:
+        return None
+    if len(digest) != 32:
+        return None
+    index = get_hash_index()
+    if not index.available:
+        return queryset.filter(hash_filter(hash)).first()
+    found = index.lookup(digest)
+    if found is None:
+        return None
+    document = queryset.filter(hash_filter(hash), pk=found[0]).first()
+    if document is None:
+        # Entrada antiga (documento reassinado ou apagado).
+        document = queryset.filter(hash_filter(hash)).first()
+    return document
@@ -0,0 +1,238 @@
+"""
+Fila de assinatura em segundo plano. As views só registram um SigningJob; o
+comando `manage.py run_signing_worker` reserva lotes de pedidos, agrupa-os
+por dono (cada chave privada é carregada uma vez por lote) e grava as
+assinaturas com bulk_update.
+"""
+import math
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from users.crypto_utils import get_cached_private_key
+from .hashindex import record_signatures, signature_entries
+from .models import Document, SigningJob, SigningJobStatus
+from .signing import SIGNED_FIELDS, lock_unchanged
+
+# Pedidos que ainda vão assinar o documento (o list_documents mostra "Na fila").
+ACTIVE_STATUSES = (SigningJobStatus.PENDING, SigningJobStatus.RUNNING)
+
+
+def enqueue_signing(document) -> SigningJob:
+    """
+    Registra um pedido de assinatura do documento. Um pedido ainda na fila
+    já vai ler o conteúdo atual e é reaproveitado; um pedido em execução
+    pode ter lido o conteúdo anterior, então um novo é criado.
+
+    Retorna:
+    - SigningJob: O pedido pendente do documento.
+    """
+    job = SigningJob.objects.filter(
+        document=document, status=SigningJobStatus.PENDING
+    ).first()
+    if job is None:
+        job = SigningJob.objects.create(document=document, owner_id=document.owner_id)
+    return job
+
+
+def pending_document_ids(document_ids) -> set:
+    """
+    Ids, dentre `document_ids`, dos documentos com assinatura na fila.
+    """
+    return set(
+        SigningJob.objects.filter(
+            document_id__in=document_ids, status__in=ACTIVE_STATUSES
+        ).values_list("document_id", flat=True)
+    )
+
+
+def claim_jobs(limit: int) -> list:
+    """
+    Reserva até `limit` pedidos pendentes, em ordem de chegada, para este
+    worker. Com SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL, MySQL 8)
+    workers concorrentes pulam as linhas já travadas; no SQLite, que não
+    tem SKIP LOCKED, o UPDATE condicional em `status` decide qual worker
+    ficou com cada pedido e os demais simplesmente não o recebem.
+
+    Retorna:
+    - list: Pedidos reservados (status RUNNING), com documento e dono.
+    """
+    claim = uuid.uuid4().hex
+    pending = SigningJob.objects.filter(status=SigningJobStatus.PENDING).order_by("id")
+    values = {
+        "status": SigningJobStatus.RUNNING,
+        "claim": claim,
+        "started_at": timezone.now(),
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                pending.select_for_update(skip_locked=True).values_list(
+                    "id", flat=True
+                )[:limit]
+            )
+            SigningJob.objects.filter(id__in=ids).update(**values)
+    else:
+        ids = list(pending.values_list("id", flat=True)[:limit])
+        SigningJob.objects.filter(
+            id__in=ids, status=SigningJobStatus.PENDING
+        ).update(**values)
+    return list(
+        SigningJob.objects.filter(id__in=ids, claim=claim)
+        .select_related("document__owner")
+        .order_by("id")
+    )
+
+
+def requeue_stale(timeout: float) -> int:
+    """
+    Devolve à fila os pedidos em execução há mais de `timeout` segundos
+    (worker interrompido no meio de um lote).
+
+    Retorna:
+    - int: Quantidade de pedidos devolvidos.
+    """
+    limit = timezone.now() - timedelta(seconds=timeout)
+    return SigningJob.objects.filter(
+        status=SigningJobStatus.RUNNING, started_at__lt=limit
+    ).update(status=SigningJobStatus.PENDING, claim="", started_at=None)
+
+
+def process_jobs(jobs) -> dict:
+    """
+    Assina os documentos de um lote de pedidos reservados. Os pedidos são
+    agrupados por dono, a chave de cada dono é carregada uma vez e cada
+    documento é assinado uma vez mesmo que tenha vários pedidos no lote.
+    Documentos e pedidos são gravados com um bulk_update cada.
+
+    Um documento editado enquanto o lote era assinado não é gravado: os seus
+    pedidos voltam para a fila e assinam o conteúdo novo no próximo lote.
+
+    Retorna:
+    - dict: Quantidade de pedidos concluídos ("done"), com falha ("failed")
+      e devolvidos à fila ("requeued") e as latências de fila (criação ->
+      conclusão, em segundos) dos concluídos.
+    """
+    by_owner = {}
+    for job in jobs:
+        by_owner.setdefault(job.owner_id, []).append(job)
+
+    signed = {}
+    loaded_at = {}
+    done = []
+    failed = []
+    for owner_jobs in by_owner.values():
+        owner = owner_jobs[0].document.owner
+        try:
+            if not owner.private_key:
+                raise ValueError("O dono do documento não tem chave privada.")
+            private_key = get_cached_private_key(owner.id, owner.private_key)
+        except (TypeError, ValueError) as e:
+            failed.extend((job, str(e)) for job in owner_jobs)
+            continue
+
+        for job in owner_jobs:
+            if job.document_id not in signed:
+                loaded_at[job.document_id] = job.document.updated_at
+                try:
+                    job.document.sign(private_key)
+                except (OSError, ValueError) as e:
+                    failed.append((job, str(e)))
+                    continue
+                signed[job.document_id] = job.document
+            done.append(job)
+
+    with transaction.atomic():
+        unchanged = lock_unchanged(list(signed.values()), loaded_at)
+        written = {document.id for document in unchanged}
+        requeued = [job for job in done if job.document_id not in written]
+        done = [job for job in done if job.document_id in written]
+        finished_at = timezone.now()
+        for job in done:
+            job.status = SigningJobStatus.DONE
+            job.finished_at = finished_at
+        for job, error in failed:
+            job.status = SigningJobStatus.FAILED
+            job.error = error
+            job.finished_at = finished_at
+        for job in requeued:
+            job.status = SigningJobStatus.PENDING
+            job.claim = ""
+            job.started_at = None
+        Document.objects.bulk_update(unchanged, SIGNED_FIELDS)
+        SigningJob.objects.bulk_update(
+            done + [job for job, _ in failed] + requeued,
+            ["status", "error", "claim", "started_at", "finished_at"],
+        )
+    record_signatures(signature_entries(unchanged))
+
+    return {
+        "done": len(done),
+        "failed": len(failed),
+        "requeued": len(requeued),
+        "latencies": [
+            (job.finished_at - job.created_at).total_seconds() for job in done
+        ],
+    }
+
+
+def queue_stats(window: float = 300) -> dict:
+    """
+    Estado da fila: pedidos por situação, idade do pedido pendente mais
+    antigo e, para os pedidos concluídos nos últimos `window` segundos, a
+    vazão (documentos/s) e a latência de fila (p50/p95/máxima, em segundos).
+    """
+    now = timezone.now()
+    counts = dict(
+        SigningJob.objects.values_list("status").annotate(Count("id")).order_by()
+    )
+    oldest = SigningJob.objects.filter(status=SigningJobStatus.PENDING).aggregate(
+        Min("created_at")
+    )["created_at__min"]
+    latencies = sorted(
+        (finished_at - created_at).total_seconds()
+        for created_at, finished_at in SigningJob.objects.filter(
+            status=SigningJobStatus.DONE,
+            finished_at__gte=now - timedelta(seconds=window),
+        ).values_list("created_at", "finished_at")
+    )
+
+    def percentile(fraction):
+        if not latencies:
+            return None
+        return latencies[max(math.ceil(len(latencies) * fraction) - 1, 0)]
+
+    return {
+        "counts": {
+            status.label: counts.get(status.value, 0) for status in SigningJobStatus
+        },
+        "oldest_pending_age": (now - oldest).total_seconds() if oldest else None,
+        "throughput": len(latencies) / window,
+        "latency_p50": percentile(0.5),
+        "latency_p95": percentile(0.95),
+        "latency_max": latencies[-1] if latencies else None,
+    }
+
+
+def queue_metrics():
+    """
+    Coletor de users.metrics com a profundidade da fila de assinatura.
+    """
+    counts = dict(
+        SigningJob.objects.filter(status__in=ACTIVE_STATUSES)
+        .values_list("status")
+        .annotate(Count("id"))
+        .order_by()
+    )
+    yield (
+        "signing_queue_jobs",
+        "gauge",
+        "Pedidos de assinatura na fila e em execução.",
+        [
+            ({"status": status.name.lower()}, counts.get(status.value, 0))
+            for status in ACTIVE_STATUSES
+        ],
+    )
@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from documents.models import Document
+from users.crypto_utils import verify_signatures_batch
+
+
+class Command(BaseCommand):
+    help = "Verifica as assinaturas de todos os documentos assinados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", help="Username do dono dos documentos.")
+        parser.add_argument("--min-id", type=int, help="Menor id a verificar.")
+        parser.add_argument("--max-id", type=int, help="Maior id a verificar.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Documentos lidos do banco e verificados por lote.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None, help="Threads de verificação."
+        )
+
+    def get_queryset(self, options):
+        queryset = Document.objects.filter(
+            signature__isnull=False, hash__isnull=False
+        )
+        if options["owner"]:
+            queryset = queryset.filter(owner__username=options["owner"])
+        if options["min_id"] is not None:
+            queryset = queryset.filter(id__gte=options["min_id"])
+        if options["max_id"] is not None:
+            queryset = queryset.filter(id__lte=options["max_id"])
+        return (
+            queryset.select_related("owner", "signing_key")
+            .only(
+                "id",
+                "title",
+                "blob",
+                "hash",
+                "signature",
+                "signature_scheme",
+                "signature_algorithm",
+                "chunk_size",
+                "merkle_root",
+                "merkle_path",
+                "owner__public_key",
+                "signing_key__public_key",
+            )
+            .order_by("id")
+        )
+
+    def verify_chunk(self, chunk, executor):
+        """
+        Verifica um lote e escreve as falhas assim que são encontradas.
+
+        Retorna:
+        - int: Quantidade de falhas do lote.
+        """
+        results = verify_signatures_batch(
+            (document.verification_item() for document in chunk),
+            executor=executor,
+        )
+        failures = 0
+        for document, valid in zip(chunk, results):
+            if not valid:
+                self.stdout.write(f"FALHA\t{document.id}\t{document.title}")
+                failures += 1
+        return failures
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        total = 0
+        failures = 0
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            chunk = []
+            documents = self.get_queryset(options).iterator(chunk_size=chunk_size)
+            for document in documents:
+                chunk.append(document)
+                if len(chunk) >= chunk_size:
+                    failures += self.verify_chunk(chunk, executor)
+                    total += len(chunk)
+                    chunk = []
+            if chunk:
+                failures += self.verify_chunk(chunk, executor)
+                total += len(chunk)
+
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"{total} documentos verificados em {elapsed:.2f}s "
+            f"({rate:.1f} docs/s), {failures} falhas."
+        )
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from assinador_documentos.database import mirror_read_database
+from documents.models import Document
+from documents.views import verification_cache
+from users.crypto_utils import generate_keypair_pem, load_private_key_from_pem
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispara N requisições concorrentes de verificação contra as views "
+        "síncronas (WSGI) e assíncronas (ASGI) e compara vazão e latência. "
+        "Usa um banco de testes descartável."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--documents", type=int, default=50)
+        parser.add_argument(
+            "--size", type=int, default=64 * 1024, help="Tamanho dos documentos."
+        )
+
+    def seed(self, options):
+        user = CustomUser.objects.create_user("bench", password="bench")
+        user.private_key, user.public_key = generate_keypair_pem()
+        user.save()
+        private_key = load_private_key_from_pem(user.private_key)
+        ids = []
+        for index in range(options["documents"]):
+            document = Document(
+                owner=user, title=f"doc {index}", content="x" * options["size"]
+            )
+            document.sign(private_key)
+            document.save()
+            ids.append(document.id)
+        return ids
+
+    def report(self, name, latencies, elapsed):
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{name:<6}{len(latencies) / elapsed:>12.1f}"
+            f"{statistics.median(latencies) * 1000:>12.2f}{p95 * 1000:>12.2f}"
+        )
+
+    def run_wsgi(self, urls, concurrency):
+        client = Client()
+
+        def fetch(url):
+            started = time.perf_counter()
+            assert client.get(url).status_code == 200
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(fetch, urls))
+        return latencies, time.perf_counter() - started
+
+    async def run_asgi(self, urls, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+        client = AsyncClient()
+
+        async def fetch(url):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url)
+                assert response.status_code == 200
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(fetch(url) for url in urls))
+        return list(latencies), time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        old_blob_root = settings.DOCUMENT_BLOB_ROOT
+        old_hash_index_dir = settings.DOCUMENT_HASH_INDEX_DIR
+        # Blobs e índice de hashes do banco descartável também são
+        # descartáveis: fora do diretório real, nada fica órfão.
+        tmp_dir = tempfile.mkdtemp()
+        settings.DOCUMENT_BLOB_ROOT = os.path.join(tmp_dir, "blobs")
+        settings.DOCUMENT_HASH_INDEX_DIR = os.path.join(tmp_dir, "hashindex")
+        if connection.vendor == "sqlite":
+            # Um arquivo em vez do banco em memória compartilhado, que
+            # serializaria as leituras concorrentes.
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                tmp_dir, "bench.sqlite3"
+            )
+        connection.creation.create_test_db(verbosity=0)
+        mirror_read_database(connection)
+        try:
+            ids = self.seed(options)
+            count = options["requests"]
+            concurrency = options["concurrency"]
+            sync_urls = [
+                f"/documents/verify/{ids[i % len(ids)]}/" for i in range(count)
+            ]
+            async_urls = [
+                f"/documents/async/verify/{ids[i % len(ids)]}/" for i in range(count)
+            ]
+
+            self.stdout.write(
+                f"{count} requisições, concorrência {concurrency}, "
+                f"documentos de {options['size']} bytes"
+            )
+            self.stdout.write(f"{'':<6}{'req/s':>12}{'p50 ms':>12}{'p95 ms':>12}")
+            # As duas execuções verificam os mesmos documentos: sem limpar o
+            # cache de verificações, as páginas viriam prontas e nenhuma
+            # mediria a verificação RSA.
+            verification_cache().clear()
+            self.report("WSGI", *self.run_wsgi(sync_urls, concurrency))
+            verification_cache().clear()
+            self.report("ASGI", *asyncio.run(self.run_asgi(async_urls, concurrency)))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            mirror_read_database(connection)
+            teardown_test_environment()
+            settings.DOCUMENT_BLOB_ROOT = old_blob_root
+            settings.DOCUMENT_HASH_INDEX_DIR = old_hash_index_dir
+            shutil.rmtree(tmp_dir, ignore_errors=True)
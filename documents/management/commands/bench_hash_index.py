@@ -0,0 +1,120 @@
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from assinador_documentos.database import mirror_read_database
+from documents.hashindex import find_document, get_hash_index
+from documents.models import Document
+from users.models import CustomUser
+
+SEED_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a consulta de hashes pelo índice mapeado em memória com a "
+        "consulta pelo ORM, em um banco de testes descartável."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--documents", type=int, default=100000)
+        parser.add_argument("--lookups", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=1234)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        old_name = connection.settings_dict["NAME"]
+        old_blob_root = settings.DOCUMENT_BLOB_ROOT
+        old_hash_index_dir = settings.DOCUMENT_HASH_INDEX_DIR
+        tmp_dir = tempfile.mkdtemp()
+        settings.DOCUMENT_BLOB_ROOT = os.path.join(tmp_dir, "blobs")
+        settings.DOCUMENT_HASH_INDEX_DIR = os.path.join(tmp_dir, "hashindex")
+        if connection.vendor == "sqlite":
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                tmp_dir, "bench.sqlite3"
+            )
+        connection.creation.create_test_db(verbosity=0)
+        mirror_read_database(connection)
+        try:
+            hashes = self.seed(options["documents"])
+            self.stdout.write(
+                "Índice construído em "
+                f"{self.build_index():.2f}s ({len(hashes)} documentos)."
+            )
+            self.compare(hashes, options["lookups"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            mirror_read_database(connection)
+            settings.DOCUMENT_BLOB_ROOT = old_blob_root
+            settings.DOCUMENT_HASH_INDEX_DIR = old_hash_index_dir
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def seed(self, count):
+        """
+        Cria `count` documentos com hashes aleatórios, todos apontando para o
+        mesmo blob (o conteúdo não importa para a consulta).
+        """
+        user = CustomUser.objects.create_user("bench", password="bench")
+        template = Document.objects.create(owner=user, title="modelo", content="x")
+        hashes = []
+        while len(hashes) < count:
+            batch = []
+            for _ in range(min(SEED_BATCH_SIZE, count - len(hashes))):
+                hash = self.rng.randbytes(32).hex()
+                hashes.append(hash)
+                batch.append(
+                    Document(
+                        owner=user, title="doc", blob_id=template.blob_id, hash=hash
+                    )
+                )
+            Document.objects.bulk_create(batch)
+        return hashes
+
+    def build_index(self):
+        started = time.perf_counter()
+        get_hash_index().rebuild(
+            lambda: Document.objects.filter(hash__isnull=False)
+            .values_list("hash", "id", "owner_id")
+            .iterator(chunk_size=5000)
+        )
+        return time.perf_counter() - started
+
+    def measure(self, name, function, values):
+        timings = []
+        for value in values:
+            started = time.perf_counter()
+            function(value)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        self.stdout.write(
+            f"{name:<36}{statistics.median(timings) * 1e6:>12.1f}"
+            f"{timings[int(len(timings) * 0.95) - 1] * 1e6:>12.1f}"
+        )
+
+    def compare(self, hashes, lookups):
+        index = get_hash_index()
+        queryset = Document.objects.all()
+        hits = self.rng.choices(hashes, k=lookups)
+        misses = [self.rng.randbytes(32).hex() for _ in range(lookups)]
+
+        def orm(hash):
+            # O que a VerifyHashView fazia antes do índice.
+            return queryset.filter(hash=hash).first()
+
+        self.stdout.write(f"{'consulta':<36}{'mediana µs':>12}{'p95 µs':>12}")
+        for label, values in (("encontrado", hits), ("ausente", misses)):
+            digests = [bytes.fromhex(hash) for hash in values]
+            self.measure(f"índice.lookup ({label})", index.lookup, digests)
+            self.measure(
+                f"find_document ({label})",
+                lambda hash: find_document(queryset, hash),
+                values,
+            )
+            self.measure(f"ORM filter(hash=) ({label})", orm, values)
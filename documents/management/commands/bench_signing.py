@@ -0,0 +1,100 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from documents.signing import sign_merkle_batch
+from users.crypto_utils import (
+    generate_digest,
+    generate_keypair_pem,
+    load_private_key_from_pem,
+    load_public_key_from_pem,
+    merkle_root_cache,
+    merkle_root_from_proof,
+    sign_digest,
+    verify_digest_signature,
+    verify_merkle_root_signature,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a vazão de assinatura e verificação por documento com a "
+        "assinatura em lote Merkle."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--documents", type=int, default=1000)
+        parser.add_argument(
+            "--size", type=int, default=4096, help="Tamanho de cada documento."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Documentos por árvore Merkle.",
+        )
+
+    def timed(self, function):
+        started = time.perf_counter()
+        function()
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        count = options["documents"]
+        batch_size = options["batch_size"]
+        private_key_pem, public_key_pem = generate_keypair_pem()
+        private_key = load_private_key_from_pem(private_key_pem)
+        public_key = load_public_key_from_pem(public_key_pem)
+        digests = [generate_digest(os.urandom(options["size"])) for _ in range(count)]
+        batches = [
+            digests[start : start + batch_size]
+            for start in range(0, count, batch_size)
+        ]
+
+        signatures = []
+        sign_plain = self.timed(
+            lambda: signatures.extend(
+                sign_digest(digest, private_key) for digest in digests
+            )
+        )
+        verify_plain = self.timed(
+            lambda: all(
+                verify_digest_signature(digest, signature, public_key)
+                for digest, signature in zip(digests, signatures)
+            )
+        )
+
+        signed_batches = []
+        sign_merkle = self.timed(
+            lambda: signed_batches.extend(
+                sign_merkle_batch(batch, private_key) for batch in batches
+            )
+        )
+
+        def verify_batches():
+            merkle_root_cache.clear()
+            for batch, (root, paths, signature) in zip(batches, signed_batches):
+                for digest, path in zip(batch, paths):
+                    assert merkle_root_from_proof(digest, path) == root
+                    assert verify_merkle_root_signature(
+                        0, public_key_pem, root, signature
+                    )
+
+        verify_merkle = self.timed(verify_batches)
+
+        self.stdout.write(
+            f"{count} documentos de {options['size']} bytes, "
+            f"lotes Merkle de {batch_size}"
+        )
+        self.stdout.write(
+            f"{'esquema':<22}{'assinar docs/s':>16}{'verificar docs/s':>18}"
+        )
+        for name, sign_time, verify_time in (
+            ("por documento", sign_plain, verify_plain),
+            ("lote Merkle", sign_merkle, verify_merkle),
+        ):
+            self.stdout.write(
+                f"{name:<22}{count / sign_time:>16.1f}{count / verify_time:>18.1f}"
+            )
+        self.stdout.write(f"ganho na assinatura: {sign_plain / sign_merkle:.1f}x")
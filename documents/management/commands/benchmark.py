@@ -0,0 +1,386 @@
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+import cryptography
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import F
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from assinador_documentos.database import mirror_read_database
+from documents.models import ContentBlob, Document
+from users.crypto_utils import (
+    generate_hash,
+    generate_keypair_pem,
+    load_private_key_from_pem,
+    load_public_key_from_pem,
+    public_key_cache,
+    sign_message,
+    verify_signature,
+)
+from users.models import CustomUser
+
+SIZE_UNITS = {"KB": 1024, "MB": 1024**2, "GB": 1024**3, "B": 1}
+
+# Conteúdos distintos usados no banco semeado. Os demais documentos reutilizam
+# esses blobs, o que mantém a semeadura de milhões de linhas rápida.
+SEED_CONTENTS = 16
+SEED_BATCH_SIZE = 5000
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    for unit, factor in SIZE_UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[: -len(unit)]) * factor)
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    for unit in ("GB", "MB", "KB"):
+        factor = SIZE_UNITS[unit]
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return f"{size}B"
+
+
+def summarize(timings) -> dict:
+    timings = sorted(timings)
+    return {
+        "runs": len(timings),
+        "min_ms": timings[0] * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "p95_ms": timings[math.ceil(len(timings) * 0.95) - 1] * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede as funções de crypto_utils e as views de documentos contra um "
+        "banco de testes semeado, grava os resultados em JSON e, com "
+        "--compare, aponta regressões em relação a uma execução anterior."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1KB,64KB,1MB,10MB,100MB",
+            help="Tamanhos de documento das medições de crypto_utils.",
+        )
+        parser.add_argument(
+            "--documents",
+            default="1000,100000,1000000",
+            help="Tamanhos do banco semeado para as medições das views.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1234)
+        parser.add_argument(
+            "--skip-crypto", action="store_true", help="Não mede crypto_utils."
+        )
+        parser.add_argument(
+            "--skip-views", action="store_true", help="Não mede as views."
+        )
+        parser.add_argument(
+            "--output", help="Arquivo JSON onde os resultados são gravados."
+        )
+        parser.add_argument(
+            "--compare", help="Arquivo JSON de uma execução anterior (baseline)."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Aumento relativo da mediana considerado regressão.",
+        )
+
+    def handle(self, *args, **options):
+        self.repeat = max(options["repeat"], 1)
+        self.rng = random.Random(options["seed"])
+        results = {}
+        if not options["skip_crypto"]:
+            sizes = [parse_size(size) for size in options["sizes"].split(",")]
+            results.update(self.bench_crypto(sizes))
+        if not options["skip_views"]:
+            scales = sorted(int(count) for count in options["documents"].split(","))
+            results.update(self.bench_views(scales))
+
+        report = {"meta": self.metadata(options), "results": results}
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(report, output, indent=2, sort_keys=True)
+            self.stdout.write(f"Resultados gravados em {options['output']}")
+        if options["compare"]:
+            self.compare(options["compare"], results, options["threshold"])
+
+    def metadata(self, options):
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "cryptography": cryptography.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "database": connection.vendor,
+            "seed": options["seed"],
+            "repeat": self.repeat,
+        }
+
+    def message(self, size: int) -> str:
+        # Texto ASCII determinístico: cada byte aleatório vira dois caracteres.
+        return self.rng.randbytes((size + 1) // 2).hex()[:size]
+
+    def measure(self, name, function, results, queries=None):
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        result = summarize(timings)
+        if queries is not None:
+            result["queries"] = queries
+        results[name] = result
+        extra = f"{queries:>6} queries" if queries is not None else ""
+        self.stdout.write(
+            f"{name:<44}{result['median_ms']:>12.3f} ms{result['p95_ms']:>12.3f} ms"
+            f"{extra}"
+        )
+
+    def bench_crypto(self, sizes):
+        results = {}
+        self.stdout.write(f"{'crypto_utils':<44}{'mediana':>15}{'p95':>15}")
+        self.measure("crypto.generate_keypair_pem", generate_keypair_pem, results)
+        private_key_pem, public_key_pem = generate_keypair_pem()
+        self.measure(
+            "crypto.load_private_key_from_pem",
+            lambda: load_private_key_from_pem(private_key_pem),
+            results,
+        )
+        self.measure(
+            "crypto.load_public_key_from_pem",
+            lambda: load_public_key_from_pem(public_key_pem),
+            results,
+        )
+        private_key = load_private_key_from_pem(private_key_pem)
+        public_key = load_public_key_from_pem(public_key_pem)
+
+        for size in sizes:
+            label = format_size(size)
+            message = self.message(size)
+            signature = sign_message(message, private_key)
+            self.measure(
+                f"crypto.generate_hash[{label}]",
+                lambda: generate_hash(message),
+                results,
+            )
+            self.measure(
+                f"crypto.sign_message[{label}]",
+                lambda: sign_message(message, private_key),
+                results,
+            )
+            self.measure(
+                f"crypto.verify_signature[{label}]",
+                lambda: verify_signature(message, signature, public_key),
+                results,
+            )
+            del message
+        return results
+
+    def bench_views(self, scales):
+        results = {}
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        old_blob_root = settings.DOCUMENT_BLOB_ROOT
+        old_hash_index_dir = settings.DOCUMENT_HASH_INDEX_DIR
+        tmp_dir = tempfile.mkdtemp()
+        settings.DOCUMENT_BLOB_ROOT = os.path.join(tmp_dir, "blobs")
+        settings.DOCUMENT_HASH_INDEX_DIR = os.path.join(tmp_dir, "hashindex")
+        if connection.vendor == "sqlite":
+            # Um arquivo, para que bancos grandes não fiquem inteiros em memória.
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(
+                tmp_dir, "benchmark.sqlite3"
+            )
+        connection.creation.create_test_db(verbosity=0)
+        mirror_read_database(connection)
+        try:
+            user = CustomUser.objects.create_user("benchmark", password="benchmark")
+            user.private_key, user.public_key = generate_keypair_pem()
+            user.save()
+            templates = self.seed_templates(user)
+            client = Client()
+            client.force_login(user)
+
+            seeded = len(templates)
+            for scale in scales:
+                if scale > seeded:
+                    self.seed(user, templates, scale - seeded)
+                    seeded = scale
+                self.stdout.write(
+                    f"{f'views ({seeded} documentos)':<44}{'mediana':>15}{'p95':>15}"
+                )
+                self.bench_view_requests(client, templates, seeded, results)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            mirror_read_database(connection)
+            teardown_test_environment()
+            settings.DOCUMENT_BLOB_ROOT = old_blob_root
+            settings.DOCUMENT_HASH_INDEX_DIR = old_hash_index_dir
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return results
+
+    def seed_templates(self, user):
+        private_key = load_private_key_from_pem(user.private_key)
+        templates = []
+        for index in range(SEED_CONTENTS):
+            document = Document(
+                owner=user, title=f"Documento {index}", content=self.message(1024)
+            )
+            document.sign(private_key)
+            document.save()
+            templates.append(document)
+        return templates
+
+    def seed(self, user, templates, count):
+        """
+        Cria `count` documentos copiando os campos dos documentos-modelo, sem
+        gravar novos blobs nem assinar de novo.
+        """
+        created = 0
+        while created < count:
+            batch = []
+            for index in range(created, min(created + SEED_BATCH_SIZE, count)):
+                template = templates[index % len(templates)]
+                batch.append(
+                    Document(
+                        owner=user,
+                        title=f"Documento {index + len(templates)}",
+                        blob_id=template.blob_id,
+                        content_preview=template.content_preview,
+                        signature=template.signature,
+                        signature_scheme=template.signature_scheme,
+                        signature_algorithm=template.signature_algorithm,
+                        hash=template.hash,
+                    )
+                )
+            Document.objects.bulk_create(batch)
+            created += len(batch)
+        for template in templates:
+            references = count // len(templates) + (
+                templates.index(template) < count % len(templates)
+            )
+            ContentBlob.objects.filter(pk=template.blob_id).update(
+                refcount=F("refcount") + references
+            )
+
+    def bench_view_requests(self, client, templates, scale, results):
+        document = templates[0]
+        requests = (
+            ("list_documents", "get", reverse("list_documents"), None, 200),
+            (
+                "sign_document",
+                "get",
+                reverse("sign_document", args=[document.pk]),
+                None,
+                302,
+            ),
+            (
+                "verify_document",
+                "get",
+                reverse("verify_document", args=[document.pk]),
+                None,
+                200,
+            ),
+            (
+                "verify_hash",
+                "post",
+                reverse("verify_hash"),
+                {"hash_code": document.hash},
+                200,
+            ),
+        )
+        for name, method, url, data, status in requests:
+
+            def request():
+                response = getattr(client, method)(url, data)
+                if response.status_code != status:
+                    raise CommandError(
+                        f"{name}: status {response.status_code}, esperado {status}"
+                    )
+
+            # Uma requisição de aquecimento (chaves em cache, status de
+            # verificação gravado) antes de contar queries e medir, para que
+            # os números reflitam o regime estável e sejam comparáveis.
+            public_key_cache.clear()
+            request()
+            # As leituras das views de consulta vão para o alias de leitura:
+            # as queries são contadas em todas as conexões.
+            with ExitStack() as stack:
+                captured = [
+                    stack.enter_context(CaptureQueriesContext(alias_connection))
+                    for alias_connection in connections.all()
+                ]
+                request()
+            queries = sum(len(context) for context in captured)
+            self.measure(f"views.{name}[{scale}]", request, results, queries=queries)
+
+    def compare(self, baseline_path, results, threshold):
+        try:
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Baseline inválido: {e}")
+
+        regressions = []
+        self.stdout.write(
+            f"\n{'comparação':<44}{'baseline':>12}{'atual':>12}{'variação':>10}"
+        )
+        for name in sorted(set(baseline) & set(results)):
+            before, after = baseline[name], results[name]
+            flags = []
+            if before["median_ms"] > 0:
+                change = after["median_ms"] / before["median_ms"] - 1
+                variation = f"{change:>+10.1%}"
+                if change > threshold:
+                    flags.append("LENTO")
+            else:
+                # Mediana zerada no baseline: não há variação a comparar.
+                variation = f"{'-':>10}"
+                flags.append("(baseline sem mediana)")
+            before_queries = before.get("queries", 0)
+            after_queries = after.get("queries", 0)
+            if after_queries > before_queries:
+                flags.append(f"QUERIES {before_queries}->{after_queries}")
+                regressions.append(name)
+            elif "LENTO" in flags:
+                regressions.append(name)
+            self.stdout.write(
+                f"{name:<44}{before['median_ms']:>12.3f}{after['median_ms']:>12.3f}"
+                f"{variation} {' '.join(flags)}"
+            )
+        for name in sorted(set(results) - set(baseline)):
+            self.stdout.write(f"{name:<44} (novo, sem baseline)")
+        for name in sorted(set(baseline) - set(results)):
+            self.stdout.write(f"{name:<44} (não medido nesta execução)")
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regressão(ões) acima de {threshold:.0%}: "
+                + ", ".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("Nenhuma regressão encontrada."))
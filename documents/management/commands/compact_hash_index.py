@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.hashindex import get_hash_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Incorpora ao arquivo ordenado do índice de hashes as entradas "
+        "acrescentadas ao log desde a última compactação."
+    )
+
+    def handle(self, *args, **options):
+        index = get_hash_index()
+        if not index.available:
+            raise CommandError(
+                "O índice ainda não existe; execute rebuild_hash_index."
+            )
+        started = time.perf_counter()
+        count = index.compact()
+        self.stdout.write(
+            f"Índice compactado com {count} hashes em "
+            f"{time.perf_counter() - started:.1f}s."
+        )
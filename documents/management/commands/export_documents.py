@@ -0,0 +1,143 @@
+import json
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.export import exportable_documents, iter_jsonl, iter_zip
+from users.models import CustomUser
+
+# Bytes lidos por vez ao procurar a última linha completa de um pacote.
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def last_complete_line(bundle_file):
+    """
+    Encontra a última linha completa de um pacote JSONL, lendo o arquivo de
+    trás para frente.
+
+    Retorna:
+    - tuple: (linha (bytes) ou None, posição logo após a linha).
+    """
+    end = bundle_file.seek(0, os.SEEK_END)
+    position = end
+    tail = b""
+    while position > 0:
+        step = min(TAIL_BLOCK_SIZE, position)
+        position -= step
+        bundle_file.seek(position)
+        tail = bundle_file.read(step) + tail
+        newline = tail.rfind(b"\n")
+        if newline == -1:
+            continue
+        previous = tail.rfind(b"\n", 0, newline)
+        if previous != -1 or position == 0:
+            line_end = position + newline + 1
+            return tail[previous + 1 : newline], line_end
+    return None, 0
+
+
+def count_lines(bundle_file, end):
+    """
+    Conta as linhas completas dos primeiros `end` bytes do pacote.
+    """
+    bundle_file.seek(0)
+    count = 0
+    while bundle_file.tell() < end:
+        block = bundle_file.read(min(TAIL_BLOCK_SIZE, end - bundle_file.tell()))
+        if not block:
+            break
+        count += block.count(b"\n")
+    return count
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta os documentos assinados (de um usuário ou de todos) como um "
+        "pacote JSONL ou ZIP verificável, em memória constante."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", help="Username do dono dos documentos.")
+        parser.add_argument("--format", choices=["jsonl", "zip"], default="jsonl")
+        parser.add_argument(
+            "--output", help="Arquivo de saída. Padrão: saída padrão (JSONL)."
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Exporta apenas os documentos com id maior (cursor).",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continua um pacote JSONL interrompido em --output.",
+        )
+        parser.add_argument("--chunk-size", type=int, help="Documentos por query.")
+
+    def handle(self, *args, **options):
+        owner = None
+        if options["owner"]:
+            try:
+                owner = CustomUser.objects.get(username=options["owner"])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"Usuário {options['owner']} não encontrado.")
+
+        after_id = options["after_id"]
+        initial_count = 0
+        mode = "wb"
+        if options["resume"]:
+            if options["format"] != "jsonl" or not options["output"]:
+                raise CommandError("--resume exige --format jsonl e --output.")
+            resumed = self.resume_point(options["output"])
+            if resumed is None:
+                self.stderr.write("O pacote já está completo.")
+                return
+            resumed_id, initial_count = resumed
+            after_id = max(after_id, resumed_id)
+            mode = "ab"
+
+        queryset = exportable_documents(owner, after_id)
+        if options["format"] == "zip":
+            if not options["output"]:
+                raise CommandError("O formato zip exige --output.")
+            chunks = iter_zip(queryset, options["chunk_size"], after_id)
+        else:
+            chunks = (
+                line.encode("utf-8")
+                for line in iter_jsonl(
+                    queryset, options["chunk_size"], initial_count
+                )
+            )
+
+        if options["output"]:
+            with open(options["output"], mode) as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        if options["output"]:
+            self.stderr.write(
+                f"Pacote gravado em {options['output']} (após o id {after_id})."
+            )
+
+    def resume_point(self, path):
+        """
+        Descarta a linha incompleta no fim do pacote e retorna o id do último
+        documento gravado e quantos documentos o pacote já tem, ou None se o
+        pacote terminou com o registro "end".
+        """
+        if not os.path.exists(path):
+            return 0, 0
+        with open(path, "r+b") as bundle_file:
+            line, line_end = last_complete_line(bundle_file)
+            bundle_file.truncate(line_end)
+            if line is None:
+                return 0, 0
+            record = json.loads(line)
+            if record["type"] == "end":
+                return None
+            return record["id"], count_lines(bundle_file, line_end)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from documents.models import ContentBlob
+
+
+class Command(BaseCommand):
+    help = "Remove do blob store os conteúdos que nenhum documento referencia."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--grace",
+            type=float,
+            default=settings.DOCUMENT_BLOB_ORPHAN_GRACE,
+            help="Idade mínima (em segundos) de um arquivo sem blob no banco "
+            "para que ele seja removido.",
+        )
+
+    def handle(self, *args, **options):
+        removed = ContentBlob.objects.collect_garbage(options["batch_size"])
+        orphans = ContentBlob.objects.collect_orphan_files(
+            options["grace"], options["batch_size"]
+        )
+        self.stdout.write(
+            f"{removed} blobs removidos, {orphans} arquivos órfãos removidos."
+        )
@@ -0,0 +1,42 @@
+import itertools
+import time
+
+from django.core.management.base import BaseCommand
+
+from documents.hashindex import get_hash_index
+from documents.models import Document
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói o índice de hashes (DOCUMENT_HASH_INDEX_DIR) a partir "
+        "dos documentos assinados no banco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Documentos lidos do banco por vez.",
+        )
+
+    def handle(self, *args, **options):
+        def records():
+            # Hashes assinados e, nos documentos com hash por trechos, o
+            # SHA256 do arquivo.
+            return itertools.chain(
+                Document.objects.filter(hash__isnull=False)
+                .values_list("hash", "id", "owner_id")
+                .iterator(chunk_size=options["chunk_size"]),
+                Document.objects.filter(file_hash__isnull=False)
+                .values_list("file_hash", "id", "owner_id")
+                .iterator(chunk_size=options["chunk_size"]),
+            )
+
+        started = time.perf_counter()
+        count = get_hash_index().rebuild(records)
+        self.stdout.write(
+            f"Índice reconstruído com {count} hashes em "
+            f"{time.perf_counter() - started:.1f}s."
+        )
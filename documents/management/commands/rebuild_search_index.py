@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from documents import search
+from documents.models import Document
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói o índice de busca (FTS5) a partir dos documentos, em "
+        "lotes lidos em streaming. O índice continua disponível durante a "
+        "reconstrução: cada lote substitui as linhas dos seus documentos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Documentos indexados por transação.",
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Retoma a reconstrução a partir deste id.",
+        )
+
+    def handle(self, *args, **options):
+        if not search.is_supported(connection):
+            raise CommandError("O índice de busca FTS5 só existe no SQLite.")
+
+        self.verbosity = options["verbosity"]
+        batch_size = max(options["batch_size"], 1)
+        documents = (
+            Document.objects.filter(id__gt=options["after_id"])
+            .only("id", "title", "owner_id", "blob")
+            .order_by("id")
+            .iterator(chunk_size=batch_size)
+        )
+        started = time.perf_counter()
+        total = 0
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                total += self.index(batch)
+                batch = []
+        if batch:
+            total += self.index(batch)
+
+        removed = search.remove_orphans()
+        search.optimize()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{total} documentos indexados em {elapsed:.1f}s "
+            f"({total / elapsed if elapsed else 0:.0f} docs/s); "
+            f"{removed} entradas órfãs removidas."
+        )
+
+    def index(self, batch):
+        with transaction.atomic():
+            search.index_documents(batch)
+        if self.verbosity >= 2:
+            self.stdout.write(f"Indexados até o documento {batch[-1].id}.")
+        return len(batch)
@@ -0,0 +1,97 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.models import KeyRotation, KeyRotationStatus
+from documents.rotation import run_rotation, start_rotation
+from users.keypool import take_keypair
+from users.models import CustomUser, KeyAlgorithm
+
+
+class Command(BaseCommand):
+    help = (
+        "Reassina os documentos dos usuários com a versão atual da chave, em "
+        "lotes curtos e com pausas entre eles. Uma rotação interrompida "
+        "continua do último lote gravado ao executar o comando de novo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="*", help="Usuários a rotacionar.")
+        parser.add_argument(
+            "--new-key",
+            action="store_true",
+            help="Gera um novo par de chaves para cada usuário antes de reassinar.",
+        )
+        parser.add_argument(
+            "--algorithm",
+            choices=KeyAlgorithm.values,
+            help="Algoritmo do novo par (--new-key). Padrão: o atual do usuário.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continua todas as rotações em andamento.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.KEY_ROTATION_BATCH_SIZE,
+            help="Documentos reassinados por lote (e por transação).",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=settings.KEY_ROTATION_PAUSE,
+            help="Segundos de espera entre os lotes.",
+        )
+
+    def get_rotations(self, options):
+        rotations = []
+        for username in options["usernames"]:
+            try:
+                user = CustomUser.objects.get(username=username)
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"Usuário {username} não encontrado.")
+            if options["new_key"]:
+                algorithm = options["algorithm"] or user.key_algorithm
+                signing_key = user.set_keys(*take_keypair(algorithm), algorithm)
+                self.stdout.write(f"{username}: nova chave v{signing_key.version}.")
+            try:
+                rotations.append(start_rotation(user))
+            except ValueError as e:
+                raise CommandError(str(e))
+        if options["resume"]:
+            seen = {rotation.pk for rotation in rotations}
+            rotations += KeyRotation.objects.filter(
+                status=KeyRotationStatus.RUNNING
+            ).exclude(pk__in=seen)
+        return rotations
+
+    def handle(self, *args, **options):
+        if not options["usernames"] and not options["resume"]:
+            raise CommandError("Informe os usuários ou use --resume.")
+        verbosity = options["verbosity"]
+
+        def progress(rotation):
+            if verbosity > 1:
+                self.stdout.write(
+                    f"  {rotation.signed} reassinados, {rotation.skipped} ignorados "
+                    f"(até o documento {rotation.last_document_id})"
+                )
+
+        for rotation in self.get_rotations(options):
+            owner = rotation.owner
+            started = time.perf_counter()
+            try:
+                run_rotation(
+                    rotation, options["batch_size"], options["pause"], progress
+                )
+            except (TypeError, ValueError) as e:
+                raise CommandError(f"{owner}: {e}")
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{owner}: chave v{rotation.signing_key.version}, "
+                f"{rotation.signed} documentos reassinados e {rotation.skipped} "
+                f"ignorados (assinatura inválida ou alterados) em {elapsed:.1f}s."
+            )
@@ -0,0 +1,110 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from documents.jobs import claim_jobs, process_jobs, queue_stats, requeue_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa a fila de assinatura: reserva lotes de pedidos, assina os "
+        "documentos agrupados por dono e informa vazão e latência da fila."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.SIGNING_WORKER_BATCH_SIZE,
+            help="Pedidos reservados por lote.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Segundos de espera quando a fila está vazia.",
+        )
+        parser.add_argument(
+            "--stale-timeout",
+            type=float,
+            default=settings.SIGNING_JOB_STALE_TIMEOUT,
+            help="Pedidos em execução há mais tempo voltam para a fila.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Esvazia a fila e termina, em vez de continuar aguardando.",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Apenas mostra o estado da fila e termina.",
+        )
+
+    def show_stats(self):
+        stats = queue_stats()
+        counts = ", ".join(
+            f"{label}: {count}" for label, count in stats["counts"].items()
+        )
+        self.stdout.write(f"Fila: {counts}")
+        if stats["oldest_pending_age"] is not None:
+            self.stdout.write(
+                f"Pedido pendente mais antigo: {stats['oldest_pending_age']:.1f}s"
+            )
+        if stats["latency_p50"] is not None:
+            self.stdout.write(
+                f"Últimos 5 min: {stats['throughput']:.1f} docs/s, latência "
+                f"p50 {stats['latency_p50']:.2f}s, p95 {stats['latency_p95']:.2f}s, "
+                f"máx. {stats['latency_max']:.2f}s"
+            )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.show_stats()
+            return
+
+        total = 0
+        started = time.perf_counter()
+        last_requeue = 0.0
+        try:
+            while True:
+                if time.perf_counter() - last_requeue >= options["stale_timeout"] / 2:
+                    requeued = requeue_stale(options["stale_timeout"])
+                    if requeued:
+                        self.stdout.write(f"{requeued} pedidos devolvidos à fila.")
+                    last_requeue = time.perf_counter()
+
+                jobs = claim_jobs(options["batch_size"])
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+
+                batch_started = time.perf_counter()
+                result = process_jobs(jobs)
+                elapsed = time.perf_counter() - batch_started
+                total += result["done"]
+                latency = (
+                    f", latência média da fila "
+                    f"{statistics.mean(result['latencies']):.2f}s"
+                    if result["latencies"]
+                    else ""
+                )
+                requeued = (
+                    f", {result['requeued']} devolvidos (documento editado)"
+                    if result["requeued"]
+                    else ""
+                )
+                self.stdout.write(
+                    f"{result['done']} assinados, {result['failed']} com falha"
+                    f"{requeued} em {elapsed:.2f}s "
+                    f"({len(jobs) / elapsed:.1f} pedidos/s){latency}"
+                )
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{total} documentos assinados em {elapsed:.1f}s.")
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from documents.models import Document
+from documents.signing import sign_documents, unsigned_documents
+
+
+class Command(BaseCommand):
+    help = "Assina em massa os documentos não assinados (ou os selecionados)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", help="Username do dono dos documentos.")
+        parser.add_argument(
+            "--ids", type=int, nargs="+", help="Ids dos documentos a assinar."
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Retoma a partir deste id (usado com --resign).",
+        )
+        parser.add_argument(
+            "--resign",
+            action="store_true",
+            help="Assina novamente documentos que já possuem assinatura.",
+        )
+        parser.add_argument(
+            "--merkle",
+            action="store_true",
+            help="Assina cada lote com uma única operação RSA (árvore Merkle).",
+        )
+        parser.add_argument("--workers", type=int, help="Processos de assinatura.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options["resign"]:
+            queryset = Document.objects.all()
+        else:
+            queryset = unsigned_documents()
+        if options["owner"]:
+            queryset = queryset.filter(owner__username=options["owner"])
+        if options["ids"]:
+            queryset = queryset.filter(id__in=options["ids"])
+        if options["after_id"]:
+            queryset = queryset.filter(id__gt=options["after_id"])
+
+        started = time.perf_counter()
+
+        def progress(signed, total, resume_after):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{signed}/{total} documentos assinados "
+                f"({signed / elapsed:.1f} docs/s), retomar com --after-id {resume_after}"
+            )
+
+        result = sign_documents(
+            queryset,
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            progress=progress,
+            merkle=options["merkle"],
+        )
+        self.stdout.write(
+            f"{result['signed']} de {result['total']} documentos assinados em "
+            f"{time.perf_counter() - started:.2f}s."
+        )
+        if result["skipped"]:
+            self.stdout.write(
+                f"{result['skipped']} documentos ignorados (dono sem chave)."
+            )
+        if result["changed"]:
+            self.stdout.write(
+                f"{result['changed']} documentos editados durante a assinatura "
+                "não foram gravados; execute o comando de novo para assiná-los."
+            )
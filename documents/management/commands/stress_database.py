@@ -0,0 +1,188 @@
+import math
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from assinador_documentos.database import mirror_read_database
+from documents.models import Document
+from users.crypto_utils import generate_keypair_pem
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de concorrência do SQLite: leitores consultam listagem, "
+        "detalhe, verificação e hash enquanto escritores assinam documentos "
+        "sem parar pela SignDocumentView. Compara a latência das leituras "
+        "com o SQLite padrão e com SQLITE_PRAGMAS, em bancos de teste "
+        "descartáveis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--documents", type=int, default=200)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument(
+            "--duration", type=float, default=5.0, help="Segundos por modo."
+        )
+        parser.add_argument(
+            "--dir",
+            default=settings.BASE_DIR,
+            help="Diretório dos bancos de teste (use o disco de produção).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            self.stderr.write("Este teste só se aplica ao SQLite.")
+            return
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        old_blob_root = settings.DOCUMENT_BLOB_ROOT
+        old_hash_index_dir = settings.DOCUMENT_HASH_INDEX_DIR
+        tmp_dir = tempfile.mkdtemp(dir=options["dir"], prefix=".stress-")
+        settings.DOCUMENT_BLOB_ROOT = os.path.join(tmp_dir, "blobs")
+        settings.DOCUMENT_HASH_INDEX_DIR = os.path.join(tmp_dir, "hashindex")
+        self.stdout.write(
+            f"{'perfil':<10}{'leituras/s':>12}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'máx. ms':>10}{'escritas/s':>12}{'erros':>8}"
+        )
+        try:
+            # "padrão": journal_mode=DELETE e synchronous=FULL, sem ajustes.
+            for profile, pragmas in (
+                ("padrão", {}),
+                ("produção", settings.SQLITE_PRAGMAS),
+            ):
+                with override_settings(
+                    SQLITE_PRAGMAS=pragmas, DOCUMENT_SIGNING_QUEUE=False
+                ):
+                    self.run_profile(profile, tmp_dir, options)
+        finally:
+            connection.settings_dict["NAME"] = old_name
+            mirror_read_database(connection)
+            teardown_test_environment()
+            settings.DOCUMENT_BLOB_ROOT = old_blob_root
+            settings.DOCUMENT_HASH_INDEX_DIR = old_hash_index_dir
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def run_profile(self, profile, tmp_dir, options):
+        old_name = connection.settings_dict["NAME"]
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            tmp_dir, f"{profile}.sqlite3"
+        )
+        connection.creation.create_test_db(verbosity=0)
+        mirror_read_database(connection)
+        try:
+            user, documents = self.seed(options["documents"])
+            result = self.stress(user, documents, options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        latencies = sorted(result["reads"])
+        duration = options["duration"]
+        if latencies:
+            p95 = latencies[math.ceil(len(latencies) * 0.95) - 1]
+            self.stdout.write(
+                f"{profile:<10}{len(latencies) / duration:>12.1f}"
+                f"{statistics.median(latencies) * 1000:>10.2f}{p95 * 1000:>10.2f}"
+                f"{latencies[-1] * 1000:>10.2f}{result['writes'] / duration:>12.1f}"
+                f"{len(result['errors']):>8}"
+            )
+        for error in sorted(set(result["errors"])):
+            self.stdout.write(f"  {profile}: {error}")
+
+    def seed(self, count):
+        user = CustomUser.objects.create_user("stress", password="stress")
+        user.private_key, user.public_key = generate_keypair_pem()
+        user.save()
+        documents = [
+            Document.objects.create(
+                owner=user,
+                title=f"Documento {index}",
+                content=f"Conteúdo do documento {index}. " * 20,
+            )
+            for index in range(count)
+        ]
+        return user, documents
+
+    def stress(self, user, documents, options):
+        stop = threading.Event()
+        lock = threading.Lock()
+        result = {"reads": [], "writes": 0, "errors": []}
+        hashes = [document.hash for document in documents if document.hash]
+
+        def read_requests(rng):
+            document = rng.choice(documents)
+            return rng.choice(
+                (
+                    ("get", reverse("list_documents"), None),
+                    ("get", reverse("view_document", args=[document.pk]), None),
+                    ("get", reverse("verify_document", args=[document.pk]), None),
+                    (
+                        "post",
+                        reverse("verify_hash"),
+                        {"hash_code": rng.choice(hashes) if hashes else ""},
+                    ),
+                )
+            )
+
+        def worker(is_writer, seed):
+            rng = random.Random(seed)
+            client = Client()
+            client.force_login(user)
+            try:
+                while not stop.is_set():
+                    if is_writer:
+                        document = rng.choice(documents)
+                        method, url, data = (
+                            "get",
+                            reverse("sign_document", args=[document.pk]),
+                            None,
+                        )
+                    else:
+                        method, url, data = read_requests(rng)
+                    started = time.perf_counter()
+                    try:
+                        getattr(client, method)(url, data)
+                    except Exception as e:
+                        with lock:
+                            result["errors"].append(f"{type(e).__name__}: {e}")
+                        continue
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        if is_writer:
+                            result["writes"] += 1
+                        else:
+                            result["reads"].append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=worker, args=(True, index))
+            for index in range(options["writers"])
+        ] + [
+            threading.Thread(target=worker, args=(False, 1000 + index))
+            for index in range(options["readers"])
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options["duration"])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return result
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_document_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='verified',
+            field=models.BooleanField(blank=True, null=True, verbose_name='Assinatura verificada'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='verified_hash',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='Hash da verificação'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='verified_key_fingerprint',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='Chave da verificação'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:05
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def fill_content_preview(apps, schema_editor):
+    Document = apps.get_model("documents", "Document")
+    batch = []
+    for document in Document.objects.only("id", "content").iterator(chunk_size=1000):
+        document.content_preview = Truncator(document.content or "").chars(40)
+        batch.append(document)
+        if len(batch) >= 1000:
+            Document.objects.bulk_update(batch, ["content_preview"])
+            batch = []
+    if batch:
+        Document.objects.bulk_update(batch, ["content_preview"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_document_verification_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='content_preview',
+            field=models.CharField(blank=True, default='', max_length=40, verbose_name='Prévia do conteúdo'),
+        ),
+        migrations.RunPython(fill_content_preview, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['owner', 'id'], name='documents_d_owner_i_efcf89_idx'),
+        ),
+    ]
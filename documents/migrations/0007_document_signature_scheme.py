@@ -0,0 +1,24 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_document_content_preview'),
+    ]
+
+    operations = [
+        # Documentos existentes foram assinados com o esquema legado.
+        migrations.AddField(
+            model_name='document',
+            name='signature_scheme',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Conteúdo + hash'), (2, 'Digest SHA256')], default=1, verbose_name='Esquema da assinatura'),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='signature_scheme',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Conteúdo + hash'), (2, 'Digest SHA256')], default=2, verbose_name='Esquema da assinatura'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0007_document_signature_scheme'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True, verbose_name='Hash'),
+        ),
+    ]
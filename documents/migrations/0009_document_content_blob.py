@@ -0,0 +1,104 @@
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_content_to_blobs(apps, schema_editor):
+    from documents.blobstore import get_blob_store
+
+    Document = apps.get_model("documents", "Document")
+    ContentBlob = apps.get_model("documents", "ContentBlob")
+    store = get_blob_store()
+
+    def flush(batch):
+        refs = {}
+        sizes = {}
+        for document in batch:
+            content = document.content or ""
+            digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+            if digest not in sizes and not store.exists(digest):
+                sizes[digest] = store.write(digest, content)
+            elif digest not in sizes:
+                sizes[digest] = store.path(digest).stat().st_size
+            refs[digest] = refs.get(digest, 0) + 1
+            document.blob_id = digest
+
+        existing = set(
+            ContentBlob.objects.filter(pk__in=refs).values_list("pk", flat=True)
+        )
+        for digest in existing:
+            ContentBlob.objects.filter(pk=digest).update(
+                refcount=models.F("refcount") + refs[digest]
+            )
+        ContentBlob.objects.bulk_create(
+            ContentBlob(digest=digest, size=sizes[digest], refcount=count)
+            for digest, count in refs.items()
+            if digest not in existing
+        )
+        Document.objects.bulk_update(batch, ["blob"])
+
+    batch = []
+    for document in Document.objects.only("id", "content").iterator(chunk_size=500):
+        batch.append(document)
+        if len(batch) >= 500:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+
+def move_content_from_blobs(apps, schema_editor):
+    from documents.blobstore import get_blob_store
+
+    Document = apps.get_model("documents", "Document")
+    store = get_blob_store()
+    batch = []
+    for document in Document.objects.only("id", "blob").iterator(chunk_size=500):
+        document.content = store.read_text(document.blob_id)
+        batch.append(document)
+        if len(batch) >= 500:
+            Document.objects.bulk_update(batch, ["content"])
+            batch = []
+    if batch:
+        Document.objects.bulk_update(batch, ["content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0008_document_hash_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='SHA256')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Tamanho')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='Referências')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documents', to='documents.contentblob', verbose_name='Conteúdo'),
+        ),
+        # Com um default, a coluna pode ser recriada ao desfazer a migração.
+        migrations.AlterField(
+            model_name='document',
+            name='content',
+            field=models.TextField(default='', verbose_name='Conteúdo'),
+        ),
+        migrations.RunPython(move_content_to_blobs, move_content_from_blobs),
+        migrations.RemoveField(
+            model_name='document',
+            name='content',
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='documents', to='documents.contentblob', verbose_name='Conteúdo'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0009_document_content_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='merkle_index',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Posição no lote Merkle'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='merkle_path',
+            field=models.JSONField(blank=True, null=True, verbose_name='Prova de inclusão'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='merkle_root',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='Raiz Merkle'),
+        ),
+        migrations.AlterField(
+            model_name='document',
+            name='signature_scheme',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Conteúdo + hash'), (2, 'Digest SHA256'), (3, 'Lote Merkle')], default=2, verbose_name='Esquema da assinatura'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0010_document_merkle_signature'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='signature_algorithm',
+            field=models.CharField(choices=[('rsa-2048', 'RSA-2048'), ('ed25519', 'Ed25519'), ('ecdsa-p256', 'ECDSA P-256')], default='rsa-2048', max_length=16, verbose_name='Algoritmo da assinatura'),
+        ),
+    ]
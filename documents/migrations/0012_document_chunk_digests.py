@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0011_document_signature_algorithm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='chunk_digests',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Hashes dos trechos'),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='chunk_size',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Tamanho dos trechos do hash'),
+        ),
+    ]
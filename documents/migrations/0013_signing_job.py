@@ -0,0 +1,33 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('documents', '0012_document_chunk_digests'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SigningJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Na fila'), (2, 'Em execução'), (3, 'Assinado'), (4, 'Falhou')], default=1, verbose_name='Situação')),
+                ('claim', models.CharField(blank=True, default='', max_length=64, verbose_name='Reserva')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signing_jobs', to='documents.document')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signing_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='documents_s_status_74afe1_idx'), models.Index(fields=['document', 'status'], name='documents_s_documen_27f40a_idx'), models.Index(fields=['status', 'finished_at'], name='documents_s_status_9211e9_idx')],
+            },
+        ),
+    ]
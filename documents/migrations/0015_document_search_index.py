@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 só existe no SQLite; nos outros bancos a busca usa icontains.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE documents_document_search USING fts5("
+        "title, content, owner, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO documents_document_search(documents_document_search, rank) "
+        "VALUES ('rank', 'bm25(10.0, 1.0, 0.0)')"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE documents_document_search")
+
+
+class Migration(migrations.Migration):
+    """
+    Cria o índice FTS5 da busca. Os documentos já existentes entram no
+    índice com `manage.py rebuild_search_index`.
+    """
+
+    dependencies = [
+        ("documents", "0014_document_updated_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
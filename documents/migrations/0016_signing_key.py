@@ -0,0 +1,52 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_signing_keys(apps, schema_editor):
+    # As assinaturas existentes eram verificadas com a chave atual do dono,
+    # que a migração users.0006 registrou como versão 1.
+    CustomUser = apps.get_model('users', 'CustomUser')
+    Document = apps.get_model('documents', 'Document')
+    owners = CustomUser.objects.filter(signing_key__isnull=False).values_list(
+        'id', 'signing_key_id'
+    )
+    for owner_id, signing_key_id in owners.iterator():
+        Document.objects.filter(
+            owner_id=owner_id, signature__isnull=False
+        ).update(signing_key_id=signing_key_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0006_signing_key'),
+        ('documents', '0015_document_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='signing_key',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='documents', to='users.signingkey', verbose_name='Chave da assinatura'),
+        ),
+        migrations.CreateModel(
+            name='KeyRotation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Em andamento'), (2, 'Concluída')], default=1, verbose_name='Situação')),
+                ('last_document_id', models.PositiveBigIntegerField(default=0, verbose_name='Último documento processado')),
+                ('signed', models.PositiveIntegerField(default=0, verbose_name='Documentos reassinados')),
+                ('skipped', models.PositiveIntegerField(default=0, verbose_name='Documentos ignorados')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='key_rotations', to=settings.AUTH_USER_MODEL)),
+                ('signing_key', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rotations', to='users.signingkey', verbose_name='Chave nova')),
+            ],
+        ),
+        migrations.RunPython(link_signing_keys, migrations.RunPython.noop),
+    ]
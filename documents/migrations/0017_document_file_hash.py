@@ -0,0 +1,39 @@
+# Generated by Django 4.2.4 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+def fill_file_hash(apps, schema_editor):
+    # Documentos com hash por trechos assinados pela raiz dos trechos atuais
+    # (não editados depois da assinatura): o arquivo assinado é o blob atual.
+    from users.crypto_utils import chunk_tree_root
+
+    Document = apps.get_model('documents', 'Document')
+    documents = Document.objects.filter(
+        chunk_size__isnull=False, chunk_digests__isnull=False, hash__isnull=False
+    ).only('id', 'blob', 'hash', 'chunk_digests')
+    batch = []
+    for document in documents.iterator(chunk_size=500):
+        if chunk_tree_root(bytes(document.chunk_digests)).hex() == document.hash:
+            document.file_hash = document.blob_id
+            batch.append(document)
+        if len(batch) >= 500:
+            Document.objects.bulk_update(batch, ['file_hash'])
+            batch = []
+    Document.objects.bulk_update(batch, ['file_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0016_signing_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='file_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True, verbose_name='Hash do arquivo'),
+        ),
+        migrations.RunPython(fill_file_hash, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,208 @@
-from django.db import models
-from users.models import CustomUser
-from users.crypto_utils import verify_signature, load_public_key_from_pem
+import functools
+import hashlib
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.text import Truncator
+from users.models import CustomUser, KeyAlgorithm, SigningKey
+from users.crypto_utils import (
+    chunk_digests,
+    chunk_tree_root,
+    chunked_digest,
+    generate_digest,
+    generate_hash,
+    get_cached_public_key,
+    key_algorithm,
+    key_fingerprint,
+    merkle_root_from_proof,
+    sign_digest,
+    verify_digest_signature,
+    verify_merkle_root_signature,
+    verify_signature,
+)
+from .blobstore import get_blob_store
+
+
+class DocumentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create não chama save(): o conteúdo pendente vai para o blob
+        # store aqui.
+        objs = list(objs)
+        with transaction.atomic():
+            for obj in objs:
+                obj._store_pending_content()
+            created = super().bulk_create(objs, *args, **kwargs)
+            # Nem o post_save é enviado: os documentos entram no índice de
+            # busca aqui (import local, pois search importa este módulo).
+            from .search import index_documents
+
+            index_documents(obj for obj in created if obj.pk is not None)
+            return created
+
+    def owner_count(self, owner_id) -> int:
+        """
+        Quantidade de documentos do usuário, contada só até
+        DOCUMENT_COUNT_LIMIT + 1. O COUNT percorre no máximo esse número de
+        entradas do índice (owner, id), então a listagem não fica mais lenta
+        para quem tem muitos documentos, e o total está sempre atualizado em
+        todos os processos.
+
+        Args:
+        - owner_id (int): Id do dono dos documentos.
+
+        Retorna:
+        - int: Quantidade de documentos do usuário; um valor maior que
+          DOCUMENT_COUNT_LIMIT significa "mais que o limite".
+        """
+        return self._owner_count_queryset(owner_id).count()
+
+    async def aowner_count(self, owner_id) -> int:
+        return await self._owner_count_queryset(owner_id).acount()
+
+    def _owner_count_queryset(self, owner_id):
+        return self.filter(owner_id=owner_id).order_by()[
+            : settings.DOCUMENT_COUNT_LIMIT + 1
+        ]
+
+    def invalidate_verification(self):
+        return self.update(
+            verified=None,
+            verified_key_fingerprint=None,
+            verified_hash=None,
+            updated_at=timezone.now(),
+        )
+
+
+class ContentBlobManager(models.Manager):
+    def acquire(self, content: str) -> str:
+        """
+        Guarda o conteúdo no blob store (se ainda não existir) e incrementa a
+        contagem de referências do blob.
+
+        Retorna:
+        - str: SHA256 do conteúdo, que identifica o blob.
+        """
+        digest = generate_hash(content)
+        with transaction.atomic():
+            if self.filter(pk=digest).update(refcount=F("refcount") + 1):
+                return digest
+            size = get_blob_store().write(digest, content)
+            try:
+                with transaction.atomic():
+                    self.create(digest=digest, size=size, refcount=1)
+            except IntegrityError:
+                # Outro processo criou o mesmo blob ao mesmo tempo.
+                self.filter(pk=digest).update(refcount=F("refcount") + 1)
+        return digest
+
+    def release(self, digest: str):
+        """
+        Decrementa a contagem de referências. Blobs sem referências são
+        removidos depois por `collect_garbage`.
+        """
+        self.filter(pk=digest, refcount__gt=0).update(refcount=F("refcount") - 1)
+
+    def collect_garbage(self, batch_size=500) -> int:
+        """
+        Remove os blobs sem referências, do banco e do disco.
+
+        Retorna:
+        - int: Quantidade de blobs removidos.
+        """
+        store = get_blob_store()
+        removed = 0
+        while True:
+            with transaction.atomic():
+                digests = list(
+                    self.filter(refcount=0).values_list("pk", flat=True)[:batch_size]
+                )
+                if not digests:
+                    return removed
+                for digest in digests:
+                    # O arquivo é apagado dentro da transação, enquanto a linha
+                    # ainda está bloqueada para quem tentar reaproveitar o blob.
+                    deleted, _ = self.filter(pk=digest, refcount=0).delete()
+                    if deleted:
+                        store.delete(digest)
+                        removed += 1
+
+    def collect_orphan_files(self, grace_seconds, batch_size=500) -> int:
+        """
+        Remove do disco os arquivos sem linha em ContentBlob. O arquivo é
+        gravado antes do commit (o resto do save() o lê), então fica órfão
+        quando a transação que criaria a linha é desfeita ou o processo morre
+        no meio da gravação.
+
+        Só são removidos arquivos sem alteração há mais de `grace_seconds`,
+        para não apagar o blob de uma transação ainda em andamento: quem
+        cria a linha sempre regrava o arquivo, renovando o mtime.
+
+        Args:
+        - grace_seconds (float): Idade mínima do arquivo, em segundos.
+        - batch_size (int): Arquivos consultados no banco por vez.
+
+        Retorna:
+        - int: Quantidade de arquivos removidos.
+        """
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        files = iter(get_blob_store().files())
+        while batch := {path.name: path for path in islice(files, batch_size)}:
+            known = set(self.filter(pk__in=list(batch)).values_list("pk", flat=True))
+            for name, path in batch.items():
+                if name in known:
+                    continue
+                try:
+                    if path.stat().st_mtime >= cutoff:
+                        continue
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        return removed
+
+
+class ContentBlob(models.Model):
+    digest = models.CharField("SHA256", max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField("Tamanho")
+    refcount = models.PositiveIntegerField("Referências", default=0)
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+
+    objects = ContentBlobManager()
+
+    def __str__(self):
+        return self.digest
+
+
+PREVIEW_LENGTH = 40
+
+
+def content_preview(content):
+    return Truncator(content or "").chars(PREVIEW_LENGTH)
+
+
+def chunk_size_for(size):
+    """
+    Retorna o tamanho dos trechos do hash de um conteúdo com `size` bytes, ou
+    None se ele deve usar o SHA256 simples.
+    """
+    minimum = getattr(settings, "DOCUMENT_CHUNKED_HASH_MIN_SIZE", None)
+    if minimum is None or size < minimum:
+        return None
+    return settings.DOCUMENT_CHUNK_SIZE
+
+
+class SignatureScheme(models.IntegerChoices):
+    # Assinatura RSA-PSS sobre `content + hash`.
+    LEGACY = 1, "Conteúdo + hash"
+    # Assinatura RSA-PSS sobre o digest SHA256 do conteúdo (Prehashed).
+    DIGEST = 2, "Digest SHA256"
+    # Assinatura da raiz de uma árvore Merkle sobre os digests de um lote.
+    MERKLE = 3, "Lote Merkle"
 
 
 class Document(models.Model):
@@ -8,21 +210,509 @@ class Document(models.Model):
         CustomUser, related_name="documents", on_delete=models.CASCADE
     )
     title = models.CharField("Título", max_length=255)
-    content = models.TextField("Conteúdo")
+    blob = models.ForeignKey(
+        ContentBlob,
+        related_name="documents",
+        on_delete=models.PROTECT,
+        verbose_name="Conteúdo",
+    )
+    content_preview = models.CharField(
+        "Prévia do conteúdo", max_length=PREVIEW_LENGTH, blank=True, default=""
+    )
     signature = models.BinaryField("Assinatura", null=True, blank=True)
-    hash = models.CharField("Hash", max_length=64, null=True, blank=True)
+    hash = models.CharField(
+        "Hash", max_length=64, null=True, blank=True, db_index=True
+    )
+    # SHA256 do arquivo assinado, quando difere de `hash` (documentos com
+    # hash por trechos, assinados pela raiz da árvore): é o hash que um
+    # usuário calcula com sha256sum, e as consultas por hash também o usam.
+    file_hash = models.CharField(
+        "Hash do arquivo", max_length=64, null=True, blank=True, db_index=True
+    )
+    signature_scheme = models.PositiveSmallIntegerField(
+        "Esquema da assinatura",
+        choices=SignatureScheme.choices,
+        default=SignatureScheme.DIGEST,
+    )
+    signature_algorithm = models.CharField(
+        "Algoritmo da assinatura",
+        max_length=16,
+        choices=KeyAlgorithm.choices,
+        default=KeyAlgorithm.RSA_2048,
+    )
+    # Versão da chave do dono que assinou o documento. Nula nas assinaturas
+    # anteriores ao versionamento, verificadas com a chave atual do dono.
+    signing_key = models.ForeignKey(
+        SigningKey,
+        related_name="documents",
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        verbose_name="Chave da assinatura",
+    )
+    merkle_root = models.CharField(
+        "Raiz Merkle", max_length=64, null=True, blank=True
+    )
+    merkle_index = models.PositiveIntegerField(
+        "Posição no lote Merkle", null=True, blank=True
+    )
+    merkle_path = models.JSONField("Prova de inclusão", null=True, blank=True)
+    chunk_size = models.PositiveIntegerField(
+        "Tamanho dos trechos do hash", null=True, blank=True
+    )
+    chunk_digests = models.BinaryField("Hashes dos trechos", null=True, blank=True)
+    verified = models.BooleanField("Assinatura verificada", null=True, blank=True)
+    verified_key_fingerprint = models.CharField(
+        "Chave da verificação", max_length=64, null=True, blank=True
+    )
+    verified_hash = models.CharField(
+        "Hash da verificação", max_length=64, null=True, blank=True
+    )
+    # Última mudança no que a verificação depende (conteúdo, assinatura ou
+    # chave do dono); usado como Last-Modified.
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    objects = DocumentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["owner", "id"])]
 
     def __str__(self):
         return self.title
 
+    # O corpo do documento fica no blob store; `content` é lido sob demanda
+    # e as alterações só são gravadas no save().
+    _pending_content = None
+    _content_cache = None
+    # (conteúdo, tamanho dos trechos, hashes dos trechos) calculados por
+    # content_digest() para o conteúdo pendente, reaproveitados no save().
+    _pending_chunks = None
+    # Título carregado do banco e mudança de conteúdo ainda não indexada,
+    # para que o post_save só reindexe o documento quando for preciso.
+    _loaded_title = None
+    _search_stale = False
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_title = instance.__dict__.get("title")
+        return instance
+
+    def needs_search_indexing(self, created, update_fields=None) -> bool:
+        if created:
+            return True
+        if update_fields is not None:
+            return bool({"title", "blob"} & set(update_fields))
+        title_changed = (
+            "title" in self.__dict__ and self.title != self._loaded_title
+        )
+        return self._search_stale or title_changed
+
+    @property
+    def content(self):
+        if self._pending_content is not None:
+            return self._pending_content
+        if self.blob_id is None:
+            return ""
+        if self._content_cache is None or self._content_cache[0] != self.blob_id:
+            self._content_cache = (
+                self.blob_id,
+                get_blob_store().read_text(self.blob_id),
+            )
+        return self._content_cache[1]
+
+    @content.setter
+    def content(self, value):
+        self._pending_content = value
+        self._pending_chunks = None
+
+    def content_digest(self, recompute=False):
+        """
+        Digest assinado do conteúdo: o SHA256 do corpo ou, nos documentos com
+        hash por trechos, a raiz da árvore sobre os hashes dos trechos.
+
+        Args:
+        - recompute (bool): Recalcula os hashes dos trechos a partir do blob
+          (verificação) em vez de usar os guardados no documento (assinatura).
+        """
+        if self._pending_content is not None:
+            data = self._pending_content.encode("utf-8")
+            chunk_size = chunk_size_for(len(data))
+            if chunk_size is None:
+                return generate_digest(data)
+            digests, _ = chunk_digests(data, chunk_size)
+            self._pending_chunks = (self._pending_content, chunk_size, digests)
+            return chunk_tree_root(digests)
+        if self.chunk_size is None:
+            return get_blob_store().digest(self.blob_id)
+        if recompute or self.chunk_digests is None:
+            with get_blob_store().open(self.blob_id) as data:
+                return chunked_digest(data, self.chunk_size)
+        return chunk_tree_root(bytes(self.chunk_digests))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            if "content" not in update_fields:
+                return super().save(*args, **kwargs)
+            kwargs["update_fields"] = {*update_fields, "blob", "content_preview"} - {
+                "content"
+            }
+        if self._pending_content is None:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            previous_blob_id = self._store_pending_content()
+            super().save(*args, **kwargs)
+            if previous_blob_id is not None:
+                ContentBlob.objects.release(previous_blob_id)
+
+    def content_sha256(self) -> str:
+        """
+        SHA256 (em hexadecimal) do conteúdo inteiro, o mesmo do sha256sum do
+        arquivo: o id do blob ou, com conteúdo pendente, o hash dele.
+        """
+        if self._pending_content is not None:
+            return generate_digest(self._pending_content).hex()
+        return self.blob_id
+
+    def _store_pending_content(self):
+        """
+        Grava o conteúdo pendente no blob store e aponta o documento para ele.
+
+        Retorna:
+        - str: Blob referenciado antes da alteração, que deve ser liberado.
+        """
+        content = self._pending_content
+        if content is None:
+            return None
+        previous_blob_id = self.blob_id
+        self.blob_id = ContentBlob.objects.acquire(content)
+        self.content_preview = content_preview(content)
+        self._pending_content = None
+        self._content_cache = (self.blob_id, content)
+        self._search_stale = previous_blob_id != self.blob_id
+        pending_chunks, self._pending_chunks = self._pending_chunks, None
+        if pending_chunks is not None and pending_chunks[0] is content:
+            # Já calculados por content_digest() ao assinar antes de salvar.
+            _, self.chunk_size, self.chunk_digests = pending_chunks
+        else:
+            self._update_chunk_digests(previous_blob_id)
+        return previous_blob_id
+
+    def _update_chunk_digests(self, previous_blob_id):
+        """
+        Atualiza os hashes dos trechos para o blob atual. Quando o documento
+        já tinha hashes por trechos, os trechos cujos bytes não mudaram em
+        relação ao blob anterior não são recalculados.
+        """
+        store = get_blob_store()
+        with store.open(self.blob_id) as data:
+            chunk_size = chunk_size_for(len(data))
+            if chunk_size is None:
+                self.chunk_size = self.chunk_digests = None
+                return
+            base_digests = None
+            if self.chunk_size == chunk_size and self.chunk_digests is not None:
+                if previous_blob_id == self.blob_id:
+                    return
+                base_digests = bytes(self.chunk_digests)
+            self.chunk_size = chunk_size
+            if previous_blob_id is not None and base_digests is not None:
+                try:
+                    with store.open(previous_blob_id) as base:
+                        self.chunk_digests, _ = chunk_digests(
+                            data, chunk_size, base, base_digests
+                        )
+                    return
+                except FileNotFoundError:
+                    pass
+            self.chunk_digests, _ = chunk_digests(data, chunk_size)
+
+    def signed_message(self):
+        if self.signature_scheme == SignatureScheme.LEGACY:
+            return self.content + self.hash
+        return self.content
+
+    def signing_public_key(self):
+        """
+        Chave pública (PEM) que verifica a assinatura: a da versão que assinou
+        o documento ou, sem versão registrada, a chave atual do dono.
+        """
+        if self.signing_key_id is not None:
+            return self.signing_key.public_key
+        return self.owner.public_key
+
+    def signing_key_fingerprint(self):
+        """
+        Impressão digital de signing_public_key(), ou None se não houver
+        chave.
+        """
+        if self.signing_key_id is not None:
+            return self.signing_key.fingerprint
+        public_key = self.owner.public_key
+        return key_fingerprint(public_key) if public_key else None
+
+    def verification_item(self):
+        """
+        Retorna a tupla usada por `verify_signatures_batch` para este documento.
+        """
+        digest = self.signature_scheme == SignatureScheme.DIGEST
+        if (
+            self.chunk_size is not None
+            and self.signature_scheme != SignatureScheme.LEGACY
+        ):
+            digest = functools.partial(chunked_digest, chunk_size=self.chunk_size)
+        # Como em verify_signature(), o digest recalculado tem de ser o hash
+        # guardado (no esquema LEGACY o hash faz parte da mensagem assinada).
+        expected = None
+        if self.signature_scheme != SignatureScheme.LEGACY:
+            try:
+                expected = bytes.fromhex(self.hash or "")
+            except ValueError:
+                expected = b""
+        return (
+            self.owner_id,
+            self.signing_public_key(),
+            self.signed_message(),
+            self.signature,
+            digest,
+            self.merkle_proof(),
+            expected,
+        )
+
+    def merkle_proof(self):
+        """
+        Retorna (raiz, caminho) da assinatura em lote, ou None se o documento
+        não foi assinado em um lote Merkle.
+        """
+        if self.signature_scheme != SignatureScheme.MERKLE:
+            return None
+        path = [(side, bytes.fromhex(sibling)) for side, sibling in self.merkle_path]
+        return bytes.fromhex(self.merkle_root), path
+
+    def sign(self, private_key, signing_key_id=None):
+        """
+        Assina o documento (esquema DIGEST).
+
+        Args:
+        - private_key: Chave privada carregada.
+        - signing_key_id (int): Versão (SigningKey) da chave. Padrão: a
+          versão atual do dono, que corresponde a owner.private_key.
+        """
+        if signing_key_id is None:
+            signing_key_id = self.owner.signing_key_id
+        digest = self.content_digest()
+        self.hash = digest.hex()
+        file_hash = self.content_sha256()
+        self.file_hash = file_hash if file_hash != self.hash else None
+        self.signature = sign_digest(digest, private_key)
+        self.signature_scheme = SignatureScheme.DIGEST
+        self.signature_algorithm = key_algorithm(private_key)
+        self.signing_key_id = signing_key_id
+        self.merkle_root = self.merkle_index = self.merkle_path = None
+        self.invalidate_verification()
+
+    def set_merkle_signature(self, root, index, path, signature, algorithm):
+        self.signature = signature
+        self.signature_scheme = SignatureScheme.MERKLE
+        self.signature_algorithm = algorithm
+        self.merkle_root = root.hex()
+        self.merkle_index = index
+        self.merkle_path = [[side, sibling.hex()] for side, sibling in path]
+        self.invalidate_verification()
+
     def verify_signature(self):
         if self.signature is None or self.hash is None:
             return False
-        concat = self.content + self.hash
-        public_key = load_public_key_from_pem(self.owner.public_key)
-        return verify_signature(concat, self.signature, public_key)
+        public_key_pem = self.signing_public_key()
+        if not public_key_pem:
+            return False
+        public_key = get_cached_public_key(self.owner_id, public_key_pem)
+        if key_algorithm(public_key) != self.signature_algorithm:
+            return False
+        if self.signature_scheme == SignatureScheme.LEGACY:
+            concat = self.signed_message()
+            return verify_signature(concat, self.signature, public_key)
+
+        digest = self.content_digest(recompute=True)
+        if digest.hex() != self.hash:
+            return False
+        if self.signature_scheme == SignatureScheme.MERKLE:
+            root, path = self.merkle_proof()
+            if merkle_root_from_proof(digest, path) != root:
+                return False
+            return verify_merkle_root_signature(
+                self.owner_id, public_key_pem, root, self.signature
+            )
+        return verify_digest_signature(digest, bytes(self.signature), public_key)
+
+    def invalidate_verification(self):
+        self.verified = None
+        self.verified_key_fingerprint = None
+        self.verified_hash = None
+        self.updated_at = timezone.now()
+
+    def version_tag(self, public_key_fingerprint) -> str:
+        """
+        Identifica a versão de tudo aquilo de que a verificação depende:
+        conteúdo, hash, assinatura e chave pública que a verifica. Usado como
+        ETag e como chave do cache de verificações.
+
+        Args:
+        - public_key_fingerprint (str): signing_key_fingerprint().
+
+        Retorna:
+        - str: Hash hexadecimal (32 caracteres) da versão.
+        """
+        signature = self.signature
+        parts = (
+            self.pk,
+            self.blob_id,
+            self.hash,
+            hashlib.sha256(signature).hexdigest() if signature else "",
+            self.signature_scheme,
+            self.signature_algorithm,
+            self.merkle_root,
+            public_key_fingerprint,
+        )
+        return hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()[:32]
+
+    def is_verification_current(self, public_key_fingerprint):
+        return (
+            self.verified is not None
+            and self.verified_hash == self.hash
+            and self.verified_key_fingerprint == public_key_fingerprint
+        )
+
+    def verified_signature(self, public_key_fingerprint=None):
+        """
+        Retorna o resultado da verificação da assinatura usando o status salvo
+        no documento, verificando novamente apenas se o hash ou a chave que
+        verifica a assinatura mudaram desde a última verificação.
+        """
+        if self.signature is None or self.hash is None:
+            return False
+        if public_key_fingerprint is None:
+            public_key_fingerprint = self.signing_key_fingerprint()
+            if public_key_fingerprint is None:
+                return False
+        if self.is_verification_current(public_key_fingerprint):
+            return self.verified
+
+        queryset, values = self.record_verification(
+            self.verify_signature(), public_key_fingerprint
+        )
+        queryset.update(**values)
+        return self.verified
+
+    def record_verification(self, result, public_key_fingerprint):
+        """
+        Guarda o resultado da verificação na instância.
+
+        Retorna:
+        - tuple: (queryset, valores) para gravar o status com update(); o
+          queryset só casa se o documento não mudou desde a leitura.
+        """
+        self.verified = result
+        self.verified_key_fingerprint = public_key_fingerprint
+        self.verified_hash = self.hash
+        queryset = Document.objects.filter(
+            pk=self.pk,
+            blob=self.blob_id,
+            hash=self.hash,
+            signature=self.signature,
+        )
+        values = {
+            "verified": self.verified,
+            "verified_key_fingerprint": self.verified_key_fingerprint,
+            "verified_hash": self.verified_hash,
+        }
+        return queryset, values
 
     def hex_signature(self):
         if self.signature is None:
             return None
         return self.signature.hex()
+
+
+class SigningJobStatus(models.IntegerChoices):
+    PENDING = 1, "Na fila"
+    RUNNING = 2, "Em execução"
+    DONE = 3, "Assinado"
+    FAILED = 4, "Falhou"
+
+
+class SigningJob(models.Model):
+    """
+    Pedido de assinatura de um documento, processado em segundo plano por
+    `manage.py run_signing_worker` (ver documents.jobs).
+    """
+
+    document = models.ForeignKey(
+        Document, related_name="signing_jobs", on_delete=models.CASCADE
+    )
+    # Redundante com document.owner: o worker agrupa os pedidos por dono.
+    owner = models.ForeignKey(
+        CustomUser, related_name="signing_jobs", on_delete=models.CASCADE
+    )
+    status = models.PositiveSmallIntegerField(
+        "Situação",
+        choices=SigningJobStatus.choices,
+        default=SigningJobStatus.PENDING,
+    )
+    claim = models.CharField("Reserva", max_length=64, blank=True, default="")
+    error = models.TextField("Erro", blank=True, default="")
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    started_at = models.DateTimeField("Iniciado em", null=True, blank=True)
+    finished_at = models.DateTimeField("Concluído em", null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"]),
+            models.Index(fields=["document", "status"]),
+            models.Index(fields=["status", "finished_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.document_id} ({self.get_status_display()})"
+
+
+class KeyRotationStatus(models.IntegerChoices):
+    RUNNING = 1, "Em andamento"
+    DONE = 2, "Concluída"
+
+
+class KeyRotation(models.Model):
+    """
+    Reassinatura dos documentos de um usuário com a versão atual da chave,
+    feita em lotes por `manage.py rotate_keys` (ver documents.rotation).
+    `last_document_id` é o checkpoint: os documentos até ele já foram
+    processados.
+    """
+
+    owner = models.ForeignKey(
+        CustomUser, related_name="key_rotations", on_delete=models.CASCADE
+    )
+    signing_key = models.ForeignKey(
+        SigningKey,
+        related_name="rotations",
+        on_delete=models.CASCADE,
+        verbose_name="Chave nova",
+    )
+    status = models.PositiveSmallIntegerField(
+        "Situação",
+        choices=KeyRotationStatus.choices,
+        default=KeyRotationStatus.RUNNING,
+    )
+    last_document_id = models.PositiveBigIntegerField(
+        "Último documento processado", default=0
+    )
+    signed = models.PositiveIntegerField("Documentos reassinados", default=0)
+    skipped = models.PositiveIntegerField("Documentos ignorados", default=0)
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+    finished_at = models.DateTimeField("Concluído em", null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.owner_id} -> {self.signing_key} ({self.get_status_display()})"
@@ -0,0 +1,188 @@
+"""
+Rotação de chaves: reassina os documentos de um usuário com a versão atual
+da chave (CustomUser.signing_key), para que as versões antigas possam ser
+aposentadas.
+
+Os documentos são percorridos em ordem de id, em lotes curtos. Cada lote é
+lido com uma consulta própria (nenhum cursor fica aberto durante a rotação),
+assinado fora de transação e gravado com um bulk_update em uma transação
+curta, junto com o checkpoint (KeyRotation.last_document_id). Entre os lotes
+o processo dorme, para que as escritas do site não fiquem esperando atrás da
+rotação. Uma rotação interrompida continua a partir do último lote gravado.
+"""
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from users.crypto_utils import get_cached_private_key
+from users.models import CustomUser
+from .hashindex import record_signatures, signature_entries
+from .models import Document, KeyRotation, KeyRotationStatus
+from .signing import SIGNED_FIELDS
+
+# Campos lidos para verificar a assinatura atual e reassinar o documento.
+ROTATION_FIELDS = [
+    "id",
+    "blob",
+    "hash",
+    "signature",
+    "signature_scheme",
+    "signature_algorithm",
+    "chunk_size",
+    "chunk_digests",
+    "merkle_root",
+    "merkle_path",
+    "verified",
+    "verified_key_fingerprint",
+    "verified_hash",
+    "updated_at",
+    "owner__public_key",
+    "signing_key__public_key",
+    "signing_key__fingerprint",
+]
+
+
+def start_rotation(owner) -> KeyRotation:
+    """
+    Retorna a rotação em andamento do usuário ou inicia uma para a versão
+    atual da chave.
+
+    Retorna:
+    - KeyRotation: A rotação a executar.
+    """
+    if owner.signing_key_id is None:
+        raise ValueError(f"O usuário {owner} não tem chave de assinatura.")
+    rotation = KeyRotation.objects.filter(
+        owner=owner, status=KeyRotationStatus.RUNNING
+    ).first()
+    if rotation is None:
+        rotation = KeyRotation.objects.create(
+            owner=owner, signing_key_id=owner.signing_key_id
+        )
+    return rotation
+
+
+def pending_documents(rotation):
+    """
+    Documentos assinados do usuário, depois do checkpoint, que ainda não
+    foram assinados com a chave da rotação.
+    """
+    return (
+        Document.objects.filter(
+            owner_id=rotation.owner_id,
+            signature__isnull=False,
+            id__gt=rotation.last_document_id,
+        )
+        .exclude(signing_key_id=rotation.signing_key_id)
+        .order_by("id")
+    )
+
+
+def _is_valid(document):
+    fingerprint = document.signing_key_fingerprint()
+    if fingerprint is not None and document.is_verification_current(fingerprint):
+        return document.verified
+    return document.verify_signature()
+
+
+def rotate_batch(rotation, batch_size) -> int:
+    """
+    Reassina o próximo lote de documentos da rotação.
+
+    Só são reassinados os documentos cuja assinatura atual é válida: a
+    rotação troca a chave, mas não assina conteúdo que o usuário não
+    assinou. Os demais, e os alterados enquanto o lote era assinado, são
+    contados como ignorados.
+
+    Retorna:
+    - int: Quantidade de documentos processados (0 quando a rotação termina).
+    """
+    owner = CustomUser.objects.only("id", "private_key", "signing_key").get(
+        pk=rotation.owner_id
+    )
+    if owner.signing_key_id != rotation.signing_key_id:
+        # Um novo par de chaves foi gerado durante a rotação: recomeça com a
+        # nova versão.
+        rotation.signing_key_id = owner.signing_key_id
+        rotation.last_document_id = 0
+        rotation.save(update_fields=["signing_key", "last_document_id", "updated_at"])
+    private_key = get_cached_private_key(owner.id, owner.private_key)
+
+    documents = (
+        pending_documents(rotation)
+        .select_related("owner", "signing_key")
+        .only(*ROTATION_FIELDS)[:batch_size]
+    )
+    last_id = None
+    loaded = {}
+    signed = []
+    skipped = 0
+    for document in documents.iterator(chunk_size=batch_size):
+        last_id = document.id
+        if not _is_valid(document):
+            skipped += 1
+            continue
+        loaded[document.id] = (document.updated_at, document.hash)
+        document.sign(private_key, owner.signing_key_id)
+        signed.append(document)
+
+    if last_id is None:
+        rotation.status = KeyRotationStatus.DONE
+        rotation.finished_at = timezone.now()
+        rotation.save(update_fields=["status", "finished_at", "updated_at"])
+        return 0
+
+    with transaction.atomic():
+        # Documentos editados ou reassinados pelo usuário desde a leitura
+        # ficam como estão.
+        current = dict(
+            Document.objects.select_for_update()
+            .filter(id__in=loaded)
+            .values_list("id", "updated_at")
+        )
+        unchanged = [
+            document
+            for document in signed
+            if current.get(document.id) == loaded[document.id][0]
+        ]
+        Document.objects.bulk_update(unchanged, SIGNED_FIELDS)
+        rotation.last_document_id = last_id
+        rotation.signed += len(unchanged)
+        rotation.skipped += skipped + len(signed) - len(unchanged)
+        rotation.save(
+            update_fields=["last_document_id", "signed", "skipped", "updated_at"]
+        )
+    # O conteúdo não muda, mas o hash de uma assinatura do esquema antigo
+    # (conteúdo + hash) pode ser recalculado de outra forma.
+    record_signatures(
+        signature_entries(
+            (
+                document
+                for document in unchanged
+                if document.hash != loaded[document.id][1]
+            ),
+            rotation.owner_id,
+        )
+    )
+    return skipped + len(signed)
+
+
+def run_rotation(rotation, batch_size, pause=0.0, progress=None):
+    """
+    Executa a rotação até o fim, lote a lote.
+
+    Args:
+    - rotation (KeyRotation): Rotação iniciada por start_rotation().
+    - batch_size (int): Documentos por lote (e por transação).
+    - pause (float): Segundos de espera entre os lotes.
+    - progress (callable): Chamado com a rotação após cada lote gravado.
+
+    Retorna:
+    - KeyRotation: A rotação concluída.
+    """
+    while rotate_batch(rotation, batch_size):
+        if progress:
+            progress(rotation)
+        time.sleep(pause)
+    return rotation
@@ -0,0 +1,164 @@
+"""
+Busca textual nos documentos (título e conteúdo) com um índice FTS5 do
+SQLite. O índice é uma tabela virtual cujo rowid é o id do documento; ele é
+atualizado pelos sinais de Document (documents.signals) e pode ser
+reconstruído com `manage.py rebuild_search_index`.
+
+A tabela é criada pela migração 0015 com `prefix = '2 3'` (índices extras
+para prefixos curtos) e ranking bm25 com peso maior para o título. O dono
+fica em uma coluna indexada com o token "o<id>", de modo que o filtro por
+dono é resolvido pelo próprio índice, e não linha a linha.
+"""
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.db.models import Q
+
+from .models import Document
+
+TABLE = "documents_document_search"
+# Colunas em que os termos do usuário são procurados; a coluna do dono só é
+# usada pelo filtro de dono.
+TEXT_COLUMNS = "{title content}"
+
+# Termos da busca; um "*" no fim do termo faz uma busca por prefixo.
+_TERM = re.compile(r"\w+\*?")
+
+
+def is_supported(connection) -> bool:
+    return connection.vendor == "sqlite"
+
+
+def owner_token(owner_id) -> str:
+    return f"o{owner_id}"
+
+
+def indexed_text(document) -> str:
+    # Documentos muito grandes são indexados só até DOCUMENT_SEARCH_MAX_CHARS.
+    return document.content[: settings.DOCUMENT_SEARCH_MAX_CHARS]
+
+
+def index_documents(documents):
+    """
+    Insere ou substitui os documentos no índice.
+
+    Args:
+    - documents (iterable): Documentos salvos (com id, título, dono e
+      conteúdo).
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    if not is_supported(connection):
+        return
+    rows = [
+        (
+            document.id,
+            document.title,
+            indexed_text(document),
+            owner_token(document.owner_id),
+        )
+        for document in documents
+    ]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {TABLE}(rowid, title, content, owner) "
+            "VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_documents(document_ids):
+    connection = connections[DEFAULT_DB_ALIAS]
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {TABLE} WHERE rowid = %s",
+            [(document_id,) for document_id in document_ids],
+        )
+
+
+def remove_orphans():
+    """
+    Remove do índice as linhas de documentos que não existem mais.
+
+    Retorna:
+    - int: Quantidade de linhas removidas.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {TABLE} WHERE rowid NOT IN "
+            f"(SELECT id FROM {Document._meta.db_table})"
+        )
+        return cursor.rowcount
+
+
+def optimize():
+    """
+    Funde os segmentos do índice em um só, o que acelera as buscas depois
+    de muitas inserções.
+    """
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+
+
+def match_query(text: str):
+    """
+    Converte o texto digitado em uma consulta FTS5: cada termo vira uma
+    frase entre aspas (a sintaxe do FTS5 não é exposta ao usuário) e todos
+    os termos são obrigatórios; "termo*" busca por prefixo. A consulta é
+    restrita ao título e ao conteúdo por search().
+
+    Retorna:
+    - str: Consulta MATCH, ou None se o texto não tiver termos.
+    """
+    terms = []
+    for term in _TERM.findall(text):
+        prefix = term.endswith("*")
+        terms.append(f'"{term.rstrip("*")}"' + ("*" if prefix else ""))
+    return " ".join(terms) or None
+
+
+def search(owner, text, limit, offset=0):
+    """
+    Busca nos documentos do dono, do mais relevante para o menos relevante.
+
+    Args:
+    - owner (CustomUser): Dono dos documentos.
+    - text (str): Texto digitado pelo usuário.
+    - limit (int): Quantidade máxima de resultados.
+    - offset (int): Resultados pulados (paginação).
+
+    Retorna:
+    - list: Pares (id do documento, trecho do conteúdo com os termos).
+    """
+    query = match_query(text)
+    if query is None:
+        return []
+    connection = connections[router.db_for_read(Document)]
+    if not is_supported(connection):
+        # Sem FTS5: busca simples no título e no início do conteúdo.
+        documents = (
+            Document.objects.filter(owner=owner)
+            .filter(Q(title__icontains=text) | Q(content_preview__icontains=text))
+            .order_by("-id")
+            .values_list("id", "content_preview")
+        )
+        return list(documents[offset : offset + limit])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({TABLE}, 1, '', '', '…', 16) FROM {TABLE} "
+            f"WHERE {TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s",
+            [
+                f"owner:{owner_token(owner.pk)} AND ({TEXT_COLUMNS}: ({query}))",
+                limit,
+                offset,
+            ],
+        )
+        return cursor.fetchall()
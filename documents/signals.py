@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .models import ContentBlob, Document
+
+
+@receiver(post_delete, sender=Document)
+def release_document_blob(sender, instance, **kwargs):
+    if instance.blob_id is not None:
+        ContentBlob.objects.release(instance.blob_id)
+
+
+@receiver(post_save, sender=Document)
+def index_document(sender, instance, created, update_fields=None, **kwargs):
+    if instance.needs_search_indexing(created, update_fields):
+        search.index_documents([instance])
+        instance._loaded_title = instance.title
+        instance._search_stale = False
+
+
+@receiver(post_delete, sender=Document)
+def remove_document_from_index(sender, instance, **kwargs):
+    search.remove_documents([instance.id])
+
@@ -0,0 +1,272 @@
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.db import transaction
+
+from users.crypto_utils import (
+    KeyCache,
+    chunk_tree_root,
+    key_algorithm,
+    load_private_key_from_pem,
+    merkle_tree,
+    sign_digest,
+)
+from .blobstore import file_digest, get_blob_store
+from .hashindex import record_signatures, signature_entries
+from .models import Document, SignatureScheme
+
+SIGNED_FIELDS = [
+    "hash",
+    "file_hash",
+    "signature",
+    "signature_scheme",
+    "signature_algorithm",
+    "signing_key",
+    "merkle_root",
+    "merkle_index",
+    "merkle_path",
+    "verified",
+    "verified_key_fingerprint",
+    "verified_hash",
+    "updated_at",
+]
+
+# Cache das chaves privadas dentro de cada processo do pool.
+_worker_keys = KeyCache(maxsize=256)
+
+
+def sign_merkle_batch(digests, private_key):
+    """
+    Assina um lote de documentos com uma única operação RSA: constrói a
+    árvore Merkle sobre os digests e assina apenas a raiz.
+
+    Args:
+    - digests (list): Digests SHA256 (bytes) dos documentos.
+    - private_key: Chave privada RSA.
+
+    Retorna:
+    - tuple: (raiz, caminhos, assinatura da raiz).
+    """
+    root, paths = merkle_tree(digests)
+    return root, paths, sign_digest(root, private_key)
+
+
+def _sign_group(job):
+    """
+    Assina, dentro de um processo do pool, os documentos de um único dono.
+
+    Args:
+    - job (tuple): (owner_id, private_key_pem, [(document_id, blob_path,
+      chunk_digests), ...], merkle). Documentos com hashes por trechos são
+      assinados pela raiz da árvore dos trechos, sem ler o conteúdo.
+
+    Retorna:
+    - list: Tuplas (document_id, hash, signature, algorithm, merkle), onde
+      merkle é (raiz, índice, caminho) nos lotes Merkle e None caso contrário.
+    """
+    owner_id, private_key_pem, documents, merkle = job
+    private_key = _worker_keys.get_or_load(
+        owner_id, private_key_pem, load_private_key_from_pem
+    )
+    algorithm = key_algorithm(private_key)
+    # Mesmo esquema de Document.sign(), lendo o conteúdo do blob mapeado.
+    digests = [
+        file_digest(blob_path) if chunks is None else chunk_tree_root(chunks)
+        for _, blob_path, chunks in documents
+    ]
+    if merkle:
+        root, paths, signature = sign_merkle_batch(digests, private_key)
+        return [
+            (
+                document_id,
+                digest.hex(),
+                signature,
+                algorithm,
+                (root, index, paths[index]),
+            )
+            for index, ((document_id, *_), digest) in enumerate(
+                zip(documents, digests)
+            )
+        ]
+    return [
+        (document_id, digest.hex(), sign_digest(digest, private_key), algorithm, None)
+        for (document_id, *_), digest in zip(documents, digests)
+    ]
+
+
+def lock_unchanged(documents, loaded_at) -> list:
+    """
+    Trava as linhas dos documentos assinados e retorna os que não foram
+    alterados desde a leitura (mesmo updated_at): um documento editado
+    enquanto era assinado não pode receber a assinatura do conteúdo antigo.
+    Deve ser chamada dentro da transação que grava as assinaturas.
+
+    Args:
+    - documents (list): Documentos assinados.
+    - loaded_at (dict): updated_at de cada documento, por id, quando foi lido.
+
+    Retorna:
+    - list: Os documentos que podem ser gravados.
+    """
+    current = dict(
+        Document.objects.select_for_update()
+        .filter(id__in=[document.id for document in documents])
+        .values_list("id", "updated_at")
+    )
+    return [
+        document
+        for document in documents
+        if current.get(document.id) == loaded_at[document.id]
+    ]
+
+
+def _write_results(results, owner_id, signing_key_id, loaded) -> int:
+    documents = []
+    for document_id, hash, signature, algorithm, merkle in results:
+        document = Document(id=document_id, hash=hash, signing_key_id=signing_key_id)
+        file_hash = loaded[document_id].blob_id
+        document.file_hash = file_hash if file_hash != hash else None
+        if merkle is None:
+            document.signature = signature
+            document.signature_scheme = SignatureScheme.DIGEST
+            document.signature_algorithm = algorithm
+            document.invalidate_verification()
+        else:
+            document.set_merkle_signature(*merkle, signature, algorithm)
+        documents.append(document)
+    loaded_at = {document.id: loaded[document.id].updated_at for document in documents}
+    with transaction.atomic():
+        documents = lock_unchanged(documents, loaded_at)
+        Document.objects.bulk_update(documents, SIGNED_FIELDS)
+    record_signatures(signature_entries(documents, owner_id))
+    return len(documents)
+
+
+def _group_by_owner(chunk, merkle):
+    store = get_blob_store()
+    groups = {}
+    for document in chunk:
+        owner = document.owner
+        group = groups.setdefault(
+            owner.id, (owner.id, bytes(owner.private_key), [], merkle)
+        )
+        chunks = document.chunk_digests
+        group[2].append(
+            (
+                document.id,
+                str(store.path(document.blob_id)),
+                None if chunks is None else bytes(chunks),
+            )
+        )
+    return list(groups.values())
+
+
+def unsigned_documents():
+    return Document.objects.filter(signature__isnull=True)
+
+
+def sign_documents(
+    queryset=None, workers=None, batch_size=500, progress=None, merkle=False
+):
+    """
+    Assina documentos em massa usando um pool de processos. Cada processo
+    carrega a chave privada de cada dono uma única vez e os resultados são
+    gravados em lotes com bulk_update.
+
+    Como os lotes já gravados deixam de estar pendentes, basta executar de novo
+    após uma interrupção para continuar de onde parou. Documentos editados
+    enquanto eram assinados não são gravados e ficam para a próxima execução.
+
+    Args:
+    - queryset (QuerySet): Documentos a assinar. Padrão: os não assinados.
+    - workers (int): Número de processos. Padrão: número de CPUs.
+    - batch_size (int): Documentos por lote enviado a um processo.
+    - merkle (bool): Assina cada lote de um mesmo dono com uma única operação
+      RSA sobre a raiz de uma árvore Merkle.
+    - progress (callable): Chamado com (assinados, total, retomar_após) após
+      cada lote gravado; todos os documentos com id até `retomar_após` já
+      foram processados.
+
+    Retorna:
+    - dict: Totais de documentos assinados ("signed"), ignorados porque o
+      dono não tem chave ("skipped"), não gravados porque foram editados
+      durante a assinatura ("changed") e a assinar ("total", sem os
+      ignorados).
+    """
+    if queryset is None:
+        queryset = unsigned_documents()
+    workers = workers or os.cpu_count() or 1
+    skipped = queryset.filter(owner__private_key__isnull=True).count()
+    queryset = (
+        queryset.filter(owner__private_key__isnull=False)
+        .select_related("owner")
+        .only(
+            "id",
+            "blob",
+            "chunk_digests",
+            "updated_at",
+            "owner__private_key",
+            "owner__signing_key",
+        )
+        .order_by("id")
+    )
+    total = queryset.count()
+    signed = changed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        # Lotes na ordem de envio: [maior id do lote, grupos ainda pendentes].
+        # O cursor de retomada só avança quando todos os lotes anteriores
+        # foram gravados, mesmo que terminem fora de ordem.
+        batches = deque()
+        resume_after = 0
+
+        def submit(chunk):
+            if not chunk:
+                return
+            jobs = _group_by_owner(chunk, merkle)
+            batch = [chunk[-1].id, len(jobs)]
+            batches.append(batch)
+            loaded = {document.id: document for document in chunk}
+            # Versão da chave de cada dono, gravada junto com as assinaturas.
+            signing_keys = {
+                document.owner.id: document.owner.signing_key_id
+                for document in chunk
+            }
+            for job in jobs:
+                pending[pool.submit(_sign_group, job)] = (
+                    batch,
+                    job[0],
+                    signing_keys[job[0]],
+                    loaded,
+                )
+
+        def collect():
+            nonlocal signed, changed, resume_after
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, owner_id, signing_key_id, loaded = pending.pop(future)
+                results = future.result()
+                written = _write_results(results, owner_id, signing_key_id, loaded)
+                signed += written
+                changed += len(results) - written
+                batch[1] -= 1
+            while batches and batches[0][1] == 0:
+                resume_after = batches.popleft()[0]
+            if progress:
+                progress(signed, total, resume_after)
+
+        chunk = []
+        for document in queryset.iterator(chunk_size=batch_size):
+            chunk.append(document)
+            if len(chunk) >= batch_size:
+                submit(chunk)
+                chunk = []
+                while len(pending) >= workers * 2:
+                    collect()
+        submit(chunk)
+        while pending:
+            collect()
+
+    return {"signed": signed, "skipped": skipped, "changed": changed, "total": total}
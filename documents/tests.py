@@ -1,3 +1,1364 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import (
+    Client,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from documents.blobstore import get_blob_store
+from documents.hashindex import (
+    HashIndex,
+    find_document,
+    get_hash_index,
+    record_signatures,
+    signature_entries,
+)
+from documents.jobs import claim_jobs, enqueue_signing, process_jobs
+from documents.management.commands import benchmark, export_documents
+from documents.models import (
+    ContentBlob,
+    Document,
+    SignatureScheme,
+    SigningJobStatus,
+)
+from documents.rotation import rotate_batch, run_rotation, start_rotation
+from documents.search import search
+from documents import signing
+from documents.signing import sign_documents, sign_merkle_batch
+from documents.uploadhandlers import HashedUpload
+from users import verify_bundle
+from users.crypto_utils import (
+    ED25519,
+    RSA_2048,
+    chunk_digests,
+    generate_hash,
+    generate_keypair_pem,
+    get_cached_private_key,
+    key_algorithm,
+    load_private_key_from_pem,
+    merkle_root_from_proof,
+    merkle_tree,
+    sign_message,
+    verify_signatures_batch,
+)
+from users.models import CustomUser
+
+
+def create_user(username, algorithm=ED25519):
+    user = CustomUser.objects.create_user(username, password="senha")
+    user.set_keys(*generate_keypair_pem(algorithm), algorithm)
+    return user
+
+
+def create_documents(user, count):
+    return [
+        Document.objects.create(
+            owner=user, title=f"Documento {index}", content=f"Conteúdo {index}"
+        )
+        for index in range(count)
+    ]
+
+
+def sign(document):
+    owner = document.owner
+    document.sign(get_cached_private_key(owner.id, owner.private_key))
+    document.save()
+    return document
+
+
+class TemporaryStorageMixin:
+    """
+    Blob store e índice de hashes em diretórios temporários, apagados ao fim
+    de cada teste.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage_dir = directory.name
+        storage = override_settings(
+            DOCUMENT_BLOB_ROOT=f"{directory.name}/blobs",
+            DOCUMENT_HASH_INDEX_DIR=f"{directory.name}/hashindex",
+            DOCUMENT_SIGNING_QUEUE=False,
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+
+@skipUnless(
+    settings.SQLITE_PRODUCTION_PROFILE,
+    "requer o perfil de produção do SQLite (SQLITE_PRODUCTION_PROFILE=1)",
+)
+class ConcurrentAccessTests(TemporaryStorageMixin, TransactionTestCase):
+    """
+    Leitores e escritores simultâneos, cada thread com a sua conexão e os
+    SQLITE_PRAGMAS de produção: nenhuma requisição pode falhar com
+    "database is locked" e nenhuma assinatura pode se perder.
+    """
+
+    databases = "__all__"
+    writers = 3
+    readers = 3
+    documents_per_writer = 15
+    reads_per_reader = 40
+
+    def test_reads_and_signatures_run_concurrently(self):
+        user = create_user("concorrente")
+        documents = create_documents(user, self.writers * self.documents_per_writer)
+        errors = []
+        lock = threading.Lock()
+
+        def run(requests):
+            client = Client()
+            client.force_login(user)
+            try:
+                for method, url, data in requests:
+                    try:
+                        response = getattr(client, method)(url, data)
+                        failed = response.status_code >= 400
+                        error = f"{url}: status {response.status_code}"
+                    except Exception as e:
+                        failed, error = True, f"{url}: {type(e).__name__}: {e}"
+                    if failed:
+                        with lock:
+                            errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = []
+        for writer in range(self.writers):
+            chunk = documents[writer :: self.writers]
+            requests = [
+                ("get", reverse("sign_document", args=[document.pk]), None)
+                for document in chunk
+            ]
+            threads.append(threading.Thread(target=run, args=(requests,)))
+        for reader in range(self.readers):
+            requests = []
+            for index in range(self.reads_per_reader):
+                document = documents[(reader * 7 + index) % len(documents)]
+                requests.append(
+                    (
+                        "get",
+                        reverse("verify_document", args=[document.pk])
+                        if index % 2
+                        else reverse("list_documents"),
+                        None,
+                    )
+                )
+            threads.append(threading.Thread(target=run, args=(requests,)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        signed = Document.objects.filter(owner=user, signature__isnull=False)
+        self.assertEqual(signed.count(), len(documents))
+        for document in signed.select_related("owner", "signing_key"):
+            self.assertTrue(document.verify_signature(), document.pk)
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    def compare(self, baseline, results):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as baseline_file:
+            json.dump({"results": baseline}, baseline_file)
+            baseline_file.flush()
+            command = benchmark.Command(stdout=io.StringIO())
+            try:
+                command.compare(baseline_file.name, results, threshold=0.2)
+            finally:
+                self.output = command.stdout.getvalue()
+
+    def test_baseline_without_queries_or_median(self):
+        self.compare(
+            {"a": {"median_ms": 0.0}, "b": {"median_ms": 1.0}},
+            {"a": {"median_ms": 0.5}, "b": {"median_ms": 1.1, "queries": 0}},
+        )
+        self.assertIn("baseline sem mediana", self.output)
+        self.assertIn("Nenhuma regressão", self.output)
+
+    def test_new_queries_are_a_regression(self):
+        with self.assertRaisesMessage(CommandError, "1 regressão"):
+            self.compare(
+                {"a": {"median_ms": 1.0}},
+                {"a": {"median_ms": 1.0, "queries": 2}},
+            )
+        self.assertIn("QUERIES 0->2", self.output)
+
+
+class VerificationStatusTests(TemporaryStorageMixin, TestCase):
+    """
+    O resultado da verificação fica salvo no documento e só é recalculado
+    quando o hash, a assinatura ou a chave que a verifica mudam.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("status")
+        self.document = sign(create_documents(self.user, 1)[0])
+        self.client.force_login(self.user)
+
+    def load(self):
+        return Document.objects.select_related("owner", "signing_key").get(
+            pk=self.document.pk
+        )
+
+    def test_status_is_persisted_and_reused(self):
+        self.assertIsNone(self.load().verified)
+        self.assertTrue(self.load().verified_signature())
+        document = self.load()
+        self.assertTrue(document.verified)
+        self.assertEqual(document.verified_hash, document.hash)
+
+        with mock.patch.object(Document, "verify_signature") as verify:
+            self.assertTrue(self.load().verified_signature())
+            self.client.get(reverse("list_documents"))
+        verify.assert_not_called()
+
+    def test_edit_invalidates_status(self):
+        self.client.get(reverse("list_documents"))
+        self.assertTrue(self.load().verified)
+
+        response = self.client.post(
+            reverse("edit_document", args=[self.document.pk]),
+            {"title": "Editado", "content": "Conteúdo alterado"},
+        )
+        self.assertRedirects(
+            response, reverse("list_documents"), fetch_redirect_response=False
+        )
+        document = self.load()
+        self.assertIsNone(document.verified)
+        self.assertIsNone(document.verified_hash)
+
+        # A assinatura antiga não cobre o conteúdo novo.
+        response = self.client.get(reverse("list_documents"))
+        self.assertFalse(response.context["documents"][0].verified)
+        self.assertIs(self.load().verified, False)
+
+    def test_stale_result_is_not_written(self):
+        document = self.load()
+        queryset, values = document.record_verification(True, "chave")
+        edited = self.load()
+        edited.content = "Editado enquanto verificava"
+        edited.save()
+        self.assertEqual(queryset.update(**values), 0)
+        self.assertIsNone(self.load().verified)
+
+
+class BatchVerificationTests(TemporaryStorageMixin, TestCase):
+    """
+    verify_signatures_batch e audit_signatures dão o mesmo resultado que
+    Document.verify_signature(), documento a documento.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.documents = [
+            sign(document)
+            for document in create_documents(create_user("ed"), 2)
+            + create_documents(create_user("rsa", RSA_2048), 2)
+        ]
+        tampered_signature, tampered_hash = self.documents[1], self.documents[3]
+        Document.objects.filter(pk=tampered_signature.pk).update(signature=bytes(64))
+        Document.objects.filter(pk=tampered_hash.pk).update(hash="0" * 64)
+        self.failed = {tampered_signature.pk, tampered_hash.pk}
+
+    def load(self):
+        return list(
+            Document.objects.select_related("owner", "signing_key").order_by("id")
+        )
+
+    def test_batch_matches_single_verification(self):
+        documents = self.load()
+        expected = [document.pk not in self.failed for document in documents]
+        self.assertEqual(
+            [document.verify_signature() for document in documents], expected
+        )
+        results = verify_signatures_batch(
+            (document.verification_item() for document in documents),
+            max_workers=2,
+        )
+        self.assertEqual(results, expected)
+
+    def test_audit_command(self):
+        out = io.StringIO()
+        call_command("audit_signatures", chunk_size=3, workers=2, stdout=out)
+        lines = out.getvalue().splitlines()
+        failures = [line.split("\t")[1] for line in lines if line.startswith("FALHA")]
+        self.assertEqual(sorted(failures), sorted(map(str, self.failed)))
+        self.assertIn("4 documentos verificados", lines[-1])
+        self.assertTrue(lines[-1].endswith("2 falhas."))
+
+        out = io.StringIO()
+        call_command("audit_signatures", owner="ed", stdout=out)
+        self.assertIn("2 documentos verificados", out.getvalue())
+        self.assertIn(f"FALHA\t{self.documents[1].pk}\t", out.getvalue())
+
+
+class DocumentCountTests(TemporaryStorageMixin, TestCase):
+    """
+    O total da listagem é contado a cada página (limitado por
+    DOCUMENT_COUNT_LIMIT), então reflete criações e exclusões feitas em
+    qualquer processo.
+    """
+
+    def test_count_follows_creates_and_deletes(self):
+        user = create_user("conta")
+        other = create_user("outro")
+        documents = create_documents(user, 2)
+        create_documents(other, 1)
+        self.assertEqual(Document.objects.owner_count(user.pk), 2)
+
+        Document.objects.bulk_create(
+            [Document(owner=user, title="Lote", content="Em lote")]
+        )
+        self.assertEqual(Document.objects.owner_count(user.pk), 3)
+
+        # Exclusões que não passam pelos sinais (como as de outro processo
+        # ou um delete() em massa) também aparecem.
+        Document.objects.filter(pk=documents[0].pk).delete()
+        self.assertEqual(Document.objects.owner_count(user.pk), 2)
+        self.assertEqual(Document.objects.owner_count(other.pk), 1)
+
+    @override_settings(DOCUMENT_COUNT_LIMIT=2)
+    def test_count_is_bounded(self):
+        user = create_user("muitos")
+        create_documents(user, 4)
+        self.assertEqual(Document.objects.owner_count(user.pk), 3)
+
+        self.client.force_login(user)
+        response = self.client.get(reverse("list_documents"))
+        self.assertContains(response, "Você possui mais de 2 documentos")
+
+        Document.objects.filter(owner=user).last().delete()
+        Document.objects.filter(owner=user).last().delete()
+        response = self.client.get(reverse("list_documents"))
+        self.assertContains(response, "Você possui 2 documentos")
+
+
+class DocumentPaginationTests(TemporaryStorageMixin, TestCase):
+    """
+    A listagem pagina por cursor (`after` é o último id da página anterior).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("pagina")
+        self.documents = create_documents(self.user, 5)
+        create_documents(create_user("outro"), 3)
+        self.client.force_login(self.user)
+
+    def list_page(self, **params):
+        response = self.client.get(reverse("list_documents"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def test_pages_follow_the_cursor(self):
+        ids = [document.id for document in self.documents]
+        seen = []
+        cursor = 0
+        while cursor is not None:
+            context = self.list_page(after=cursor, page_size=2)
+            seen.extend(document.id for document in context["documents"])
+            cursor = context["next_cursor"]
+        self.assertEqual(seen, ids)
+
+        context = self.list_page(after=ids[1], page_size=2)
+        self.assertEqual([d.id for d in context["documents"]], ids[2:4])
+        self.assertEqual(context["next_cursor"], ids[3])
+
+    def test_last_page_has_no_next_cursor(self):
+        context = self.list_page(page_size=5)
+        self.assertEqual(len(context["documents"]), 5)
+        self.assertIsNone(context["next_cursor"])
+
+    def test_invalid_parameters(self):
+        context = self.list_page(after="x", page_size="y")
+        self.assertEqual(context["cursor"], 0)
+        self.assertEqual(context["page_size"], settings.DOCUMENTS_PAGE_SIZE)
+        self.assertEqual(len(context["documents"]), 5)
+
+        context = self.list_page(after=-3, page_size=0)
+        self.assertEqual(context["cursor"], 0)
+        self.assertEqual(context["page_size"], 1)
+
+        context = self.list_page(page_size=10**6)
+        self.assertEqual(context["page_size"], settings.DOCUMENTS_MAX_PAGE_SIZE)
+
+
+class ContentBlobTests(TemporaryStorageMixin, TestCase):
+    """
+    Documentos com o mesmo conteúdo dividem um blob; gc_blobs remove os
+    blobs sem referências e os arquivos sem linha no banco.
+    """
+
+    def refcount(self, digest):
+        return ContentBlob.objects.get(pk=digest).refcount
+
+    def make_old(self, path):
+        old = time.time() - 2 * settings.DOCUMENT_BLOB_ORPHAN_GRACE
+        os.utime(path, (old, old))
+
+    def test_refcount_follows_documents(self):
+        user = create_user("blobs")
+        first = Document.objects.create(owner=user, title="A", content="Igual")
+        second = Document.objects.create(owner=user, title="B", content="Igual")
+        digest = first.blob_id
+        self.assertEqual(second.blob_id, digest)
+        self.assertEqual(self.refcount(digest), 2)
+
+        second.content = "Outro"
+        second.save()
+        self.assertEqual(self.refcount(digest), 1)
+        self.assertEqual(self.refcount(second.blob_id), 1)
+
+        first.delete()
+        self.assertEqual(self.refcount(digest), 0)
+        self.assertEqual(ContentBlob.objects.collect_garbage(), 1)
+        self.assertFalse(ContentBlob.objects.filter(pk=digest).exists())
+        self.assertFalse(get_blob_store().exists(digest))
+        self.assertTrue(get_blob_store().exists(second.blob_id))
+
+    def test_rolled_back_blob_file_is_collected(self):
+        user = create_user("desfeito")
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                document = Document.objects.create(
+                    owner=user, title="Desfeito", content="Nunca confirmado"
+                )
+                raise RuntimeError
+        store = get_blob_store()
+        path = store.path(document.blob_id)
+        self.assertTrue(path.exists())
+        self.assertFalse(ContentBlob.objects.filter(pk=document.blob_id).exists())
+        kept = create_documents(user, 1)[0]
+        temporary = path.parent / ".tmp-interrompido"
+        temporary.write_bytes(b"pela metade")
+
+        # Arquivos recentes podem ser de uma transação em andamento.
+        grace = settings.DOCUMENT_BLOB_ORPHAN_GRACE
+        self.assertEqual(ContentBlob.objects.collect_orphan_files(grace), 0)
+        self.assertTrue(path.exists())
+
+        for blob_file in store.files():
+            self.make_old(blob_file)
+        out = io.StringIO()
+        call_command("gc_blobs", stdout=out)
+        self.assertIn("2 arquivos órfãos removidos", out.getvalue())
+        self.assertFalse(path.exists())
+        self.assertFalse(temporary.exists())
+        self.assertEqual(Document.objects.get(pk=kept.pk).content, "Conteúdo 0")
+
+
+class BulkVerifyHashTests(TemporaryStorageMixin, TestCase):
+    def verify(self, hashes, **files):
+        response = self.client.post(
+            reverse("verify_hash_bulk"), {"hashes": hashes, **files}
+        )
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        content = b"".join(response.streaming_content).decode()
+        return content.splitlines()
+
+    def test_found_and_owner(self):
+        owner = create_user("dono")
+        signed = sign(create_documents(owner, 1)[0])
+        unknown = "0" * 64
+        self.client.force_login(create_user("outro"))
+
+        rows = self.verify(f"{signed.hash.upper()}\n{unknown}")
+        self.assertEqual(
+            rows,
+            [
+                "hash,valido,encontrado,dono",
+                f"{signed.hash},1,1,0",
+                f"{unknown},1,0,0",
+            ],
+        )
+        self.client.force_login(owner)
+        self.assertEqual(self.verify(signed.hash)[1], f"{signed.hash},1,1,1")
+
+    def test_malformed_rows_are_invalid_and_escaped(self):
+        hashes = ["=HYPERLINK(1)", "+1", "-1", "@SUM(A1)", "abc", "g" * 64]
+        with mock.patch.object(
+            Document.objects, "filter", wraps=Document.objects.filter
+        ) as lookup:
+            rows = self.verify("\n".join(hashes))
+        self.assertEqual(
+            rows[1:],
+            [
+                "'=hyperlink(1),0,0,0",
+                "'+1,0,0,0",
+                "'-1,0,0,0",
+                "'@sum(a1),0,0,0",
+                "abc,0,0,0",
+                f"{'g' * 64},0,0,0",
+            ],
+        )
+        # Nenhum hash inválido chega à consulta.
+        for call in lookup.call_args_list:
+            self.assertNotIn("abc", str(call))
+
+
+class VerifyFileViewTests(TemporaryStorageMixin, TestCase):
+    """
+    O arquivo enviado é só hasheado pelo SHA256UploadHandler, e o CSRF é
+    verificado em post() (depois de o handler ser instalado).
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("arquivo")
+        self.document = sign(create_documents(self.user, 1)[0])
+
+    def upload(self, content, client=None, **data):
+        document_file = SimpleUploadedFile("documento.txt", content.encode())
+        return (client or self.client).post(
+            reverse("verify_file"), {"document_file": document_file, **data}
+        )
+
+    def test_upload_is_hashed_and_matched(self):
+        self.client.force_login(self.user)
+        response = self.upload("Conteúdo 0", verify_signature="1")
+        upload = response.context["upload"]
+        self.assertIsInstance(upload, HashedUpload)
+        self.assertEqual(upload.hash, generate_hash("Conteúdo 0"))
+        self.assertEqual(upload.size, len("Conteúdo 0".encode()))
+        self.assertEqual(response.context["document"], self.document)
+        self.assertTrue(response.context["is_user_owner"])
+        self.assertTrue(response.context["is_valid_signature"])
+
+        response = self.upload("Outro conteúdo")
+        self.assertIsNone(response.context["document"])
+        self.assertIsNone(response.context["is_valid_signature"])
+
+    def test_missing_file(self):
+        response = self.client.post(reverse("verify_file"))
+        self.assertContains(response, "Selecione um arquivo.")
+
+    def test_csrf_is_checked_on_post(self):
+        client = Client(enforce_csrf_checks=True)
+        self.assertEqual(self.upload("Conteúdo 0", client).status_code, 403)
+
+        client.get(reverse("verify_file"))
+        token = client.cookies[settings.CSRF_COOKIE_NAME].value
+        response = self.upload("Conteúdo 0", client, csrfmiddlewaretoken=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["document"], self.document)
+
+
+class AsyncViewTests(TemporaryStorageMixin, TestCase):
+    """
+    As views assíncronas dão o mesmo resultado das síncronas, com a
+    criptografia rodando no executor.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("assincrono")
+        self.signed, self.unsigned = create_documents(self.user, 2)
+        sign(self.signed)
+
+    def load(self, document):
+        return Document.objects.select_related("owner", "signing_key").get(
+            pk=document.pk
+        )
+
+    def test_login_required(self):
+        for url in (
+            reverse("async_list_documents"),
+            reverse("async_sign_document", args=[self.unsigned.pk]),
+        ):
+            response = self.client.get(url)
+            self.assertRedirects(
+                response,
+                f"{settings.LOGIN_URL}?next={url}",
+                fetch_redirect_response=False,
+            )
+        self.assertIsNone(self.load(self.unsigned).signature)
+
+    def test_list(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("async_list_documents"))
+        verified = {d.pk: d.verified for d in response.context["documents"]}
+        self.assertEqual(verified, {self.signed.pk: True, self.unsigned.pk: False})
+        self.assertEqual(response.context["document_count"], 2)
+        self.assertTrue(self.load(self.signed).verified)
+
+    def test_sign(self):
+        url = reverse("async_sign_document", args=[self.unsigned.pk])
+        self.client.force_login(create_user("intruso"))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertIsNone(self.load(self.unsigned).signature)
+
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertRedirects(
+            response, reverse("list_documents"), fetch_redirect_response=False
+        )
+        document = self.load(self.unsigned)
+        self.assertTrue(document.verify_signature())
+        self.assertEqual(find_document(Document.objects.all(), document.hash), document)
+
+    def test_sign_without_key(self):
+        user = CustomUser.objects.create_user("sem_chave", password="senha")
+        document = create_documents(user, 1)[0]
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse("async_sign_document", args=[document.pk]), follow=True
+        )
+        self.assertContains(response, "Não foi possível carregar a chave")
+        self.assertIsNone(self.load(document).signature)
+
+    def test_verify_signature_and_hash(self):
+        response = self.client.get(
+            reverse("async_verify_document", args=[self.signed.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content,
+            self.client.get(reverse("verify_document", args=[self.signed.pk])).content,
+        )
+
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("async_verify_hash"), {"hash_code": self.signed.hash}
+        )
+        self.assertEqual(response.context["document"], self.signed)
+        self.assertTrue(response.context["is_user_owner"])
+        response = self.client.post(
+            reverse("async_verify_hash"), {"hash_code": "0" * 64}
+        )
+        self.assertFalse(response.context["is_valid_hash"])
+
+
+class ExportResumeTests(TemporaryStorageMixin, TestCase):
+    """
+    Um pacote JSONL interrompido é retomado a partir da última linha
+    completa, e o resultado é igual ao de uma exportação sem interrupção.
+    """
+
+    def export(self, path, **options):
+        call_command("export_documents", output=path, stderr=io.StringIO(), **options)
+        with open(path, "rb") as bundle_file:
+            return bundle_file.read()
+
+    @mock.patch.object(export_documents, "TAIL_BLOCK_SIZE", 4)
+    def test_last_complete_line(self):
+        cases = [
+            (b"a\nbb\nccc", (b"bb", 5)),
+            (b"a\nbb\n", (b"bb", 5)),
+            (b"abc\n", (b"abc", 4)),
+            (b"primeira linha longa\nx", (b"primeira linha longa", 21)),
+            (b"abc", (None, 0)),
+            (b"", (None, 0)),
+        ]
+        for data, expected in cases:
+            with self.subTest(data=data):
+                self.assertEqual(
+                    export_documents.last_complete_line(io.BytesIO(data)), expected
+                )
+
+    def test_resume_after_interruption(self):
+        user = create_user("exporta")
+        for document in create_documents(user, 3):
+            sign(document)
+        complete = self.export(f"{self.storage_dir}/completo.jsonl")
+        lines = complete.splitlines(keepends=True)
+        self.assertEqual(len(lines), 4)
+
+        # Interrompido no meio do segundo documento.
+        path = f"{self.storage_dir}/interrompido.jsonl"
+        with open(path, "wb") as bundle_file:
+            bundle_file.write(lines[0] + lines[1][:10])
+        self.assertEqual(self.export(path, resume=True), complete)
+
+        # Um pacote completo não é alterado.
+        err = io.StringIO()
+        call_command("export_documents", output=path, resume=True, stderr=err)
+        self.assertIn("já está completo", err.getvalue())
+        with open(path, "rb") as bundle_file:
+            self.assertEqual(bundle_file.read(), complete)
+
+    def test_resume_requires_jsonl_output(self):
+        with self.assertRaises(CommandError):
+            call_command("export_documents", resume=True)
+
+
+class ConditionalGetTests(TemporaryStorageMixin, TestCase):
+    """
+    As páginas de um documento respondem 304 quando o cliente já tem a
+    versão atual (ETag ou Last-Modified), sem verificar a assinatura.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("condicional")
+        self.document = sign(create_documents(self.user, 1)[0])
+        self.client.force_login(self.user)
+
+    def assertNotModified(self, url, **headers):
+        with mock.patch.object(Document, "verify_signature") as verify:
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        verify.assert_not_called()
+        return response
+
+    def test_etag_and_last_modified(self):
+        for name in ("view_document", "verify_document", "async_verify_document"):
+            url = reverse(name, args=[self.document.pk])
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("private", response["Cache-Control"])
+                self.assertIn("no-cache", response["Cache-Control"])
+                etag = response["ETag"]
+
+                response = self.assertNotModified(url, if_none_match=etag)
+                self.assertEqual(response["ETag"], etag)
+                self.assertNotModified(
+                    url, if_modified_since=response["Last-Modified"]
+                )
+                response = self.client.get(url, headers={"if_none_match": '"outro"'})
+                self.assertEqual(response.status_code, 200)
+
+    def test_changes_produce_a_new_etag(self):
+        detail = reverse("view_document", args=[self.document.pk])
+        verify = reverse("verify_document", args=[self.document.pk])
+        detail_etag = self.client.get(detail)["ETag"]
+        verify_etag = self.client.get(verify)["ETag"]
+
+        # O título só aparece na página do documento.
+        Document.objects.filter(pk=self.document.pk).update(title="Novo título")
+        response = self.client.get(detail, headers={"if_none_match": detail_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotModified(verify, if_none_match=verify_etag)
+
+        self.document.content = "Outro conteúdo"
+        self.document.save()
+        sign(self.document)
+        response = self.client.get(verify, headers={"if_none_match": verify_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], verify_etag)
+
+    def test_hash_lookup_varies_by_user(self):
+        url = f"{reverse('verify_hash')}?hash_code={self.document.hash}"
+        response = self.client.get(url)
+        self.assertTrue(response.context["is_user_owner"])
+        etag = response["ETag"]
+        self.assertNotModified(url, if_none_match=etag)
+
+        self.client.force_login(create_user("outro"))
+        response = self.client.get(url, headers={"if_none_match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["is_user_owner"])
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class SearchTests(TemporaryStorageMixin, TestCase):
+    """
+    Busca FTS5: ranking com peso maior para o título, prefixos, filtro por
+    dono e índice mantido pelos sinais de Document.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("busca")
+        self.in_content = Document.objects.create(
+            owner=self.user, title="Notas", content="Rascunho do relatório mensal"
+        )
+        self.in_title = Document.objects.create(
+            owner=self.user, title="Relatório anual", content="Resultados do ano"
+        )
+        Document.objects.create(
+            owner=create_user("outro"), title="Relatório", content="Relatório"
+        )
+
+    def ids(self, text, limit=10, offset=0):
+        return [
+            document_id
+            for document_id, _ in search(self.user, text, limit, offset=offset)
+        ]
+
+    def test_title_matches_rank_first_and_owner_is_filtered(self):
+        self.assertEqual(self.ids("relatório"), [self.in_title.pk, self.in_content.pk])
+        self.assertEqual(self.ids("relatório", 1, offset=1), [self.in_content.pk])
+        self.assertEqual(self.ids("relatório mensal"), [self.in_content.pk])
+        # O token do dono não é um termo pesquisável.
+        self.assertEqual(self.ids(f"o{self.user.pk}"), [])
+
+    def test_prefix(self):
+        self.assertEqual(self.ids("relat"), [])
+        self.assertEqual(len(self.ids("relat*")), 2)
+        self.assertEqual(self.ids("result*"), [self.in_title.pk])
+
+    def test_fts_syntax_is_not_exposed(self):
+        for text in ('"', "OR", "notas OR", "title:notas", "NEAR(a b)", "*"):
+            with self.subTest(text=text):
+                search(self.user, text, 10)
+        self.assertEqual(self.ids("title:notas"), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.in_title.title = "Balanço"
+        self.in_title.save()
+        self.assertEqual(self.ids("balanço"), [self.in_title.pk])
+        self.assertEqual(self.ids("anual"), [])
+
+        self.in_content.content = "Texto novo"
+        self.in_content.save()
+        self.assertEqual(self.ids("mensal"), [])
+        self.assertEqual(self.ids("novo"), [self.in_content.pk])
+
+        self.in_content.delete()
+        self.assertEqual(self.ids("novo"), [])
+
+        [created] = Document.objects.bulk_create(
+            [Document(owner=self.user, title="Em lote", content="Importado")]
+        )
+        self.assertEqual(self.ids("importado"), [created.pk])
+
+    def test_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("search_documents"), {"q": "relatório"})
+        titles = [document.title for document, _ in response.context["results"]]
+        self.assertEqual(titles, ["Relatório anual", "Notas"])
+        self.assertIsNone(response.context["next_page"])
+
+
+class VerifyBundleTests(TemporaryStorageMixin, TestCase):
+    """
+    O verificador offline aceita a chave embutida em cada registro, a menos
+    que as chaves confiáveis sejam fixadas com --trusted-keys.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.alice = create_user("alice")
+        self.mallory = create_user("mallory")
+        sign(create_documents(self.alice, 1)[0])
+        sign(create_documents(self.mallory, 1)[0])
+        self.bundle = f"{self.storage_dir}/documentos.jsonl"
+        call_command("export_documents", output=self.bundle, stderr=io.StringIO())
+
+    def run_verifier(self, *fingerprints):
+        args = [self.bundle, "--workers", "1"]
+        if fingerprints:
+            trusted = f"{self.storage_dir}/chaves.txt"
+            with open(trusted, "w") as trusted_file:
+                trusted_file.write("# chaves da equipe\n")
+                trusted_file.writelines(f"{f.upper()}\n" for f in fingerprints)
+            args += ["--trusted-keys", trusted]
+        out = io.StringIO()
+        with redirect_stdout(out):
+            status = verify_bundle.main(args)
+        return status, out.getvalue()
+
+    def test_unpinned_keys_are_flagged(self):
+        status, output = self.run_verifier()
+        self.assertEqual(status, 0)
+        self.assertIn("2 verificados", output)
+        self.assertIn("chaves não fixadas", output)
+
+    def test_pinned_keys(self):
+        status, output = self.run_verifier(self.alice.signing_key.fingerprint)
+        self.assertEqual(status, 1)
+        self.assertIn("1 verificados", output)
+        self.assertIn("1 com chave não confiável", output)
+        self.assertIn("untrusted", output)
+        self.assertNotIn("chaves não fixadas", output)
+
+        status, output = self.run_verifier(
+            self.alice.signing_key.fingerprint, self.mallory.signing_key.fingerprint
+        )
+        self.assertEqual(status, 0)
+        self.assertIn("2 verificados", output)
+
+    def test_invalid_trusted_keys_file(self):
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            self.run_verifier("nao-e-hex")
+
+
+class SignDocumentViewTests(TemporaryStorageMixin, TestCase):
+    def test_sign(self):
+        user = create_user("assina")
+        document = create_documents(user, 1)[0]
+        self.client.force_login(user)
+        response = self.client.get(reverse("sign_document", args=[document.pk]))
+        self.assertRedirects(response, reverse("list_documents"))
+        document = Document.objects.select_related("owner", "signing_key").get(
+            pk=document.pk
+        )
+        self.assertTrue(document.verify_signature())
+
+    def test_owner_without_key(self):
+        user = CustomUser.objects.create_user("sem_chave", password="senha")
+        document = create_documents(user, 1)[0]
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse("sign_document", args=[document.pk]), follow=True
+        )
+        self.assertRedirects(response, reverse("list_documents"))
+        self.assertContains(response, "Não foi possível carregar a chave")
+        self.assertIsNone(Document.objects.get(pk=document.pk).signature)
+
+
+class MerkleSignatureTests(TemporaryStorageMixin, TestCase):
+    """
+    Assinaturas em lote: cada documento é verificado pela sua prova de
+    inclusão e pela assinatura da raiz.
+    """
+
+    def sign_batch(self, documents):
+        owner = documents[0].owner
+        private_key = get_cached_private_key(owner.id, owner.private_key)
+        digests = [document.content_digest() for document in documents]
+        root, paths, signature = sign_merkle_batch(digests, private_key)
+        for index, (document, digest) in enumerate(zip(documents, digests)):
+            document.hash = digest.hex()
+            document.signing_key_id = owner.signing_key_id
+            document.set_merkle_signature(
+                root, index, paths[index], signature, key_algorithm(private_key)
+            )
+            document.save()
+        return root, paths
+
+    def test_every_leaf_proves_the_root(self):
+        for size in range(1, 10):
+            digests = [generate_hash(str(index)) for index in range(size)]
+            digests = [bytes.fromhex(digest) for digest in digests]
+            root, paths = merkle_tree(digests)
+            for digest, path in zip(digests, paths):
+                self.assertEqual(merkle_root_from_proof(digest, path), root, size)
+
+    def test_batch_signatures_verify(self):
+        user = create_user("merkle")
+        documents = create_documents(user, 5)
+        self.sign_batch(documents)
+        for document in Document.objects.filter(owner=user):
+            self.assertEqual(document.signature_scheme, SignatureScheme.MERKLE)
+            self.assertTrue(document.verify_signature(), document.pk)
+
+    def test_tampered_leaf_fails(self):
+        user = create_user("adulterado")
+        documents = create_documents(user, 5)
+        root, paths = self.sign_batch(documents)
+
+        # Outro conteúdo com a prova do documento 2 não chega à raiz.
+        tampered = bytes.fromhex(generate_hash("adulterado"))
+        self.assertNotEqual(merkle_root_from_proof(tampered, paths[2]), root)
+
+        # Nem com o hash guardado atualizado junto com o conteúdo.
+        document = Document.objects.get(pk=documents[2].pk)
+        document.content = "adulterado"
+        document.hash = tampered.hex()
+        document.save()
+        self.assertFalse(Document.objects.get(pk=document.pk).verify_signature())
+
+        # Uma prova com um irmão trocado também falha.
+        document = Document.objects.get(pk=documents[3].pk)
+        side, sibling = document.merkle_path[0]
+        document.merkle_path[0] = [side, tampered.hex()]
+        self.assertFalse(document.verify_signature())
+
+        # Os demais documentos do lote continuam válidos.
+        for other in (documents[0], documents[1], documents[4]):
+            self.assertTrue(Document.objects.get(pk=other.pk).verify_signature())
+
+
+class SignDocumentsTests(TemporaryStorageMixin, TestCase):
+    def test_documents_of_owners_without_keys_are_skipped(self):
+        signer = create_user("com_chave")
+        create_documents(signer, 3)
+        create_documents(CustomUser.objects.create_user("sem_chave"), 2)
+
+        result = sign_documents(workers=1, batch_size=2)
+
+        self.assertEqual(
+            result, {"signed": 3, "skipped": 2, "changed": 0, "total": 3}
+        )
+        for document in Document.objects.filter(owner=signer).select_related(
+            "owner", "signing_key"
+        ):
+            self.assertTrue(document.verify_signature(), document.pk)
+        self.assertEqual(sign_documents(workers=1)["skipped"], 2)
+
+    def test_document_edited_while_signing_is_not_written(self):
+        user = create_user("editado")
+        documents = create_documents(user, 3)
+        edited = documents[1]
+        lock_unchanged = signing.lock_unchanged
+
+        def edit_then_lock(*args):
+            # Edição gravada entre a leitura do lote e a gravação.
+            document = Document.objects.get(pk=edited.pk)
+            document.content = "Editado durante a assinatura"
+            document.save()
+            return lock_unchanged(*args)
+
+        with mock.patch.object(signing, "lock_unchanged", edit_then_lock):
+            result = sign_documents(workers=1)
+
+        self.assertEqual((result["signed"], result["changed"]), (2, 1))
+        self.assertIsNone(Document.objects.get(pk=edited.pk).signature)
+
+        self.assertEqual(sign_documents(workers=1)["signed"], 1)
+        for document in Document.objects.filter(owner=user).select_related(
+            "owner", "signing_key"
+        ):
+            self.assertTrue(document.verify_signature(), document.pk)
+
+
+class SigningQueueTests(TemporaryStorageMixin, TestCase):
+    def test_document_edited_while_signing_is_requeued(self):
+        user = create_user("fila")
+        documents = create_documents(user, 3)
+        jobs = [enqueue_signing(document) for document in documents]
+        claimed = claim_jobs(10)
+        self.assertEqual(len(claimed), 3)
+
+        # Editado depois de o worker ler o lote.
+        edited = Document.objects.get(pk=documents[1].pk)
+        edited.content = "Editado durante a assinatura"
+        edited.save()
+
+        result = process_jobs(claimed)
+        self.assertEqual((result["done"], result["requeued"]), (2, 1))
+        self.assertIsNone(Document.objects.get(pk=edited.pk).signature)
+        jobs[1].refresh_from_db()
+        self.assertEqual(jobs[1].status, SigningJobStatus.PENDING)
+        self.assertEqual(jobs[1].claim, "")
+
+        result = process_jobs(claim_jobs(10))
+        self.assertEqual((result["done"], result["requeued"]), (1, 0))
+        for document in Document.objects.filter(owner=user).select_related(
+            "owner", "signing_key"
+        ):
+            self.assertTrue(document.verify_signature(), document.pk)
+        self.assertEqual(
+            Document.objects.get(pk=edited.pk).content, "Editado durante a assinatura"
+        )
+
+
+class SignatureSchemeMigrationTests(TemporaryStorageMixin, TransactionTestCase):
+    """
+    Documentos assinados antes da migração 0007 (conteúdo + hash) continuam
+    verificáveis como LEGACY; os novos são assinados como DIGEST.
+    """
+
+    before = [
+        ("documents", "0006_document_content_preview"),
+        ("users", "0003_alter_customuser_private_key_and_more"),
+    ]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def latest(self):
+        return MigrationExecutor(connection).loader.graph.leaf_nodes()
+
+    def test_legacy_and_digest_signatures(self):
+        self.addCleanup(self.migrate, self.latest())
+        apps = self.migrate(self.before)
+        OldUser = apps.get_model("users", "CustomUser")
+        OldDocument = apps.get_model("documents", "Document")
+        private_pem, public_pem = generate_keypair_pem(RSA_2048)
+        private_key = load_private_key_from_pem(private_pem)
+        owner = OldUser.objects.create(
+            username="legado", private_key=private_pem, public_key=public_pem
+        )
+        content = "Assinado antes da migração"
+        hash = generate_hash(content)
+        legacy = OldDocument.objects.create(
+            owner=owner,
+            title="Legado",
+            content=content,
+            hash=hash,
+            signature=sign_message(content + hash, private_key),
+        )
+        self.migrate(self.latest())
+
+        document = Document.objects.select_related("owner", "signing_key").get(
+            pk=legacy.pk
+        )
+        self.assertEqual(document.signature_scheme, SignatureScheme.LEGACY)
+        self.assertEqual(document.content, content)
+        self.assertIsNotNone(document.signing_key_id)
+        self.assertTrue(document.verify_signature())
+
+        document.content = "Alterado depois"
+        document.save()
+        self.assertFalse(Document.objects.get(pk=legacy.pk).verify_signature())
+
+        sign(Document.objects.get(pk=legacy.pk))
+        document = Document.objects.get(pk=legacy.pk)
+        self.assertEqual(document.signature_scheme, SignatureScheme.DIGEST)
+        self.assertEqual(document.hash, generate_hash("Alterado depois"))
+        self.assertTrue(document.verify_signature())
+
+
+@override_settings(DOCUMENT_CHUNKED_HASH_MIN_SIZE=256, DOCUMENT_CHUNK_SIZE=64)
+class ChunkedHashTests(TemporaryStorageMixin, TestCase):
+    """
+    Os hashes por trechos atualizados incrementalmente numa edição são os
+    mesmos de um cálculo completo.
+    """
+
+    content = "".join(f"linha {index:04d}\n" for index in range(100))
+
+    def assertRehashMatches(self, edited):
+        user = create_user("trechos")
+        document = sign(
+            Document.objects.create(owner=user, title="Grande", content=self.content)
+        )
+        document.content = edited
+        document.save()
+
+        full, _ = chunk_digests(edited.encode("utf-8"), 64)
+        document = Document.objects.get(pk=document.pk)
+        self.assertEqual(document.chunk_size, 64)
+        self.assertEqual(bytes(document.chunk_digests), full)
+        self.assertEqual(
+            document.content_digest(), document.content_digest(recompute=True)
+        )
+        sign(document)
+        self.assertTrue(Document.objects.get(pk=document.pk).verify_signature())
+
+    def test_only_changed_chunks_are_rehashed(self):
+        data = self.content.encode("utf-8")
+        base_digests, rehashed = chunk_digests(data, 64)
+        self.assertEqual(rehashed, len(base_digests) // 32)
+        edited = data[:300] + b"X" + data[301:]
+        digests, rehashed = chunk_digests(edited, 64, data, base_digests)
+        self.assertEqual(digests, chunk_digests(edited, 64)[0])
+        self.assertEqual(rehashed, 1)
+
+    def test_edit_in_place(self):
+        self.assertRehashMatches(self.content[:300] + "X" + self.content[301:])
+
+    def test_insertion(self):
+        self.assertRehashMatches(self.content[:100] + "inserido" + self.content[100:])
+
+    def test_truncation(self):
+        self.assertRehashMatches(self.content[:700])
+
+    def test_signed_before_saving_hashes_chunks_once(self):
+        user = create_user("pendente")
+        document = Document(owner=user, title="Grande", content=self.content)
+        document.sign(get_cached_private_key(user.id, user.private_key))
+        with mock.patch(
+            "documents.models.chunk_digests", side_effect=chunk_digests
+        ) as hashed:
+            document.save()
+        hashed.assert_not_called()
+        document = Document.objects.get(pk=document.pk)
+        full, _ = chunk_digests(self.content.encode("utf-8"), 64)
+        self.assertEqual(bytes(document.chunk_digests), full)
+        self.assertEqual(document.file_hash, generate_hash(self.content))
+        self.assertTrue(document.verify_signature())
+
+    def test_lookup_by_file_sha256(self):
+        user = create_user("sha256sum")
+        document = sign(
+            Document.objects.create(owner=user, title="Grande", content=self.content)
+        )
+        # O hash assinado é a raiz dos trechos; o do arquivo fica em file_hash.
+        file_hash = generate_hash(self.content)
+        self.assertNotEqual(document.hash, file_hash)
+        self.assertEqual(document.file_hash, file_hash)
+
+        documents = Document.objects.all()
+        self.assertEqual(find_document(documents, file_hash), document)
+        self.assertEqual(find_document(documents, document.hash), document)
+        index = get_hash_index()
+        index.append(signature_entries([document]))
+        index.compact()
+        self.assertEqual(index.lookup(bytes.fromhex(file_hash))[0], document.pk)
+        self.assertEqual(find_document(documents, file_hash), document)
+
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("verify_hash_bulk"),
+            {"hashes": f"{file_hash}\n{generate_hash('outro')}"},
+        )
+        self.assertEqual(
+            b"".join(response.streaming_content).decode().splitlines(),
+            [
+                "hash,valido,encontrado,dono",
+                f"{file_hash},1,1,1",
+                f"{generate_hash('outro')},1,0,0",
+            ],
+        )
+
+        # Editado sem reassinar: o arquivo novo não foi assinado.
+        document.content = self.content + "fim\n"
+        document.save()
+        self.assertIsNone(find_document(documents, generate_hash(document.content)))
+        index.close()
+
+
+class HashIndexTests(TemporaryStorageMixin, TestCase):
+    """
+    Consultas ao índice de hashes antes e depois da compactação do log.
+    """
+
+    def digest(self, value):
+        return bytes.fromhex(generate_hash(value))
+
+    def test_lookup_and_compact(self):
+        index = HashIndex(f"{self.storage_dir}/index")
+        index.append(
+            [
+                (self.digest("a").hex(), 1, 10),
+                (self.digest("b").hex(), 2, 10),
+                # Hash repetido: vale o menor id.
+                (self.digest("a").hex(), 3, 11),
+            ]
+        )
+        self.assertFalse(index.available)
+        self.assertEqual(index.lookup(self.digest("a")), (1, 10))
+        self.assertEqual(index.lookup(self.digest("b")), (2, 10))
+        self.assertIsNone(index.lookup(self.digest("c")))
+
+        self.assertEqual(index.compact(), 2)
+        self.assertTrue(index.available)
+        self.assertFalse(index.log_path.exists())
+        self.assertFalse(index.rotated_log_path.exists())
+        self.assertEqual(len(index), 2)
+
+        # Entradas novas vão para o log e aparecem junto com o índice.
+        index.append([(self.digest("c").hex(), 4, 12)])
+        self.assertEqual(index.lookup(self.digest("a")), (1, 10))
+        self.assertEqual(index.lookup(self.digest("c")), (4, 12))
+        self.assertEqual(index.compact(), 3)
+        self.assertEqual(
+            sorted(record[1:] for record in index.iter_index()),
+            [(1, 10), (2, 10), (4, 12)],
+        )
+        # Outra instância (outro processo) lê os mesmos arquivos.
+        self.assertEqual(HashIndex(index.root).lookup(self.digest("c")), (4, 12))
+        index.close()
+
+    def test_records_sharing_a_bucket(self):
+        index = HashIndex(f"{self.storage_dir}/index")
+        # Mesmo prefixo de dois bytes: a consulta depende da busca binária.
+        digests = [b"\xab\xcd" + number.to_bytes(30, "big") for number in range(50)]
+        index.append(
+            (digest.hex(), number + 1, 10) for number, digest in enumerate(digests)
+        )
+        self.assertEqual(index.compact(), len(digests))
+        for number, digest in enumerate(digests):
+            self.assertEqual(index.lookup(digest), (number + 1, 10))
+        self.assertIsNone(index.lookup(b"\xab\xcd" + b"\xff" * 30))
+        self.assertIsNone(index.lookup(b"\xab\xcc" + b"\x00" * 30))
+        index.close()
+
+    def test_find_document(self):
+        user = create_user("indice")
+        document = sign(Document.objects.create(owner=user, title="A", content="a"))
+        documents = Document.objects.filter(owner=user)
+        index = get_hash_index()
+        index.rebuild(lambda: documents.values_list("hash", "id", "owner_id"))
+        self.assertTrue(index.available)
+
+        self.assertEqual(find_document(documents, document.hash), document)
+        self.assertIsNone(find_document(documents, generate_hash("outro")))
+        self.assertIsNone(find_document(documents, "inválido"))
+
+        # Documento reassinado depois da reconstrução: a entrada nova vem do
+        # log de assinaturas.
+        document.content = "b"
+        document.save()
+        sign(document)
+        self.assertIsNone(find_document(documents, document.hash))
+        record_signatures([(document.hash, document.id, document.owner_id)])
+        self.assertEqual(find_document(documents, generate_hash("b")), document)
+        index.close()
+
+
+class KeyRotationTests(TemporaryStorageMixin, TestCase):
+    """
+    Uma rotação interrompida continua do último lote gravado.
+    """
+
+    def test_resume_after_interruption(self):
+        user = create_user("rotacao")
+        old_key_id = user.signing_key_id
+        documents = [sign(document) for document in create_documents(user, 7)]
+        # Alterado depois de assinado: a rotação o ignora.
+        invalid = documents[0]
+        invalid.content = "Alterado"
+        invalid.save()
+        new_key = user.set_keys(*generate_keypair_pem(ED25519), ED25519)
+        rotation = start_rotation(user)
+
+        original_sign = Document.sign
+        calls = []
+
+        def tracked_sign(fail_at=None):
+            def sign(document, *args):
+                calls.append(document.pk)
+                if len(calls) == fail_at:
+                    raise RuntimeError("interrompido")
+                return original_sign(document, *args)
+
+            return sign
+
+        # Falha no primeiro documento do terceiro lote.
+        with mock.patch.object(Document, "sign", tracked_sign(fail_at=4)):
+            with self.assertRaises(RuntimeError):
+                run_rotation(rotation, batch_size=2)
+
+        # Só os dois primeiros lotes foram gravados.
+        rotation.refresh_from_db()
+        self.assertEqual(rotation.last_document_id, documents[3].pk)
+        self.assertEqual((rotation.signed, rotation.skipped), (3, 1))
+        rotated = Document.objects.filter(signing_key=new_key).order_by("id")
+        self.assertEqual(
+            list(rotated.values_list("pk", flat=True)),
+            [document.pk for document in documents[1:4]],
+        )
+
+        # A retomada começa depois do checkpoint: nem o documento ignorado é
+        # conferido de novo.
+        resumed = start_rotation(user)
+        self.assertEqual(resumed.pk, rotation.pk)
+        calls.clear()
+        with mock.patch.object(Document, "sign", tracked_sign()):
+            run_rotation(resumed, batch_size=2)
+        self.assertEqual(calls, [document.pk for document in documents[4:]])
+
+        resumed.refresh_from_db()
+        self.assertEqual((resumed.signed, resumed.skipped), (6, 1))
+        self.assertIsNotNone(resumed.finished_at)
+        self.assertEqual(rotate_batch(resumed, 2), 0)
+        self.assertEqual(
+            list(
+                Document.objects.filter(signing_key_id=old_key_id).values_list(
+                    "pk", flat=True
+                )
+            ),
+            [invalid.pk],
+        )
+        for document in rotated.select_related("owner", "signing_key"):
+            self.assertTrue(document.verify_signature(), document.pk)
@@ -0,0 +1,53 @@
+import hashlib
+import time
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class HashedUpload:
+    """
+    Resultado de um arquivo recebido pelo SHA256UploadHandler: apenas o nome,
+    o tamanho e o hash, sem o conteúdo.
+    """
+
+    def __init__(self, name, size, hash, elapsed):
+        self.name = name
+        self.size = size
+        self.hash = hash
+        self.elapsed = elapsed
+
+    @property
+    def throughput(self):
+        """Vazão do hash em MB/s."""
+        if not self.elapsed:
+            return 0.0
+        return self.size / self.elapsed / (1024 * 1024)
+
+    def close(self):
+        pass
+
+
+class SHA256UploadHandler(FileUploadHandler):
+    """
+    Calcula o SHA256 de cada arquivo enviado à medida que os pedaços chegam,
+    sem guardar o arquivo em memória nem em disco.
+    """
+
+    chunk_size = 256 * 1024
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.hashing_time = 0.0
+
+    def receive_data_chunk(self, raw_data, start):
+        started = time.perf_counter()
+        self.sha256.update(raw_data)
+        self.hashing_time += time.perf_counter() - started
+        # Não repassa os dados para os próximos handlers.
+        return None
+
+    def file_complete(self, file_size):
+        return HashedUpload(
+            self.file_name, file_size, self.sha256.hexdigest(), self.hashing_time
+        )
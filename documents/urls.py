@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path("create/", views.DocumentCreateView.as_view(), name="create_document"),
@@ -14,4 +14,32 @@ urlpatterns = [
         "verify/<int:pk>/", views.VerifySignatureView.as_view(), name="verify_document"
     ),
     path("verify/hash/", views.VerifyHashView.as_view(), name="verify_hash"),
+    path("verify/file/", views.VerifyFileView.as_view(), name="verify_file"),
+    path(
+        "verify/hash/bulk/",
+        views.BulkVerifyHashView.as_view(),
+        name="verify_hash_bulk",
+    ),
+    path("search/", views.SearchDocumentsView.as_view(), name="search_documents"),
+    path("export/", views.ExportDocumentsView.as_view(), name="export_documents"),
+    path(
+        "async/list/",
+        async_views.AsyncDocumentListView.as_view(),
+        name="async_list_documents",
+    ),
+    path(
+        "async/sign/<int:pk>/",
+        async_views.AsyncSignDocumentView.as_view(),
+        name="async_sign_document",
+    ),
+    path(
+        "async/verify/<int:pk>/",
+        async_views.AsyncVerifySignatureView.as_view(),
+        name="async_verify_document",
+    ),
+    path(
+        "async/verify/hash/",
+        async_views.AsyncVerifyHashView.as_view(),
+        name="async_verify_hash",
+    ),
 ]
@@ -1,7 +1,26 @@
+import csv
+import hashlib
+import re
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import caches
+from django.db.models import Q
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date, quote_etag
 from django.views import View
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.generic import (
     CreateView,
     ListView,
@@ -9,13 +28,58 @@ from django.views.generic import (
     DeleteView,
     DetailView,
 )
-from users.crypto_utils import (
-    sign_message,
-    generate_hash,
-    load_private_key_from_pem,
-)
-from .forms import DocumentForm
+from users.crypto_utils import get_cached_private_key
+from .export import exportable_documents, iter_jsonl, iter_zip
+from .forms import BulkHashVerifyForm, DocumentForm
+from .hashindex import find_document, record_signatures, signature_entries
+from .jobs import enqueue_signing, pending_document_ids
 from .models import Document
+from .search import search
+from .uploadhandlers import SHA256UploadHandler
+
+
+class DocumentVersionMixin:
+    """
+    GET condicional para as páginas de um documento. O ETag vem da versão do
+    documento (Document.version_tag) e o Last-Modified de updated_at; se o
+    cliente já tem a versão atual, a resposta é um 304, sem renderizar o
+    template nem verificar a assinatura.
+    """
+
+    # Campos exibidos pela página que não fazem parte da versão verificada
+    # (Document.version_tag), mas também precisam mudar o ETag.
+    page_fields = ("title",)
+
+    def get_validators(self, document, vary=""):
+        etag = document.version_tag(document.signing_key_fingerprint())
+        if self.page_fields:
+            values = [etag]
+            values += [str(getattr(document, name)) for name in self.page_fields]
+            etag = hashlib.sha256("|".join(values).encode()).hexdigest()[:32]
+        if vary:
+            etag = f"{etag}-{vary}"
+        return quote_etag(etag), int(document.updated_at.timestamp())
+
+    def not_modified(self, request, validators):
+        etag, last_modified = validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            self.set_validators(response, validators)
+        return response
+
+    def set_validators(self, response, validators):
+        etag, last_modified = validators
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        # O navegador guarda a página, mas revalida a cada acesso.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def verification_cache():
+    return caches[settings.DOCUMENT_VERIFICATION_CACHE]
 
 
 class DocumentCreateView(LoginRequiredMixin, CreateView):
@@ -29,13 +93,86 @@ class DocumentCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class DocumentListView(LoginRequiredMixin, ListView):
+class DocumentListMixin:
+    list_fields = [
+        "id",
+        "title",
+        # O conteúdo é lido do blob quando a assinatura é verificada de novo.
+        "blob",
+        "content_preview",
+        "hash",
+        "signature",
+        "signature_scheme",
+        "signature_algorithm",
+        "chunk_size",
+        "merkle_root",
+        "merkle_path",
+        "verified",
+        "verified_key_fingerprint",
+        "verified_hash",
+        "owner",
+        "owner__public_key",
+        "signing_key",
+        "signing_key__public_key",
+        "signing_key__fingerprint",
+    ]
+
+    def get_page_size(self):
+        try:
+            page_size = int(
+                self.request.GET.get("page_size", settings.DOCUMENTS_PAGE_SIZE)
+            )
+        except ValueError:
+            page_size = settings.DOCUMENTS_PAGE_SIZE
+        return max(1, min(page_size, settings.DOCUMENTS_MAX_PAGE_SIZE))
+
+    def get_cursor(self):
+        try:
+            return max(0, int(self.request.GET.get("after", 0)))
+        except ValueError:
+            return 0
+
+    def get_page_queryset(self, user):
+        # Paginação por cursor (keyset) em `id`: o custo de cada página não
+        # depende de quantos documentos vieram antes dela.
+        return (
+            Document.objects.filter(owner=user, id__gt=self.get_cursor())
+            .select_related("owner", "signing_key")
+            .only(*self.list_fields)
+            .order_by("id")[: self.get_page_size() + 1]
+        )
+
+
+class DocumentListView(LoginRequiredMixin, DocumentListMixin, ListView):
     model = Document
     template_name = "list_documents.html"
     context_object_name = "documents"
 
     def get_queryset(self):
-        return Document.objects.filter(owner=self.request.user)
+        return self.get_page_queryset(self.request.user)
+
+    def get_context_data(self, **kwargs):
+        page_size = self.get_page_size()
+        documents = list(self.object_list)
+        has_next = len(documents) > page_size
+        documents = documents[:page_size]
+
+        context = super().get_context_data(object_list=documents, **kwargs)
+        pending = pending_document_ids([document.id for document in documents])
+        for document in documents:
+            document.verified = document.verified_signature()
+            document.signing_pending = document.id in pending
+
+        context.update(
+            {
+                "document_count": Document.objects.owner_count(self.request.user.pk),
+                "document_count_limit": settings.DOCUMENT_COUNT_LIMIT,
+                "page_size": page_size,
+                "cursor": self.get_cursor(),
+                "next_cursor": documents[-1].id if has_next else None,
+            }
+        )
+        return context
 
 
 class DocumentUpdateView(LoginRequiredMixin, UpdateView):
@@ -47,6 +184,10 @@ class DocumentUpdateView(LoginRequiredMixin, UpdateView):
     def get_queryset(self):
         return Document.objects.filter(owner=self.request.user)
 
+    def form_valid(self, form):
+        form.instance.invalidate_verification()
+        return super().form_valid(form)
+
 
 class DocumentDeleteView(LoginRequiredMixin, DeleteView):
     model = Document
@@ -57,63 +198,120 @@ class DocumentDeleteView(LoginRequiredMixin, DeleteView):
         return Document.objects.filter(owner=self.request.user)
 
 
-class DocumentDetailView(LoginRequiredMixin, DetailView):
+class DocumentDetailView(LoginRequiredMixin, DocumentVersionMixin, DetailView):
     model = Document
     template_name = "view_document.html"
 
     def get_queryset(self):
-        return Document.objects.filter(owner=self.request.user)
+        return Document.objects.filter(owner=self.request.user).select_related(
+            "owner", "signing_key"
+        )
 
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        validators = self.get_validators(self.object)
+        response = self.not_modified(request, validators)
+        if response is not None:
+            return response
+        response = self.render_to_response(self.get_context_data(object=self.object))
+        return self.set_validators(response, validators)
+
+
+def load_owner_private_key(document):
+    """
+    Carrega (pelo cache do processo) a chave privada do dono do documento.
+
+    Levanta:
+    - ValueError/TypeError: O dono não tem chave privada ou ela é inválida.
+    """
+    private_key_pem = document.owner.private_key
+    if not private_key_pem:
+        raise ValueError("o dono do documento não tem chave privada")
+    return get_cached_private_key(document.owner_id, private_key_pem)
 
-class SignDocumentView(View):
-    def get(self, request, pk):
-        document = get_object_or_404(Document, id=pk)
 
-        private_key_pem = document.owner.private_key
+class SignDocumentView(LoginRequiredMixin, View):
+    def get(self, request, pk):
+        document = get_object_or_404(Document, id=pk, owner=request.user)
+        if settings.DOCUMENT_SIGNING_QUEUE:
+            enqueue_signing(document)
+            return redirect("list_documents")
 
         try:
-            private_key = load_private_key_from_pem(private_key_pem)
-        except Exception as e:
-            print("Erro ao carregar a chave:", e)
-
-        hash = generate_hash(document.content)
-        document.hash = hash
-        concat = document.content + hash
-        new_signature = sign_message(concat, private_key)
-        document.signature = new_signature
+            private_key = load_owner_private_key(document)
+        except (TypeError, ValueError) as e:
+            messages.error(request, f"Não foi possível carregar a chave: {e}.")
+            return redirect("list_documents")
+
+        document.sign(private_key)
         document.save()
+        record_signatures(signature_entries([document]))
         return redirect("list_documents")
 
 
-class VerifySignatureView(View):
+class VerifySignatureView(DocumentVersionMixin, View):
+    # A página só mostra o resultado da verificação: o ETag (e a chave do
+    # cache abaixo) depende apenas do que a verificação usa.
+    page_fields = ()
+
     def get(self, request, pk):
         if pk:
-            document = get_object_or_404(Document, id=pk)
-            is_valid_signature = document.verify_signature()
+            document = get_object_or_404(
+                Document.objects.select_related("owner", "signing_key"), id=pk
+            )
+            validators = self.get_validators(document)
+            response = self.not_modified(request, validators)
+            if response is not None:
+                return response
 
-            context = {
-                "document": document,
-                "is_valid_signature": is_valid_signature,
-            }
+            # A página não depende do usuário: o HTML renderizado fica em
+            # cache pela versão do documento e é servido a qualquer cliente.
+            cache_key = f"verify:{validators[0]}"
+            content = verification_cache().get(cache_key)
+            if content is None:
+                is_valid_signature = document.verify_signature()
+
+                context = {
+                    "document": document,
+                    "is_valid_signature": is_valid_signature,
+                }
 
-            return render(request, "verify_signature.html", context)
+                content = render_to_string("verify_signature.html", context, request)
+                verification_cache().set(cache_key, content)
+            return self.set_validators(HttpResponse(content), validators)
         else:
             return redirect("list_documents")
 
 
-class VerifyHashView(View):
+class VerifyHashView(DocumentVersionMixin, View):
     def get(self, request):
-        return render(request, "verify_hash.html")
+        # GET ?hash_code=<hash> faz a mesma consulta do POST, mas com GET
+        # condicional, para integrações que consultam o mesmo hash repetidas
+        # vezes.
+        hash = request.GET.get("hash_code")
+        if hash is None:
+            return render(request, "verify_hash.html")
+        document = find_document(
+            Document.objects.select_related("owner", "signing_key"), hash
+        )
+        if document is None:
+            return self.render_result(request, hash, document)
+        # A página mostra se o usuário é dono: o ETag varia por usuário.
+        validators = self.get_validators(document, vary=str(request.user.pk))
+        response = self.not_modified(request, validators)
+        if response is None:
+            response = self.render_result(request, hash, document)
+            self.set_validators(response, validators)
+        return response
 
     def post(self, request):
         hash = request.POST.get("hash_code")
-        user = request.user
-        document = Document.objects.filter(hash=hash).first()
+        document = find_document(Document.objects.all(), hash)
+        return self.render_result(request, hash, document)
 
+    def render_result(self, request, hash, document):
         is_valid_hash = True if document else False
-        if is_valid_hash and document.owner == user:
-            is_user_owner = True
-        is_user_owner = False
+        is_user_owner = is_valid_hash and document.owner_id == request.user.id
 
         return render(
             request,
@@ -125,3 +323,201 @@ class VerifyHashView(View):
                 "is_user_owner": is_user_owner,
             },
         )
+
+
+SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+
+class Echo:
+    """
+    Buffer que só devolve o que recebe, para que o csv.writer produza as
+    linhas de uma resposta em streaming.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value: str) -> str:
+    """
+    Escapa células que uma planilha interpretaria como fórmula (começando
+    com =, +, -, @, tabulação ou retorno de carro), prefixando-as com '.
+    """
+    if value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+class BulkVerifyHashView(View):
+    template_name = "verify_hash_bulk.html"
+
+    def get(self, request):
+        return render(request, self.template_name, {"form": BulkHashVerifyForm()})
+
+    def post(self, request):
+        form = BulkHashVerifyForm(request.POST, request.FILES)
+        if not form.is_valid():
+            return render(request, self.template_name, {"form": form})
+
+        response = StreamingHttpResponse(
+            self.verify_hashes(form.cleaned_data["hash_list"], request.user.id),
+            content_type="text/csv; charset=utf-8",
+        )
+        response["Content-Disposition"] = 'attachment; filename="hashes.csv"'
+        return response
+
+    def verify_hashes(self, hashes, user_id):
+        chunk_size = settings.BULK_HASH_VERIFY_CHUNK_SIZE
+        writer = csv.writer(Echo(), lineterminator="\n")
+        yield writer.writerow(["hash", "valido", "encontrado", "dono"])
+        for start in range(0, len(hashes), chunk_size):
+            chunk = hashes[start : start + chunk_size]
+            owners = {}
+            # Linhas que não são um SHA256 em hexadecimal saem como inválidas,
+            # sem ir ao banco.
+            hashes = {hash for hash in chunk if SHA256_HEX.fullmatch(hash)}
+            # O hash assinado ou, nos documentos com hash por trechos, o
+            # SHA256 do arquivo.
+            for hash, file_hash, owner_id in Document.objects.filter(
+                Q(hash__in=hashes) | Q(file_hash__in=hashes)
+            ).values_list("hash", "file_hash", "owner_id"):
+                for found in {hash, file_hash} & hashes:
+                    owners.setdefault(found, set()).add(owner_id)
+            for hash in chunk:
+                found = hash in owners
+                is_owner = found and user_id in owners[hash]
+                yield writer.writerow(
+                    [csv_cell(hash), int(hash in hashes), int(found), int(is_owner)]
+                )
+
+
+class SearchDocumentsView(LoginRequiredMixin, View):
+    """
+    Busca no título e no conteúdo dos documentos do usuário (índice FTS5),
+    com os resultados mais relevantes primeiro. ?q=<termos>, "termo*" para
+    busca por prefixo e ?page=<n> para as páginas seguintes.
+    """
+
+    template_name = "search_documents.html"
+
+    def get(self, request):
+        query = request.GET.get("q", "").strip()
+        try:
+            page = max(1, int(request.GET.get("page", 1)))
+        except ValueError:
+            page = 1
+        page_size = settings.DOCUMENT_SEARCH_PAGE_SIZE
+
+        results = []
+        has_next = False
+        if query:
+            matches = search(
+                request.user, query, page_size + 1, offset=(page - 1) * page_size
+            )
+            has_next = len(matches) > page_size
+            matches = matches[:page_size]
+            documents = Document.objects.only("id", "title").in_bulk(
+                [document_id for document_id, _ in matches]
+            )
+            results = [
+                (documents[document_id], snippet)
+                for document_id, snippet in matches
+                if document_id in documents
+            ]
+
+        context = {
+            "query": query,
+            "results": results,
+            "page": page,
+            "previous_page": page - 1 if page > 1 else None,
+            "next_page": page + 1 if has_next else None,
+        }
+        return render(request, self.template_name, context)
+
+
+class ExportDocumentsView(LoginRequiredMixin, View):
+    """
+    Exporta os documentos assinados do usuário (ou de todos, para a equipe,
+    com ?scope=all) como JSONL ou ZIP em streaming. ?after=<id> retoma um
+    pacote interrompido a partir do último documento recebido.
+    """
+
+    formats = {
+        "jsonl": ("application/x-ndjson; charset=utf-8", "jsonl"),
+        "zip": ("application/zip", "zip"),
+    }
+
+    def get(self, request):
+        bundle_format = request.GET.get("format", "jsonl")
+        if bundle_format not in self.formats:
+            return HttpResponseBadRequest("Formato inválido.")
+        try:
+            after_id = max(0, int(request.GET.get("after", 0)))
+        except ValueError:
+            return HttpResponseBadRequest("Cursor inválido.")
+        owner = request.user
+        if request.GET.get("scope") == "all":
+            if not request.user.is_staff:
+                return HttpResponseForbidden()
+            owner = None
+
+        queryset = exportable_documents(owner, after_id)
+        if bundle_format == "zip":
+            chunks = iter_zip(queryset, after_id=after_id)
+        else:
+            chunks = iter_jsonl(queryset)
+        content_type, extension = self.formats[bundle_format]
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        suffix = f"-{after_id}" if after_id else ""
+        filename = f"documentos{suffix}.{extension}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class VerifyFileView(View):
+    template_name = "verify_file.html"
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # Precisa ser definido antes de request.POST/FILES serem lidos,
+        # por isso o CSRF é verificado apenas em post().
+        request.upload_handlers = [SHA256UploadHandler(request)]
+
+    def get(self, request):
+        return render(request, self.template_name)
+
+    @method_decorator(csrf_protect)
+    def post(self, request):
+        upload = request.FILES.get("document_file")
+        if upload is None:
+            return render(
+                request, self.template_name, {"error": "Selecione um arquivo."}
+            )
+
+        # Documentos com hash por trechos têm como hash a raiz da árvore; o
+        # SHA256 do arquivo é o endereço do blob deles.
+        document = (
+            Document.objects.filter(
+                Q(hash=upload.hash)
+                | Q(blob=upload.hash, chunk_size__isnull=False)
+            )
+            .select_related("owner")
+            .order_by("id")
+            .first()
+        )
+        is_valid_signature = None
+        if document is not None and request.POST.get("verify_signature"):
+            is_valid_signature = document.verified_signature()
+
+        return render(
+            request,
+            self.template_name,
+            {
+                "upload": upload,
+                "document": document,
+                "is_user_owner": document is not None
+                and document.owner_id == request.user.id,
+                "is_valid_signature": is_valid_signature,
+            },
+        )
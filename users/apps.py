@@ -4,3 +4,28 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from assinador_documentos.database import configure_sqlite
+        from . import metrics
+        from . import signals  # noqa: F401
+        from .crypto_utils import cache_metrics, private_key_cache, public_key_cache
+        from .middleware import install_query_counter
+
+        public_key_cache.resize(getattr(settings, "PUBLIC_KEY_CACHE_SIZE", 1024))
+        private_key_cache.resize(
+            getattr(settings, "PRIVATE_KEY_CACHE_SIZE", 256),
+            ttl=getattr(settings, "PRIVATE_KEY_CACHE_TTL", 300),
+        )
+
+        connection_created.connect(configure_sqlite)
+
+        metrics.enabled = getattr(settings, "METRICS_ENABLED", True)
+        if metrics.enabled:
+            from .keypool import keypool_metrics
+
+            metrics.register_collector(cache_metrics)
+            metrics.register_collector(keypool_metrics)
+            connection_created.connect(install_query_counter)
@@ -1,7 +1,45 @@
+import contextvars
 import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization, hashes
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa, padding, utils
+
+from . import metrics
+
+# Algoritmos de chave suportados.
+RSA_2048 = "rsa-2048"
+ED25519 = "ed25519"
+ECDSA_P256 = "ecdsa-p256"
+ALGORITHMS = (RSA_2048, ED25519, ECDSA_P256)
+
+# Tamanho (em caracteres) dos pedaços de texto codificados em UTF-8 por vez
+# durante o cálculo do hash, para não copiar documentos grandes inteiros.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _timer(operation, key=None, payload=None):
+    """
+    Mede uma operação para as métricas do processo (users.metrics), rotulada
+    pelo tipo/tamanho da chave e pela faixa de tamanho do payload.
+    """
+    if not metrics.enabled:
+        return metrics.NOOP_TIMER
+    return metrics.CryptoTimer(operation, key, payload, _key_label)
+
+
+def _key_label(key) -> str:
+    if isinstance(key, str):
+        return key
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return f"rsa-{key.key_size}"
+    try:
+        return key_algorithm(key)
+    except ValueError:
+        return type(key).__name__
 
 
 def _ensure_bytes(data) -> bytes:
@@ -19,28 +57,216 @@ def _ensure_bytes(data) -> bytes:
     return data
 
 
-def generate_keypair() -> tuple:
+def key_fingerprint(pem_str) -> str:
     """
-    Gera um par de chaves RSA e retorna como (private_key, public_key).
+    Calcula a impressão digital (SHA256) de uma chave no formato PEM.
+
+    Args:
+    - pem_str (str/bytes): Chave no formato PEM.
+
+    Retorna:
+    - str: Hash SHA256 em hexadecimal dos bytes da chave.
+    """
+    return hashlib.sha256(_ensure_bytes(pem_str)).hexdigest()
+
+
+class KeyCache:
+    """
+    Cache LRU de tamanho limitado para chaves já carregadas, indexado por
+    (id do usuário, impressão digital da chave). Seguro para uso entre threads.
+    Com `ttl` (segundos), as entradas expiram esse tempo depois de carregadas.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_load(self, user_id, pem_str, loader):
+        """
+        Retorna a chave em cache ou a carrega com `loader` e a armazena.
+
+        Args:
+        - user_id: Identificador do dono da chave.
+        - pem_str (str/bytes): Chave no formato PEM.
+        - loader (callable): Função que recebe o PEM e retorna a chave carregada.
+
+        Retorna:
+        - A chave carregada.
+        """
+        cache_key = (user_id, key_fingerprint(pem_str))
+        return self.get_or_compute(cache_key, lambda: loader(pem_str))
+
+    def get_or_compute(self, cache_key: tuple, compute):
+        """
+        Retorna o valor em cache para `cache_key` ou o calcula com `compute`.
+        O primeiro elemento da chave deve ser o id do usuário (ver evict_user).
+
+        Args:
+        - cache_key (tuple): Chave do cache, começando pelo id do usuário.
+        - compute (callable): Função sem argumentos que calcula o valor.
+
+        Retorna:
+        - O valor em cache ou recém-calculado.
+        """
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(cache_key)
+                    self.hits += 1
+                    return value
+                del self._entries[cache_key]
+                self.expirations += 1
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+            self._entries[cache_key] = (value, expires_at)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def evict_user(self, user_id) -> int:
+        """
+        Remove do cache todas as chaves de um usuário.
+
+        Args:
+        - user_id: Identificador do dono das chaves.
+
+        Retorna:
+        - int: Quantidade de entradas removidas.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == user_id]
+            for key in stale:
+                del self._entries[key]
+            self.evictions += len(stale)
+        return len(stale)
+
+    def resize(self, maxsize: int, ttl=None):
+        """
+        Altera o tamanho máximo (e o TTL) do cache, descartando as entradas
+        mais antigas se necessário. O novo TTL vale para as próximas cargas.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict:
+        """
+        Retorna os contadores do cache.
+
+        Retorna:
+        - dict: Tamanho atual, tamanho máximo, TTL, acertos, faltas, taxa de
+          acertos, remoções (por espaço ou explícitas) e expirações.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+public_key_cache = KeyCache()
+# Chaves privadas carregadas para assinatura. O TTL curto limita por quanto
+# tempo uma chave fica em memória depois da última carga; trocar a chave muda a
+# impressão digital, então os outros processos nunca usam uma chave antiga.
+private_key_cache = KeyCache(maxsize=256, ttl=300)
+# Resultado da verificação das assinaturas de raízes Merkle já conferidas.
+merkle_root_cache = KeyCache(maxsize=4096)
+
+
+def cache_metrics():
+    """
+    Coletor de users.metrics com os contadores dos caches do processo.
+    """
+    caches = {
+        "public_key": public_key_cache,
+        "private_key": private_key_cache,
+        "merkle_root": merkle_root_cache,
+    }
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    for field, kind, documentation in (
+        ("size", "gauge", "Entradas no cache."),
+        ("hits", "counter", "Acertos do cache."),
+        ("misses", "counter", "Faltas do cache."),
+        ("hit_rate", "gauge", "Fração das consultas atendidas pelo cache."),
+        ("evictions", "counter", "Entradas removidas (espaço ou invalidação)."),
+        ("expirations", "counter", "Entradas descartadas pelo TTL."),
+    ):
+        suffix = "" if kind == "gauge" else "_total"
+        yield (
+            f"crypto_cache_{field}{suffix}",
+            kind,
+            documentation,
+            [({"cache": name}, values[field]) for name, values in stats.items()],
+        )
+
+
+def generate_keypair(algorithm: str = RSA_2048) -> tuple:
+    """
+    Gera um par de chaves e retorna como (private_key, public_key).
+
+    Args:
+    - algorithm (str): RSA_2048 (padrão), ED25519 ou ECDSA_P256.
 
     Retorna:
     - tuple: Chave privada e chave pública.
     """
-    private_key = rsa.generate_private_key(
-        public_exponent=65537, key_size=2048, backend=default_backend()
-    )
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritmo de chave desconhecido: {algorithm}")
+    with _timer("generate_keypair", key=algorithm):
+        if algorithm == RSA_2048:
+            private_key = rsa.generate_private_key(
+                public_exponent=65537, key_size=2048, backend=default_backend()
+            )
+        elif algorithm == ED25519:
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            private_key = ec.generate_private_key(
+                ec.SECP256R1(), backend=default_backend()
+            )
     public_key = private_key.public_key()
     return private_key, public_key
 
 
-def generate_keypair_pem() -> tuple:
+def generate_keypair_pem(algorithm: str = RSA_2048) -> tuple:
     """
-    Gera um par de chaves RSA e retorna como (private_key_pem, public_key_pem).
+    Gera um par de chaves e retorna como (private_key_pem, public_key_pem).
+
+    Args:
+    - algorithm (str): RSA_2048 (padrão), ED25519 ou ECDSA_P256.
 
     Retorna:
     - tuple: Chave privada e chave pública no formato PEM.
     """
-    private_key, public_key = generate_keypair()
+    private_key, public_key = generate_keypair(algorithm)
     private_key_pem = private_key.private_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PrivateFormat.PKCS8,
@@ -53,67 +279,187 @@ def generate_keypair_pem() -> tuple:
     return private_key_pem, public_key_pem
 
 
-def load_public_key_from_pem(pem_str) -> rsa.RSAPublicKey:
+def key_algorithm(key) -> str:
     """
-    Carrega uma chave pública RSA de uma string PEM.
+    Identifica o algoritmo de uma chave pública ou privada já carregada.
+
+    Args:
+    - key: Chave RSA, Ed25519 ou ECDSA P-256.
+
+    Retorna:
+    - str: RSA_2048, ED25519 ou ECDSA_P256.
+    """
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return RSA_2048
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return ED25519
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)):
+        if isinstance(key.curve, ec.SECP256R1):
+            return ECDSA_P256
+    raise ValueError(f"Tipo de chave não suportado: {type(key).__name__}")
+
+
+def load_public_key_from_pem(pem_str):
+    """
+    Carrega uma chave pública (RSA, Ed25519 ou ECDSA) de uma string PEM.
 
     Args:
     - pem_str (str): String no formato PEM da chave pública.
 
     Retorna:
-    - rsa.RSAPublicKey: Chave pública RSA.
+    - Chave pública carregada.
     """
     pem_bytes = _ensure_bytes(pem_str)
-    return serialization.load_pem_public_key(pem_bytes, backend=default_backend())
+    with _timer("load_public_key") as timer:
+        public_key = serialization.load_pem_public_key(
+            pem_bytes, backend=default_backend()
+        )
+        timer.key = public_key
+    return public_key
+
+
+def get_cached_public_key(user_id, pem_str):
+    """
+    Carrega uma chave pública usando o cache LRU do processo.
+
+    Args:
+    - user_id: Identificador do dono da chave.
+    - pem_str (str/bytes): String no formato PEM da chave pública.
+
+    Retorna:
+    - Chave pública carregada.
+    """
+    return public_key_cache.get_or_load(user_id, pem_str, load_public_key_from_pem)
 
 
-def load_private_key_from_pem(pem_str) -> rsa.RSAPrivateKey:
+def load_private_key_from_pem(pem_str):
     """
-    Carrega uma chave privada RSA de uma string PEM.
+    Carrega uma chave privada (RSA, Ed25519 ou ECDSA) de uma string PEM.
 
     Args:
     - pem_str (str): String no formato PEM da chave privada.
 
     Retorna:
-    - rsa.RSAPrivateKey: Chave privada RSA.
+    - Chave privada carregada.
     """
     pem_bytes = _ensure_bytes(pem_str)
-    return serialization.load_pem_private_key(
-        pem_bytes, password=None, backend=default_backend()
+    with _timer("load_private_key") as timer:
+        private_key = serialization.load_pem_private_key(
+            pem_bytes, password=None, backend=default_backend()
+        )
+        timer.key = private_key
+    return private_key
+
+
+def get_cached_private_key(user_id, pem_str):
+    """
+    Carrega uma chave privada usando o cache do processo (LRU com TTL), para
+    que quem assina vários documentos em sequência só pague o parse uma vez.
+
+    Args:
+    - user_id: Identificador do dono da chave.
+    - pem_str (str/bytes): String no formato PEM da chave privada.
+
+    Retorna:
+    - Chave privada carregada.
+    """
+    return private_key_cache.get_or_load(user_id, pem_str, load_private_key_from_pem)
+
+
+def _rsa_padding():
+    return padding.PSS(
+        mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH
     )
 
 
 def sign_message(message, private_key) -> bytes:
     """
-    Assina uma mensagem usando uma chave privada RSA.
+    Assina uma mensagem usando uma chave privada RSA (PSS/SHA256), Ed25519 ou
+    ECDSA P-256 (SHA256).
 
     Args:
     - message (str/bytes): Mensagem a ser assinada.
-    - private_key: Chave privada RSA.
+    - private_key: Chave privada.
 
     Retorna:
     - bytes: Assinatura da mensagem.
     """
     message_bytes = _ensure_bytes(message)
 
-    signature = private_key.sign(
-        message_bytes,
-        padding.PSS(
-            mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH
-        ),
-        hashes.SHA256(),
-    )
-    return signature
+    with _timer("sign_message", private_key, len(message_bytes)):
+        if isinstance(private_key, ed25519.Ed25519PrivateKey):
+            return private_key.sign(message_bytes)
+        if isinstance(private_key, ec.EllipticCurvePrivateKey):
+            return private_key.sign(message_bytes, ec.ECDSA(hashes.SHA256()))
+        return private_key.sign(message_bytes, _rsa_padding(), hashes.SHA256())
+
+
+def sign_digest(digest: bytes, private_key) -> bytes:
+    """
+    Assina um digest SHA256 já calculado. RSA e ECDSA usam o digest como
+    Prehashed(SHA256); o Ed25519, que não aceita hash pré-calculado, assina
+    os 32 bytes do digest como mensagem.
+
+    Args:
+    - digest (bytes): Digest SHA256 (32 bytes) da mensagem.
+    - private_key: Chave privada.
+
+    Retorna:
+    - bytes: Assinatura do digest.
+    """
+    with _timer("sign_digest", private_key):
+        if isinstance(private_key, ed25519.Ed25519PrivateKey):
+            return private_key.sign(digest)
+        if isinstance(private_key, ec.EllipticCurvePrivateKey):
+            return private_key.sign(
+                digest, ec.ECDSA(utils.Prehashed(hashes.SHA256()))
+            )
+        return private_key.sign(
+            digest, _rsa_padding(), utils.Prehashed(hashes.SHA256())
+        )
+
+
+def verify_digest_signature(digest: bytes, signature: bytes, public_key) -> bool:
+    """
+    Verifica a assinatura de um digest SHA256 feita por sign_digest.
+
+    Args:
+    - digest (bytes): Digest SHA256 (32 bytes) da mensagem original.
+    - signature (bytes): Assinatura a ser verificada.
+    - public_key: Chave pública.
+
+    Retorna:
+    - bool: True se a assinatura for válida, False caso contrário.
+    """
+    try:
+        with _timer("verify_digest", public_key):
+            if isinstance(public_key, ed25519.Ed25519PublicKey):
+                public_key.verify(signature, digest)
+            elif isinstance(public_key, ec.EllipticCurvePublicKey):
+                public_key.verify(
+                    signature, digest, ec.ECDSA(utils.Prehashed(hashes.SHA256()))
+                )
+            else:
+                public_key.verify(
+                    signature,
+                    digest,
+                    _rsa_padding(),
+                    utils.Prehashed(hashes.SHA256()),
+                )
+        return True
+    except:
+        return False
 
 
 def verify_signature(message, signature: bytes, public_key) -> bool:
     """
-    Verifica a assinatura de uma mensagem usando uma chave pública RSA.
+    Verifica a assinatura de uma mensagem usando uma chave pública RSA,
+    Ed25519 ou ECDSA P-256.
 
     Args:
     - message (str/bytes): Mensagem original.
     - signature (bytes): Assinatura a ser verificada.
-    - public_key: Chave pública RSA.
+    - public_key: Chave pública.
 
     Retorna:
     - bool: True se a assinatura for válida, False caso contrário.
@@ -121,19 +467,289 @@ def verify_signature(message, signature: bytes, public_key) -> bool:
     message_bytes = _ensure_bytes(message)
 
     try:
-        public_key.verify(
-            signature,
-            message_bytes,
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256(),
-        )
+        with _timer("verify_message", public_key, len(message_bytes)):
+            if isinstance(public_key, ed25519.Ed25519PublicKey):
+                public_key.verify(signature, message_bytes)
+            elif isinstance(public_key, ec.EllipticCurvePublicKey):
+                public_key.verify(
+                    signature, message_bytes, ec.ECDSA(hashes.SHA256())
+                )
+            else:
+                public_key.verify(
+                    signature, message_bytes, _rsa_padding(), hashes.SHA256()
+                )
         return True
     except:
         return False
 
 
+def verify_signatures_batch(items, max_workers=None, executor=None) -> list:
+    """
+    Verifica várias assinaturas em paralelo usando um pool de threads. O
+    OpenSSL libera o GIL durante a verificação RSA, então as threads usam
+    núcleos diferentes. Cada chave pública é carregada uma única vez.
+
+    Args:
+    - items (iterable): Tuplas (key_id, public_key_pem, message, signature) ou
+      (key_id, public_key_pem, message, signature, digest). Com digest=True a
+      assinatura é verificada sobre o digest SHA256 da mensagem (sign_digest);
+      digest também pode ser uma função que calcula o digest da mensagem
+      (por exemplo, chunked_digest), usada também nas provas Merkle.
+      Um sexto elemento (raiz, caminho) indica uma assinatura em lote Merkle:
+      a prova de inclusão é conferida e a raiz é verificada uma única vez.
+      Um sétimo elemento (bytes) é o digest esperado (o hash guardado): com
+      ele, a assinatura só é válida se o digest calculado for igual.
+      Itens com o mesmo key_id e PEM compartilham a chave carregada.
+    - max_workers (int): Número de threads, se nenhum executor for informado.
+    - executor (Executor): Pool de threads já existente, opcional.
+
+    Retorna:
+    - list: Um bool por item, na mesma ordem da entrada.
+    """
+    public_keys = {}
+    tasks = []
+    for item in items:
+        key_id, public_key_pem, message, signature = item[:4]
+        digest = item[4] if len(item) > 4 else False
+        merkle = item[5] if len(item) > 5 else None
+        expected = item[6] if len(item) > 6 else None
+        if merkle is not None:
+            tasks.append(
+                (key_id, public_key_pem, message, signature, digest, merkle, expected)
+            )
+            continue
+        if not public_key_pem or signature is None:
+            tasks.append((None, message, signature, digest, expected))
+            continue
+        group = (key_id, key_fingerprint(public_key_pem))
+        if group not in public_keys:
+            try:
+                public_keys[group] = get_cached_public_key(key_id, public_key_pem)
+            except (ValueError, TypeError):
+                public_keys[group] = None
+        tasks.append((public_keys[group], message, signature, digest, expected))
+
+    def message_digest(message, digest, expected):
+        compute = digest if callable(digest) else generate_digest
+        value = compute(message)
+        if expected is not None and value != expected:
+            return None
+        return value
+
+    def verify(task):
+        if len(task) == 7:
+            key_id, public_key_pem, message, signature, digest, merkle, expected = task
+            if not public_key_pem or signature is None:
+                return False
+            value = message_digest(message, digest, expected)
+            root, path = merkle
+            if value is None or merkle_root_from_proof(value, path) != root:
+                return False
+            return verify_merkle_root_signature(
+                key_id, public_key_pem, root, signature
+            )
+        public_key, message, signature, digest, expected = task
+        if public_key is None:
+            return False
+        if digest:
+            value = message_digest(message, digest, expected)
+            if value is None:
+                return False
+            return verify_digest_signature(value, bytes(signature), public_key)
+        return verify_signature(message, bytes(signature), public_key)
+
+    # Cada tarefa roda em uma cópia do contexto de quem chamou, para que as
+    # operações feitas nas threads contem nas métricas da requisição.
+    contexts = [contextvars.copy_context() for _ in tasks]
+
+    def run(context, task):
+        return context.run(verify, task)
+
+    if executor is not None:
+        return list(executor.map(run, contexts, tasks))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(run, contexts, tasks))
+
+
+def generate_digest(message) -> bytes:
+    """
+    Gera o digest SHA256 da mensagem em uma única passada. Strings são
+    codificadas em UTF-8 em pedaços, sem criar uma cópia do texto inteiro.
+
+    Args:
+    - message (str/bytes): Mensagem a ser hashed.
+
+    Retorna:
+    - bytes: Digest SHA256 (32 bytes) da mensagem.
+    """
+    sha256 = hashlib.sha256()
+    with _timer("hash") as timer:
+        if isinstance(message, str):
+            # O rótulo do payload é o tamanho em bytes, só conhecido depois
+            # de codificar (len(message) conta caracteres).
+            size = 0
+            for start in range(0, len(message), HASH_CHUNK_SIZE):
+                encoded = message[start : start + HASH_CHUNK_SIZE].encode("utf-8")
+                sha256.update(encoded)
+                size += len(encoded)
+            timer.payload = size
+        else:
+            sha256.update(message)
+            timer.payload = len(message)
+    return sha256.digest()
+
+
+def merkle_leaf(digest: bytes) -> bytes:
+    """
+    Calcula a folha da árvore Merkle para o digest de um documento. Os
+    prefixos 0x00 (folha) e 0x01 (nó) impedem que um nó interno seja
+    apresentado como folha.
+    """
+    return hashlib.sha256(b"\x00" + digest).digest()
+
+
+def merkle_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def merkle_tree(digests) -> tuple:
+    """
+    Constrói a árvore Merkle sobre os digests SHA256 dos documentos. Um nó
+    sem par em um nível sobe sem alteração para o nível seguinte.
+
+    Args:
+    - digests (list): Digests SHA256 (bytes) dos documentos, em ordem.
+
+    Retorna:
+    - tuple: (raiz, caminhos), onde caminhos[i] é a prova de inclusão do
+      documento i: lista de pares (lado, irmão) com lado "L" ou "R".
+    """
+    if not digests:
+        raise ValueError("A árvore Merkle precisa de ao menos um documento.")
+    level = [merkle_leaf(digest) for digest in digests]
+    # positions[i]: posição, no nível atual, do nó que contém a folha i.
+    positions = list(range(len(level)))
+    paths = [[] for _ in level]
+    while len(level) > 1:
+        for leaf, position in enumerate(positions):
+            sibling = position ^ 1
+            if sibling < len(level):
+                side = "L" if sibling < position else "R"
+                paths[leaf].append((side, level[sibling]))
+        next_level = [
+            merkle_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+        positions = [position // 2 for position in positions]
+    return level[0], paths
+
+
+def merkle_root_from_proof(digest: bytes, path) -> bytes:
+    """
+    Recalcula a raiz Merkle a partir do digest de um documento e da sua prova
+    de inclusão, com O(log N) hashes.
+
+    Args:
+    - digest (bytes): Digest SHA256 do documento.
+    - path (list): Pares (lado, irmão) retornados por merkle_tree.
+
+    Retorna:
+    - bytes: Raiz Merkle calculada.
+    """
+    node = merkle_leaf(digest)
+    for side, sibling in path:
+        node = merkle_node(sibling, node) if side == "L" else merkle_node(node, sibling)
+    return node
+
+
+def verify_merkle_root_signature(
+    key_id, public_key_pem, root: bytes, signature: bytes
+) -> bool:
+    """
+    Verifica a assinatura de uma raiz Merkle. O resultado fica em cache, de
+    modo que a operação RSA é feita uma única vez por lote.
+
+    Args:
+    - key_id: Identificador do dono da chave.
+    - public_key_pem (str/bytes): Chave pública no formato PEM.
+    - root (bytes): Raiz Merkle assinada.
+    - signature (bytes): Assinatura da raiz.
+
+    Retorna:
+    - bool: True se a assinatura for válida, False caso contrário.
+    """
+    signature = bytes(signature)
+    cache_key = (key_id, key_fingerprint(public_key_pem), root, signature)
+    return merkle_root_cache.get_or_compute(
+        cache_key,
+        lambda: verify_digest_signature(
+            root, signature, get_cached_public_key(key_id, public_key_pem)
+        ),
+    )
+
+
+def chunk_digests(data, chunk_size: int, base=None, base_digests=None) -> tuple:
+    """
+    Calcula o SHA256 de cada trecho de `chunk_size` bytes. Se a versão
+    anterior do conteúdo (base) e os digests dela forem informados, os trechos
+    com os mesmos bytes reaproveitam o digest anterior: comparar bytes custa
+    bem menos que calcular o SHA256.
+
+    Args:
+    - data (str/bytes/mmap): Conteúdo.
+    - chunk_size (int): Tamanho dos trechos em bytes.
+    - base (bytes/mmap): Versão anterior do conteúdo, opcional.
+    - base_digests (bytes): Digests concatenados dos trechos da versão
+      anterior, calculados com o mesmo chunk_size.
+
+    Retorna:
+    - tuple: (digests concatenados (bytes), quantidade de trechos recalculados).
+    """
+    if base is None or not base_digests:
+        base, base_digests = b"", b""
+    digests = bytearray()
+    rehashed = 0
+    with memoryview(_ensure_bytes(data)) as view, _timer(
+        "hash_chunks", payload=len(view)
+    ):
+        # Um conteúdo vazio tem um único trecho vazio.
+        for start in range(0, max(len(view), 1), chunk_size):
+            with view[start : start + chunk_size] as chunk:
+                end = start + len(chunk)
+                previous = base_digests[len(digests) : len(digests) + 32]
+                # O trecho anterior precisa ter exatamente os mesmos limites:
+                # find() em uma janela do tamanho do trecho é um memcmp.
+                if (
+                    len(previous) == 32
+                    and min(start + chunk_size, len(base)) == end
+                    and base.find(chunk, start, end) == start
+                ):
+                    digests += previous
+                else:
+                    digests += hashlib.sha256(chunk).digest()
+                    rehashed += 1
+    return bytes(digests), rehashed
+
+
+def chunk_tree_root(digests: bytes) -> bytes:
+    """
+    Calcula a raiz da árvore (a mesma de merkle_tree) sobre os digests
+    concatenados dos trechos de um documento.
+    """
+    leaves = [digests[start : start + 32] for start in range(0, len(digests), 32)]
+    return merkle_tree(leaves)[0]
+
+
+def chunked_digest(data, chunk_size: int) -> bytes:
+    """
+    Digest de um documento com hash por trechos: a raiz da árvore sobre os
+    SHA256 dos trechos de `chunk_size` bytes.
+    """
+    return chunk_tree_root(chunk_digests(data, chunk_size)[0])
+
+
 def generate_hash(message) -> str:
     """
     Gera um hash SHA256 para a mensagem dada.
@@ -144,10 +760,7 @@ def generate_hash(message) -> str:
     Retorna:
     - str: Hash SHA256 da mensagem.
     """
-    message_bytes = _ensure_bytes(message)
-    sha256 = hashlib.sha256()
-    sha256.update(message_bytes)
-    return sha256.hexdigest()
+    return generate_digest(message).hex()
 
 
 def verify_integrity(original_message, received_hash: str) -> bool:
@@ -0,0 +1,162 @@
+import threading
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .crypto_utils import ALGORITHMS, RSA_2048, generate_keypair_pem
+from .models import PooledKeyPair
+
+_lock = threading.Lock()
+_counters = {"claimed": 0, "fallbacks": 0}
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def claim_keypair(algorithm=RSA_2048):
+    """
+    Retira atomicamente um par de chaves do pool.
+
+    Args:
+    - algorithm (str): Algoritmo do par desejado.
+
+    Retorna:
+    - tuple: (private_key_pem, public_key_pem), ou None se o pool estiver vazio.
+    """
+    pairs = PooledKeyPair.objects.filter(algorithm=algorithm)
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pair = (
+                pairs.select_for_update(skip_locked=True)
+                .order_by("id")
+                .first()
+            )
+            if pair is None:
+                return None
+            pair.delete()
+            return bytes(pair.private_key), bytes(pair.public_key)
+
+    # Sem SKIP LOCKED (SQLite): o DELETE condicional decide quem levou o par.
+    for _ in range(5):
+        pair = pairs.order_by("id").first()
+        if pair is None:
+            return None
+        deleted, _ = PooledKeyPair.objects.filter(pk=pair.pk).delete()
+        if deleted:
+            return bytes(pair.private_key), bytes(pair.public_key)
+    return None
+
+
+def take_keypair(algorithm=RSA_2048):
+    """
+    Retorna um par de chaves do pool ou, se ele estiver vazio, gera um novo
+    par na hora.
+
+    Args:
+    - algorithm (str): Algoritmo do par desejado.
+
+    Retorna:
+    - tuple: (private_key_pem, public_key_pem).
+    """
+    pair = claim_keypair(algorithm)
+    if pair is not None:
+        _count("claimed")
+        return pair
+    _count("fallbacks")
+    return generate_keypair_pem(algorithm)
+
+
+def refill_pool(low, high, executor=None, batch_size=20, algorithm=RSA_2048):
+    """
+    Completa o pool até `high` pares quando ele estiver abaixo de `low`.
+
+    Args:
+    - low (int): Marca d'água inferior.
+    - high (int): Marca d'água superior.
+    - executor (Executor): Pool opcional para gerar as chaves em paralelo.
+    - batch_size (int): Pares gravados por bulk_create.
+    - algorithm (str): Algoritmo dos pares gerados.
+
+    Retorna:
+    - int: Quantidade de pares gerados.
+    """
+    depth = pool_depth(algorithm)
+    if depth >= low:
+        return 0
+    missing = high - depth
+    generated = 0
+    while generated < missing:
+        size = min(batch_size, missing - generated)
+        if executor is not None:
+            futures = [
+                executor.submit(generate_keypair_pem, algorithm) for _ in range(size)
+            ]
+            pairs = [future.result() for future in futures]
+        else:
+            pairs = [generate_keypair_pem(algorithm) for _ in range(size)]
+        PooledKeyPair.objects.bulk_create(
+            PooledKeyPair(
+                private_key=private_key, public_key=public_key, algorithm=algorithm
+            )
+            for private_key, public_key in pairs
+        )
+        generated += size
+    return generated
+
+
+def pool_depth(algorithm=RSA_2048):
+    return PooledKeyPair.objects.filter(algorithm=algorithm).count()
+
+
+def pool_stats(algorithm=RSA_2048):
+    """
+    Retorna a profundidade do pool e os contadores deste processo.
+
+    Args:
+    - algorithm (str): Algoritmo cuja profundidade é consultada.
+
+    Retorna:
+    - dict: depth, claimed (pares tirados do pool) e fallbacks (pares gerados
+      na requisição porque o pool estava vazio).
+    """
+    with _lock:
+        stats = dict(_counters)
+    stats["depth"] = pool_depth(algorithm)
+    return stats
+
+
+def keypool_metrics():
+    """
+    Coletor de users.metrics com a profundidade do pool por algoritmo e os
+    contadores deste processo.
+    """
+    depths = dict(
+        PooledKeyPair.objects.values_list("algorithm")
+        .annotate(Count("id"))
+        .order_by()
+    )
+    with _lock:
+        counters = dict(_counters)
+    yield (
+        "keypool_depth",
+        "gauge",
+        "Pares de chaves disponíveis no pool.",
+        [
+            ({"algorithm": algorithm}, depths.get(algorithm, 0))
+            for algorithm in ALGORITHMS
+        ],
+    )
+    yield (
+        "keypool_claimed_total",
+        "counter",
+        "Pares de chaves tirados do pool.",
+        [({}, counters["claimed"])],
+    )
+    yield (
+        "keypool_fallbacks_total",
+        "counter",
+        "Pares gerados na requisição porque o pool estava vazio.",
+        [({}, counters["fallbacks"])],
+    )
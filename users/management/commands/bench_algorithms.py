@@ -0,0 +1,64 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.crypto_utils import (
+    ALGORITHMS,
+    generate_digest,
+    generate_keypair,
+    sign_digest,
+    verify_digest_signature,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a vazão de geração de chaves, assinatura e verificação de "
+        "cada algoritmo suportado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keys", type=int, default=20, help="Pares de chaves gerados."
+        )
+        parser.add_argument(
+            "--signatures", type=int, default=500, help="Assinaturas por algoritmo."
+        )
+
+    def rate(self, count, function):
+        started = time.perf_counter()
+        function()
+        return count / (time.perf_counter() - started)
+
+    def handle(self, *args, **options):
+        key_count = options["keys"]
+        count = options["signatures"]
+        digests = [generate_digest(os.urandom(1024)) for _ in range(count)]
+
+        self.stdout.write(
+            f"{'algoritmo':<14}{'chaves/s':>12}{'assinar/s':>12}{'verificar/s':>14}"
+        )
+        for algorithm in ALGORITHMS:
+            keygen = self.rate(
+                key_count,
+                lambda: [generate_keypair(algorithm) for _ in range(key_count)],
+            )
+            private_key, public_key = generate_keypair(algorithm)
+            signatures = []
+            sign = self.rate(
+                count,
+                lambda: signatures.extend(
+                    sign_digest(digest, private_key) for digest in digests
+                ),
+            )
+            verify = self.rate(
+                count,
+                lambda: all(
+                    verify_digest_signature(digest, signature, public_key)
+                    for digest, signature in zip(digests, signatures)
+                ),
+            )
+            self.stdout.write(
+                f"{algorithm:<14}{keygen:>12.1f}{sign:>12.1f}{verify:>14.1f}"
+            )
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.keypool import pool_depth, refill_pool
+from users.models import KeyAlgorithm
+
+
+class Command(BaseCommand):
+    help = "Completa o pool de pares de chaves pré-gerados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--low", type=int, default=settings.KEYPOOL_LOW_WATERMARK)
+        parser.add_argument(
+            "--high", type=int, default=settings.KEYPOOL_HIGH_WATERMARK
+        )
+        parser.add_argument(
+            "--algorithm",
+            choices=KeyAlgorithm.values,
+            default=KeyAlgorithm.RSA_2048,
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1, help="Processos gerando chaves."
+        )
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="Continua executando e verifica o pool periodicamente.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Segundos entre verificações no modo daemon.",
+        )
+
+    def refill(self, options, executor):
+        generated = refill_pool(
+            options["low"],
+            options["high"],
+            executor=executor,
+            algorithm=options["algorithm"],
+        )
+        if generated:
+            self.stdout.write(
+                f"{generated} pares gerados, pool com "
+                f"{pool_depth(options['algorithm'])} pares."
+            )
+        return generated
+
+    def handle(self, *args, **options):
+        executor = None
+        if options["workers"] > 1:
+            executor = ProcessPoolExecutor(max_workers=options["workers"])
+        try:
+            self.refill(options, executor)
+            while options["daemon"]:
+                time.sleep(options["interval"])
+                self.refill(options, executor)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(f"Pool com {pool_depth(options['algorithm'])} pares.")
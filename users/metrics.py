@@ -0,0 +1,244 @@
+"""
+Métricas do processo (histogramas e contadores) exportadas no formato texto do
+Prometheus. O módulo não depende do Django: `crypto_utils` o usa diretamente e
+o app `users` só liga ou desliga a coleta de acordo com METRICS_ENABLED.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Desligado pelo UsersConfig quando settings.METRICS_ENABLED é False.
+enabled = True
+
+# Limites (em segundos) dos histogramas de latência.
+LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# Limites dos histogramas de contagem por requisição (queries, operações).
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Faixas de tamanho de payload usadas como rótulo, para manter a
+# cardinalidade das séries baixa.
+PAYLOAD_SIZES = (
+    (1024, "1KB"),
+    (64 * 1024, "64KB"),
+    (1024**2, "1MB"),
+    (16 * 1024**2, "16MB"),
+)
+
+_registry = []
+_collectors = []
+
+
+def payload_label(size: int) -> str:
+    for limit, label in PAYLOAD_SIZES:
+        if size <= limit:
+            return label
+    return "large"
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [
+        '%s="%s"' % (name, str(value).replace("\\", r"\\").replace('"', r"\""))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """
+    Histograma com rótulos. Cada série guarda a contagem por faixa, a soma e
+    o total de observações; observe() custa um bisect e um lock.
+    """
+
+    def __init__(self, name, documentation, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, labels: tuple, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [
+                (labels, list(counts), total)
+                for labels, (counts, total) in self._series.items()
+            ]
+        for labels, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    self.labelnames, labels, f'le="{_format_value(bound)}"'
+                )
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            plain_labels = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{plain_labels} {_format_value(total)}"
+            yield f"{self.name}_count{plain_labels} {cumulative}"
+
+
+def register_collector(collector):
+    """
+    Registra uma função chamada a cada exportação que devolve tuplas
+    (nome, tipo, descrição, [(rótulos (dict), valor)]), para valores que já
+    são mantidos em outro lugar (por exemplo, as estatísticas dos caches).
+    """
+    _collectors.append(collector)
+
+
+def render() -> str:
+    """
+    Exporta todas as métricas no formato texto do Prometheus (versão 0.0.4).
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = _format_labels(labels.keys(), labels.values())
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def clear():
+    for metric in _registry:
+        metric.clear()
+
+
+crypto_operation_seconds = Histogram(
+    "crypto_operation_seconds",
+    "Duração das operações de users.crypto_utils.",
+    ("operation", "key", "payload"),
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições por view.",
+    ("view", "method", "status"),
+)
+http_request_queries = Histogram(
+    "http_request_queries",
+    "Queries SQL executadas por requisição.",
+    ("view",),
+    buckets=COUNT_BUCKETS,
+)
+http_request_crypto_operations = Histogram(
+    "http_request_crypto_operations",
+    "Operações de criptografia executadas por requisição.",
+    ("view",),
+    buckets=COUNT_BUCKETS,
+)
+
+
+class RequestStats:
+    """
+    Contadores da requisição atual, acessados pelo ContextVar request_stats.
+    """
+
+    __slots__ = ("queries", "crypto_operations")
+
+    def __init__(self):
+        self.queries = 0
+        self.crypto_operations = 0
+
+
+request_stats = ContextVar("request_stats", default=None)
+
+
+class CryptoTimer:
+    """
+    Mede uma operação de criptografia. A chave e o tamanho do payload só são
+    convertidos em rótulos no fim da medição, e a chave pode ser atribuída
+    dentro do bloco quando só é conhecida depois (carga de PEM).
+
+    Args:
+    - operation (str): Nome da operação.
+    - key: Chave usada, convertida em rótulo por `describe_key`.
+    - payload (int): Tamanho da mensagem em bytes, se houver.
+    - describe_key (callable): Converte a chave em um rótulo curto.
+    """
+
+    __slots__ = ("operation", "key", "payload", "describe_key", "started")
+
+    def __init__(self, operation, key=None, payload=None, describe_key=str):
+        self.operation = operation
+        self.key = key
+        self.payload = payload
+        self.describe_key = describe_key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        key = "" if self.key is None else self.describe_key(self.key)
+        payload = "" if self.payload is None else payload_label(self.payload)
+        crypto_operation_seconds.observe((self.operation, key, payload), elapsed)
+        stats = request_stats.get()
+        if stats is not None:
+            stats.crypto_operations += 1
+
+
+class _NoopTimer:
+    """
+    Substituto inerte do CryptoTimer quando as métricas estão desligadas.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NOOP_TIMER = _NoopTimer()
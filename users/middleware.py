@@ -0,0 +1,79 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+
+
+def count_query(execute, sql, params, many, context):
+    """
+    Execute wrapper instalado em cada conexão (ver UsersConfig.ready) que
+    conta as queries da requisição atual.
+    """
+    stats = metrics.request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    # connection_created é disparado a cada reconexão do mesmo wrapper.
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class MetricsMiddleware:
+    """
+    Registra, por view, a latência da requisição, o número de queries SQL e
+    o número de operações de criptografia. Deve ser o primeiro middleware,
+    para medir a requisição inteira. Com METRICS_ENABLED = False ele é
+    removido da cadeia.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = metrics.RequestStats()
+        token = metrics.request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.request_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.request_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, stats, elapsed):
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name if match else None) or "<unresolved>"
+        metrics.http_request_duration_seconds.observe(
+            (view, request.method, response.status_code), elapsed
+        )
+        metrics.http_request_queries.observe((view,), stats.queries)
+        metrics.http_request_crypto_operations.observe(
+            (view,), stats.crypto_operations
+        )
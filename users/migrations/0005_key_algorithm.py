@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_pooledkeypair'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='key_algorithm',
+            field=models.CharField(choices=[('rsa-2048', 'RSA-2048'), ('ed25519', 'Ed25519'), ('ecdsa-p256', 'ECDSA P-256')], default='rsa-2048', max_length=16, verbose_name='Algoritmo da chave'),
+        ),
+        migrations.AddField(
+            model_name='pooledkeypair',
+            name='algorithm',
+            field=models.CharField(choices=[('rsa-2048', 'RSA-2048'), ('ed25519', 'Ed25519'), ('ecdsa-p256', 'ECDSA P-256')], default='rsa-2048', max_length=16, verbose_name='Algoritmo da chave'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.4 on 2026-10-18 07:58
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_first_versions(apps, schema_editor):
+    # A chave atual de cada usuário vira a versão 1.
+    CustomUser = apps.get_model('users', 'CustomUser')
+    SigningKey = apps.get_model('users', 'SigningKey')
+    users = CustomUser.objects.filter(public_key__isnull=False).only(
+        'id', 'public_key', 'key_algorithm'
+    )
+    for user in users.iterator():
+        public_key = bytes(user.public_key)
+        user.signing_key = SigningKey.objects.create(
+            owner=user,
+            version=1,
+            public_key=public_key,
+            fingerprint=hashlib.sha256(public_key).hexdigest(),
+            algorithm=user.key_algorithm,
+        )
+        user.save(update_fields=['signing_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_key_algorithm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SigningKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(verbose_name='Versão')),
+                ('public_key', models.BinaryField(verbose_name='Chave pública')),
+                ('fingerprint', models.CharField(max_length=64, verbose_name='Impressão digital')),
+                ('algorithm', models.CharField(choices=[('rsa-2048', 'RSA-2048'), ('ed25519', 'Ed25519'), ('ecdsa-p256', 'ECDSA P-256')], default='rsa-2048', max_length=16, verbose_name='Algoritmo da chave')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signing_keys', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='signing_key',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='users.signingkey', verbose_name='Chave de assinatura'),
+        ),
+        migrations.AddConstraint(
+            model_name='signingkey',
+            constraint=models.UniqueConstraint(fields=('owner', 'version'), name='unique_signing_key_version'),
+        ),
+        migrations.RunPython(create_first_versions, migrations.RunPython.noop),
+    ]
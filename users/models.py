@@ -1,7 +1,106 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Max
+
+from . import crypto_utils
+
+
+class KeyAlgorithm(models.TextChoices):
+    RSA_2048 = crypto_utils.RSA_2048, "RSA-2048"
+    ED25519 = crypto_utils.ED25519, "Ed25519"
+    ECDSA_P256 = crypto_utils.ECDSA_P256, "ECDSA P-256"
 
 
 class CustomUser(AbstractUser):
     private_key = models.BinaryField("Chave privada", blank=True, null=True)
     public_key = models.BinaryField("Chave pública", blank=True, null=True)
+    key_algorithm = models.CharField(
+        "Algoritmo da chave",
+        max_length=16,
+        choices=KeyAlgorithm.choices,
+        default=KeyAlgorithm.RSA_2048,
+    )
+    # Versão atual do par de chaves acima; é a que assina os novos documentos.
+    signing_key = models.ForeignKey(
+        "SigningKey",
+        related_name="+",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Chave de assinatura",
+    )
+
+    def set_keys(self, private_key, public_key, algorithm):
+        """
+        Troca o par de chaves do usuário, registrando a chave pública como
+        uma nova versão (SigningKey). As versões anteriores continuam
+        guardadas para verificar os documentos assinados com elas.
+
+        Args:
+        - private_key (bytes): Chave privada no formato PEM.
+        - public_key (bytes): Chave pública no formato PEM.
+        - algorithm (str): Algoritmo do par (KeyAlgorithm).
+
+        Retorna:
+        - SigningKey: A nova versão da chave.
+        """
+        with transaction.atomic():
+            last_version = self.signing_keys.aggregate(Max("version"))["version__max"]
+            signing_key = SigningKey.objects.create(
+                owner=self,
+                version=(last_version or 0) + 1,
+                public_key=public_key,
+                fingerprint=crypto_utils.key_fingerprint(public_key),
+                algorithm=algorithm,
+            )
+            self.private_key = private_key
+            self.public_key = public_key
+            self.key_algorithm = algorithm
+            self.signing_key = signing_key
+            self.save()
+        return signing_key
+
+
+class SigningKey(models.Model):
+    """
+    Versão da chave pública de um usuário. Cada documento guarda a versão que
+    o assinou, de modo que gerar um novo par de chaves não invalida as
+    assinaturas anteriores. Só a chave privada da versão atual é mantida
+    (CustomUser.private_key).
+    """
+
+    owner = models.ForeignKey(
+        CustomUser, related_name="signing_keys", on_delete=models.CASCADE
+    )
+    version = models.PositiveIntegerField("Versão")
+    public_key = models.BinaryField("Chave pública")
+    fingerprint = models.CharField("Impressão digital", max_length=64)
+    algorithm = models.CharField(
+        "Algoritmo da chave",
+        max_length=16,
+        choices=KeyAlgorithm.choices,
+        default=KeyAlgorithm.RSA_2048,
+    )
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "version"], name="unique_signing_key_version"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id} v{self.version}"
+
+
+class PooledKeyPair(models.Model):
+    private_key = models.BinaryField("Chave privada")
+    public_key = models.BinaryField("Chave pública")
+    algorithm = models.CharField(
+        "Algoritmo da chave",
+        max_length=16,
+        choices=KeyAlgorithm.choices,
+        default=KeyAlgorithm.RSA_2048,
+    )
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
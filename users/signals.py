@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .crypto_utils import private_key_cache, public_key_cache
+from .models import CustomUser
+
+
+@receiver(post_delete, sender=CustomUser)
+def evict_user_keys(sender, instance, **kwargs):
+    public_key_cache.evict_user(instance.pk)
+    private_key_cache.evict_user(instance.pk)
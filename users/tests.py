@@ -1,3 +1,226 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from documents.models import Document
+from users import keypool, metrics
+from users.crypto_utils import (
+    ALGORITHMS,
+    ECDSA_P256,
+    ED25519,
+    KeyCache,
+    generate_digest,
+    generate_keypair_pem,
+    get_cached_private_key,
+    get_cached_public_key,
+    key_algorithm,
+    load_private_key_from_pem,
+    load_public_key_from_pem,
+    private_key_cache,
+    public_key_cache,
+    sign_digest,
+    sign_message,
+    verify_digest_signature,
+    verify_signature,
+    verify_signatures_batch,
+)
+from users.models import CustomUser, PooledKeyPair
+
+
+def cached_users(cache):
+    return {cache_key[0] for cache_key in cache._entries}
+
+
+class KeyCacheTests(TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = KeyCache(maxsize=2)
+        cache.get_or_compute((1, "a"), lambda: "a")
+        cache.get_or_compute((1, "b"), lambda: "b")
+        cache.get_or_compute((1, "a"), lambda: "outro")
+        cache.get_or_compute((2, "c"), lambda: "c")
+
+        self.assertEqual(list(cache._entries), [(1, "a"), (2, "c")])
+        self.assertEqual(cache.get_or_compute((1, "a"), lambda: "outro"), "a")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 3))
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_evict_user(self):
+        cache = KeyCache()
+        cache.get_or_compute((1, "a"), lambda: "a")
+        cache.get_or_compute((1, "b"), lambda: "b")
+        cache.get_or_compute((2, "a"), lambda: "a")
+
+        self.assertEqual(cache.evict_user(1), 2)
+        self.assertEqual(cached_users(cache), {2})
+        self.assertEqual(cache.evict_user(1), 0)
+
+
+class KeyAlgorithmTests(TestCase):
+    """
+    Assinaturas RSA-2048, Ed25519 e ECDSA P-256 pelas mesmas funções.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.keys = {}
+        for algorithm in ALGORITHMS:
+            private_pem, public_pem = generate_keypair_pem(algorithm)
+            cls.keys[algorithm] = (
+                load_private_key_from_pem(private_pem),
+                load_public_key_from_pem(public_pem),
+                public_pem,
+            )
+
+    def test_round_trips(self):
+        digest = generate_digest("mensagem")
+        for algorithm, (private_key, public_key, _) in self.keys.items():
+            with self.subTest(algorithm=algorithm):
+                self.assertEqual(key_algorithm(private_key), algorithm)
+                self.assertEqual(key_algorithm(public_key), algorithm)
+
+                signature = sign_message("mensagem", private_key)
+                self.assertTrue(verify_signature("mensagem", signature, public_key))
+                self.assertFalse(verify_signature("alterada", signature, public_key))
+
+                signature = sign_digest(digest, private_key)
+                self.assertTrue(verify_digest_signature(digest, signature, public_key))
+                self.assertFalse(
+                    verify_digest_signature(bytes(32), signature, public_key)
+                )
+
+    def test_signature_from_another_algorithm_is_rejected(self):
+        digest = generate_digest("mensagem")
+        for signer in ALGORITHMS:
+            signature = sign_digest(digest, self.keys[signer][0])
+            for verifier in ALGORITHMS:
+                if verifier == signer:
+                    continue
+                with self.subTest(signer=signer, verifier=verifier):
+                    self.assertFalse(
+                        verify_digest_signature(
+                            digest, signature, self.keys[verifier][1]
+                        )
+                    )
+
+    def test_batch_with_mixed_algorithms(self):
+        items = []
+        for index, (private_key, _, public_pem) in enumerate(self.keys.values()):
+            signature = sign_digest(generate_digest("mensagem"), private_key)
+            items.append((index, public_pem, "mensagem", signature, True))
+            items.append((index, public_pem, "alterada", signature, True))
+        self.assertEqual(
+            verify_signatures_batch(items, max_workers=2), [True, False] * 3
+        )
+
+    @override_settings(DOCUMENT_SIGNING_QUEUE=False)
+    def test_generate_keys_and_sign_documents(self):
+        for algorithm in (ED25519, ECDSA_P256):
+            with self.subTest(algorithm=algorithm):
+                user = CustomUser.objects.create_user(algorithm, password="senha")
+                self.client.force_login(user)
+                self.client.post(reverse("generate_keys"), {"algorithm": algorithm})
+                user.refresh_from_db()
+                self.assertEqual(user.key_algorithm, algorithm)
+
+                document = Document(owner=user, title="Doc", content="Conteúdo")
+                document.sign(get_cached_private_key(user.id, user.private_key))
+                self.assertEqual(document.signature_algorithm, algorithm)
+                self.assertTrue(document.verify_signature())
+
+
+class KeyPoolTests(TestCase):
+    def setUp(self):
+        counters = dict(keypool._counters)
+        self.addCleanup(keypool._counters.update, counters)
+        keypool._counters.update(claimed=0, fallbacks=0)
+
+    def collected(self):
+        return {name: samples for name, _, _, samples in keypool.keypool_metrics()}
+
+    def test_empty_pool_falls_back_to_generating(self):
+        private_key, public_key = keypool.take_keypair(ED25519)
+        self.assertIn(b"PRIVATE KEY", private_key)
+        self.assertEqual(
+            keypool.pool_stats(ED25519), {"claimed": 0, "fallbacks": 1, "depth": 0}
+        )
+        collected = self.collected()
+        self.assertEqual(collected["keypool_fallbacks_total"], [({}, 1)])
+        self.assertEqual(collected["keypool_claimed_total"], [({}, 0)])
+
+    def test_claims_from_pool(self):
+        self.assertEqual(keypool.refill_pool(1, 2, algorithm=ED25519), 2)
+        first = PooledKeyPair.objects.filter(algorithm=ED25519).order_by("id")[0]
+
+        pair = keypool.take_keypair(ED25519)
+        self.assertEqual(pair, (bytes(first.private_key), bytes(first.public_key)))
+        self.assertEqual(
+            keypool.pool_stats(ED25519), {"claimed": 1, "fallbacks": 0, "depth": 1}
+        )
+        collected = self.collected()
+        self.assertIn(({"algorithm": ED25519}, 1), collected["keypool_depth"])
+        self.assertEqual(collected["keypool_claimed_total"], [({}, 1)])
+        self.assertEqual(collected["keypool_fallbacks_total"], [({}, 0)])
+
+
+class CryptoMetricsTests(TestCase):
+    def setUp(self):
+        metrics.crypto_operation_seconds.clear()
+        self.addCleanup(metrics.crypto_operation_seconds.clear)
+
+    def payload_labels(self, operation):
+        return {
+            labels[2]
+            for labels in metrics.crypto_operation_seconds._series
+            if labels[0] == operation
+        }
+
+    def test_hash_payload_is_measured_in_bytes(self):
+        # 600 caracteres, 1200 bytes em UTF-8.
+        generate_digest("é" * 600)
+        self.assertEqual(self.payload_labels("hash"), {"64KB"})
+
+        metrics.crypto_operation_seconds.clear()
+        generate_digest(b"a" * 600)
+        self.assertEqual(self.payload_labels("hash"), {"1KB"})
+
+
+@override_settings(DOCUMENT_SIGNING_QUEUE=False)
+class KeyChangeTests(TestCase):
+    """
+    Gerar um novo par de chaves remove as chaves antigas do usuário dos
+    caches deste processo, sem afetar os outros usuários.
+    """
+
+    def setUp(self):
+        self.addCleanup(public_key_cache.clear)
+        self.addCleanup(private_key_cache.clear)
+
+    def create_user(self, username):
+        user = CustomUser.objects.create_user(username, password="senha")
+        user.set_keys(*generate_keypair_pem(ED25519), ED25519)
+        get_cached_private_key(user.id, user.private_key)
+        get_cached_public_key(user.id, user.public_key)
+        return user
+
+    def test_generate_keys_evicts_cached_keys(self):
+        user = self.create_user("troca")
+        other = self.create_user("outro")
+        old_public_key = bytes(user.public_key)
+
+        self.client.force_login(user)
+        response = self.client.post(reverse("generate_keys"), {"algorithm": ED25519})
+        self.assertRedirects(response, reverse("show_my_keys"))
+
+        user.refresh_from_db()
+        self.assertNotEqual(bytes(user.public_key), old_public_key)
+        self.assertEqual(user.signing_key.version, 2)
+        for cache in (public_key_cache, private_key_cache):
+            self.assertNotIn(user.id, cached_users(cache))
+            self.assertIn(other.id, cached_users(cache))
+
+        # As próximas assinaturas usam a chave nova.
+        document = Document(owner=user, title="Depois", content="Nova chave")
+        document.sign(get_cached_private_key(user.id, user.private_key))
+        self.assertEqual(document.signing_key_id, user.signing_key_id)
+        self.assertTrue(document.verify_signature())
@@ -0,0 +1,283 @@
+"""
+Verificador offline de pacotes exportados (manage.py export_documents ou
+/documents/export/). Usa apenas users.crypto_utils e não precisa do Django:
+
+    python -m users.verify_bundle documentos.jsonl
+    python -m users.verify_bundle documentos.zip --workers 16
+    python -m users.verify_bundle documentos.jsonl --trusted-keys chaves.txt
+
+Cada registro traz a chave pública de quem assinou, então, sozinho, o pacote
+só prova que não foi alterado em relação a essas chaves: quem o gerou pode
+ter trocado conteúdo, assinatura e chave juntos. Com --trusted-keys, só são
+aceitas as chaves cujas impressões digitais (SHA256 do PEM, mostradas em
+"Minhas chaves") estão no arquivo.
+
+As linhas do pacote são lidas em streaming e verificadas em lotes por um
+pool de processos; cada processo carrega cada chave pública uma única vez.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from users.crypto_utils import (
+    chunked_digest,
+    generate_digest,
+    get_cached_public_key,
+    key_algorithm,
+    key_fingerprint,
+    merkle_root_from_proof,
+    verify_digest_signature,
+    verify_merkle_root_signature,
+    verify_signature,
+)
+
+# Mesmos valores de documents.models.SignatureScheme.
+LEGACY = 1
+DIGEST = 2
+MERKLE = 3
+
+VERIFIED = "verified"
+FAILED = "failed"
+MALFORMED = "malformed"
+UNTRUSTED = "untrusted"
+
+
+def verify_record(record: dict) -> bool:
+    """
+    Verifica um registro de documento do pacote, com as mesmas regras de
+    Document.verify_signature().
+
+    Retorna:
+    - bool: True se a assinatura for válida. Campos ausentes ou inválidos
+      levantam KeyError/ValueError/TypeError (registro malformado).
+    """
+    owner = record["owner"]
+    public_key_pem = record["public_key"].encode("ascii")
+    content = record["content"]
+    hash = record["hash"]
+    signature = bytes.fromhex(record["signature"])
+    scheme = record["signature_scheme"]
+    public_key = get_cached_public_key(owner, public_key_pem)
+
+    if key_algorithm(public_key) != record["signature_algorithm"]:
+        return False
+    if scheme == LEGACY:
+        return verify_signature(content + hash, signature, public_key)
+    if scheme not in (DIGEST, MERKLE):
+        raise ValueError(f"Esquema de assinatura desconhecido: {scheme}")
+
+    chunk_size = record.get("chunk_size")
+    if chunk_size:
+        digest = chunked_digest(content, chunk_size)
+    else:
+        digest = generate_digest(content)
+    if digest.hex() != hash:
+        return False
+    if scheme == MERKLE:
+        root = bytes.fromhex(record["merkle_root"])
+        path = [
+            (side, bytes.fromhex(sibling)) for side, sibling in record["merkle_path"]
+        ]
+        if merkle_root_from_proof(digest, path) != root:
+            return False
+        return verify_merkle_root_signature(owner, public_key_pem, root, signature)
+    return verify_digest_signature(digest, signature, public_key)
+
+
+def load_trusted_keys(path) -> frozenset:
+    """
+    Lê as impressões digitais confiáveis: uma por linha, em hexadecimal;
+    linhas vazias e comentários (#) são ignorados.
+
+    Retorna:
+    - frozenset: Impressões digitais em minúsculas.
+    """
+    fingerprints = set()
+    with open(path, encoding="utf-8") as trusted_file:
+        for line_number, line in enumerate(trusted_file, start=1):
+            fingerprint = line.split("#", 1)[0].strip().lower()
+            if not fingerprint:
+                continue
+            if len(fingerprint) != 64 or set(fingerprint) - set("0123456789abcdef"):
+                raise ValueError(
+                    f"{path}, linha {line_number}: impressão digital inválida."
+                )
+            fingerprints.add(fingerprint)
+    return frozenset(fingerprints)
+
+
+def verify_lines(batch, trusted_keys=None) -> tuple:
+    """
+    Verifica, dentro de um processo do pool, um lote de linhas do pacote.
+
+    Args:
+    - batch (list): Pares (número da linha, linha em bytes).
+    - trusted_keys (frozenset): Impressões digitais aceitas, ou None para
+      aceitar a chave de cada registro.
+
+    Retorna:
+    - tuple: (contagens por resultado, registro "end" se estiver no lote,
+      [(número da linha, id, resultado)] dos documentos não verificados).
+    """
+    counts = {VERIFIED: 0, FAILED: 0, MALFORMED: 0, UNTRUSTED: 0}
+    end = None
+    problems = []
+    for line_number, line in batch:
+        document_id = None
+        try:
+            record = json.loads(line)
+            if record.get("type") == "end":
+                end = record
+                continue
+            document_id = record.get("id")
+            if (
+                trusted_keys is not None
+                and key_fingerprint(record["public_key"]) not in trusted_keys
+            ):
+                result = UNTRUSTED
+            else:
+                result = VERIFIED if verify_record(record) else FAILED
+        except (ValueError, KeyError, TypeError, AttributeError):
+            result = MALFORMED
+        counts[result] += 1
+        if result != VERIFIED:
+            problems.append((line_number, document_id, result))
+    return counts, end, problems
+
+
+def open_bundle(path):
+    """
+    Abre o JSONL de um pacote, direto do arquivo ou de dentro do ZIP, para
+    leitura em streaming.
+    """
+    if zipfile.is_zipfile(path):
+        bundle = zipfile.ZipFile(path)
+        return bundle.open("documents.jsonl")
+    return open(path, "rb")
+
+
+def read_batches(lines, batch_size):
+    batch = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        batch.append((line_number, line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def verify_bundle(
+    path, workers=None, batch_size=500, on_problem=None, trusted_keys=None
+):
+    """
+    Verifica todos os documentos de um pacote em paralelo.
+
+    Args:
+    - path (str): Pacote JSONL ou ZIP.
+    - workers (int): Número de processos. Padrão: número de CPUs.
+    - batch_size (int): Linhas enviadas por vez a um processo.
+    - on_problem (callable): Chamado com (linha, id, resultado) para cada
+      documento que falhou, está malformado ou usa uma chave não confiável.
+    - trusted_keys (frozenset): Impressões digitais das chaves aceitas. None
+      aceita a chave embutida em cada registro.
+
+    Retorna:
+    - dict: Contagens por resultado, o registro "end" (None se o pacote foi
+      truncado) e o tempo total em segundos.
+    """
+    workers = workers or os.cpu_count() or 1
+    totals = {VERIFIED: 0, FAILED: 0, MALFORMED: 0, UNTRUSTED: 0}
+    end = None
+    started = time.perf_counter()
+
+    with open_bundle(path) as lines, ProcessPoolExecutor(workers) as pool:
+        pending = set()
+
+        def collect():
+            nonlocal end
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                counts, batch_end, problems = future.result()
+                for result, count in counts.items():
+                    totals[result] += count
+                end = batch_end or end
+                if on_problem:
+                    for problem in problems:
+                        on_problem(*problem)
+
+        for batch in read_batches(lines, batch_size):
+            pending.add(pool.submit(verify_lines, batch, trusted_keys))
+            # Limita os lotes em memória: o pacote nunca é carregado inteiro.
+            while len(pending) >= workers * 2:
+                collect()
+        while pending:
+            collect()
+
+    return {**totals, "end": end, "elapsed": time.perf_counter() - started}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m users.verify_bundle",
+        description="Verifica offline as assinaturas de um pacote exportado.",
+    )
+    parser.add_argument("bundle", help="Pacote JSONL ou ZIP.")
+    parser.add_argument("--workers", type=int, help="Processos de verificação.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--quiet", action="store_true", help="Não lista os documentos com erro."
+    )
+    parser.add_argument(
+        "--trusted-keys",
+        metavar="ARQUIVO",
+        help="Impressões digitais (SHA256) das chaves aceitas, uma por linha.",
+    )
+    args = parser.parse_args(argv)
+    trusted_keys = None
+    if args.trusted_keys:
+        try:
+            trusted_keys = load_trusted_keys(args.trusted_keys)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    def report(line_number, document_id, result):
+        print(f"linha {line_number}: documento {document_id}: {result}")
+
+    summary = verify_bundle(
+        args.bundle,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        on_problem=None if args.quiet else report,
+        trusted_keys=trusted_keys,
+    )
+    total = sum(summary[result] for result in (VERIFIED, FAILED, MALFORMED, UNTRUSTED))
+    elapsed = summary["elapsed"]
+    print(
+        f"{total} documentos em {elapsed:.2f}s ({total / elapsed:.1f} docs/s): "
+        f"{summary[VERIFIED]} verificados, {summary[FAILED]} com falha, "
+        f"{summary[MALFORMED]} malformados, "
+        f"{summary[UNTRUSTED]} com chave não confiável"
+    )
+    if trusted_keys is None:
+        print(
+            "Atenção: chaves não fixadas. As assinaturas foram verificadas com "
+            "as chaves públicas do próprio pacote, o que não prova quem assinou; "
+            "use --trusted-keys."
+        )
+    end = summary["end"]
+    complete = end is not None and end.get("count") == total
+    if not complete:
+        print("Atenção: pacote incompleto (registro final ausente ou divergente).")
+    return 0 if complete and summary[VERIFIED] == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
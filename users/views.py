@@ -1,9 +1,14 @@
-from django.contrib.auth.decorators import login_required
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import Http404, HttpResponse
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.views.generic.edit import CreateView
-from .crypto_utils import generate_keypair_pem
+from . import metrics
+from .crypto_utils import private_key_cache, public_key_cache
 from .forms import UserRegisterForm
+from .keypool import take_keypair
+from .models import KeyAlgorithm
 
 
 def index(request):
@@ -18,13 +23,24 @@ class UserRegisterView(CreateView):
 
 @login_required
 def generate_keys(request):
+    context = {"algorithms": KeyAlgorithm.choices}
     if request.method == "POST":
-        private_key, public_key = generate_keypair_pem()
-        request.user.private_key = private_key
-        request.user.public_key = public_key
-        request.user.save()
+        algorithm = request.POST.get("algorithm", KeyAlgorithm.RSA_2048)
+        if algorithm not in KeyAlgorithm.values:
+            context["error"] = "Algoritmo de chave inválido."
+            return render(request, "generate_keys.html", context, status=400)
+        private_key, public_key = take_keypair(algorithm)
+        # A chave anterior continua registrada como uma versão antiga: os
+        # documentos assinados com ela seguem verificáveis. Só os assinados
+        # sem versão registrada dependem da chave atual do usuário.
+        request.user.set_keys(private_key, public_key, algorithm)
+        public_key_cache.evict_user(request.user.id)
+        private_key_cache.evict_user(request.user.id)
+        request.user.documents.filter(
+            signing_key__isnull=True, signature__isnull=False
+        ).invalidate_verification()
         return redirect("show_my_keys")
-    return render(request, "generate_keys.html")
+    return render(request, "generate_keys.html", context)
 
 
 @login_required
@@ -33,6 +49,17 @@ def show_my_keys(request):
 
     context = {
         "public_key": public_key,
+        "key_algorithm": request.user.get_key_algorithm_display(),
+        "signing_key": request.user.signing_key,
     }
 
     return render(request, "show_my_keys.html", context)
+
+
+@user_passes_test(lambda user: user.is_active and user.is_staff)
+def export_metrics(request):
+    if not getattr(settings, "METRICS_ENABLED", True):
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )